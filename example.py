@@ -6,8 +6,10 @@ This script shows how to use PolicyEngine Ireland to calculate taxes and benefit
 for different household types in Ireland.
 """
 
-from policyengine_ie import IrishTaxBenefitSystem
-from policyengine_core.simulations import Simulation
+import numpy as np
+
+from policyengine_ie import Simulation
+from policyengine_ie.structure import build_simulation
 
 
 def create_working_family_example():
@@ -15,55 +17,51 @@ def create_working_family_example():
     print("=== Working Family Example ===")
     print("Two-parent family, one working (€60,000), two children (ages 6 and 15)")
 
-    system = IrishTaxBenefitSystem()
-    simulation = Simulation(system=system)
-
-    # Add family members
-    simulation.add_person(
-        person_id="parent_1",
-        age=35,
-        employment_income=60000,
-    )
-
-    simulation.add_person(
-        person_id="parent_2",
-        age=33,
-        employment_income=0,  # Not working
-    )
-
-    simulation.add_person(person_id="child_1", age=6)
-    simulation.add_person(person_id="child_2", age=15)
-
-    # Define household structure
-    simulation.add_tax_unit(
-        tax_unit_id="tax_unit_1",
-        adults=["parent_1", "parent_2"],
-        children=["child_1", "child_2"],
-    )
-
-    simulation.add_family(
-        family_id="family_1",
-        parents=["parent_1", "parent_2"],
-        children=["child_1", "child_2"],
-    )
-
-    simulation.add_household(
-        household_id="household_1",
-        members=["parent_1", "parent_2", "child_1", "child_2"],
-    )
-
-    # Calculate results
     period = "2024"
+    simulation = Simulation(
+        situation={
+            "people": {
+                "parent_1": {
+                    "age": {period: 35},
+                    "employment_income": {period: 60_000},
+                },
+                "parent_2": {
+                    "age": {period: 33},
+                    "employment_income": {period: 0},  # Not working
+                },
+                "child_1": {"age": {period: 6}},
+                "child_2": {"age": {period: 15}},
+            },
+            "tax_units": {
+                "tax_unit_1": {
+                    "adults": ["parent_1", "parent_2"],
+                    "children": ["child_1", "child_2"],
+                }
+            },
+            "families": {
+                "family_1": {
+                    "parents": ["parent_1", "parent_2"],
+                    "children": ["child_1", "child_2"],
+                }
+            },
+            "households": {
+                "household_1": {
+                    "members": ["parent_1", "parent_2", "child_1", "child_2"]
+                }
+            },
+        }
+    )
 
-    # Income and taxes
-    employment_income = simulation.calculate("employment_income", period)["parent_1"]
-    income_tax = simulation.calculate("income_tax", period)["parent_1"]
-    usc = simulation.calculate("usc", period)["parent_1"]
-    employee_prsi = simulation.calculate("employee_prsi", period)["parent_1"]
+    # People are in the order of the situation: parent_1 is first
+    employment_income = simulation.calculate("employment_income", period)[0]
+    income_tax = simulation.calculate("income_tax_net", period)[0]
+    usc = simulation.calculate("usc", period)[0]
+    employee_prsi = simulation.calculate("employee_prsi", period)[0]
 
     # Benefits
-    child_benefit_1 = simulation.calculate("child_benefit", period)["child_1"]
-    child_benefit_2 = simulation.calculate("child_benefit", period)["child_2"]
+    _, _, child_benefit_1, child_benefit_2 = simulation.calculate(
+        "child_benefit", period
+    )
 
     # Summary
     total_taxes = income_tax + usc + employee_prsi
@@ -88,26 +86,24 @@ def create_single_earner_example():
     print("=== Single Person Example ===")
     print("Single person earning €45,000 per year")
 
-    system = IrishTaxBenefitSystem()
-    simulation = Simulation(system=system)
-
-    simulation.add_person(
-        person_id="person_1",
-        age=28,
-        employment_income=45000,
-    )
-
-    simulation.add_tax_unit(tax_unit_id="tax_unit_1", adults=["person_1"])
-
-    simulation.add_household(household_id="household_1", members=["person_1"])
-
-    # Calculate results
     period = "2024"
+    simulation = Simulation(
+        situation={
+            "people": {
+                "person_1": {
+                    "age": {period: 28},
+                    "employment_income": {period: 45_000},
+                },
+            },
+            "tax_units": {"tax_unit_1": {"adults": ["person_1"]}},
+            "households": {"household_1": {"members": ["person_1"]}},
+        }
+    )
 
-    employment_income = simulation.calculate("employment_income", period)["person_1"]
-    income_tax = simulation.calculate("income_tax", period)["person_1"]
-    usc = simulation.calculate("usc", period)["person_1"]
-    employee_prsi = simulation.calculate("employee_prsi", period)["person_1"]
+    employment_income = simulation.calculate("employment_income", period)[0]
+    income_tax = simulation.calculate("income_tax_net", period)[0]
+    usc = simulation.calculate("usc", period)[0]
+    employee_prsi = simulation.calculate("employee_prsi", period)[0]
 
     total_taxes = income_tax + usc + employee_prsi
     net_income = employment_income - total_taxes
@@ -130,28 +126,35 @@ def create_pensioner_example():
     print("=== Pensioner Example ===")
     print("Single pensioner aged 70, State Pension only")
 
-    system = IrishTaxBenefitSystem()
-    simulation = Simulation(system=system)
-
-    simulation.add_person(
-        person_id="pensioner_1",
-        age=70,
-        employment_income=0,
-        pension_income=0,  # Only state pension
-    )
-
-    simulation.add_benefit_unit(
-        benefit_unit_id="benefit_unit_1", adults=["pensioner_1"]
+    period = "2024"
+    simulation = Simulation(
+        situation={
+            "people": {
+                "pensioner_1": {
+                    "age": {period: 70},
+                    "pension_income": {period: 0},  # Only state pension
+                    # 40 years of insurance, averaging 48 contributions a year
+                    "prsi_contributions": {period: 1_920},
+                    "prsi_insured_years": {period: 40},
+                },
+            },
+            "tax_units": {"tax_unit_1": {"adults": ["pensioner_1"]}},
+            "benefit_units": {"benefit_unit_1": {"adults": ["pensioner_1"]}},
+            "households": {"household_1": {"members": ["pensioner_1"]}},
+        }
     )
 
-    simulation.add_household(household_id="household_1", members=["pensioner_1"])
+    state_pension = simulation.calculate("state_pension_contributory", period)[0]
+    income_tax = simulation.calculate("income_tax_net", period)[0]
+    usc = simulation.calculate("usc", period)[0]
+    employee_prsi = simulation.calculate("employee_prsi", period)[0]
+    net_income = simulation.calculate("household_net_income", period)[0]
 
-    # Note: This is a simplified example - would need to implement state pension calculation
-    print("State Pension (Contributory): €15,043 per year")
-    print("Income Tax: €0 (below tax threshold)")
-    print("USC: €0 (reduced rate for over 70s with low income)")
-    print("PRSI: €0 (exempt for over 70s)")
-    print("Net Annual Income: €15,043")
+    print(f"State Pension (Contributory): €{state_pension:,.2f} per year")
+    print(f"Income Tax: €{income_tax:,.2f}")
+    print(f"USC: €{usc:,.2f}")
+    print(f"PRSI: €{employee_prsi:,.2f}")
+    print(f"Net Annual Income: €{net_income:,.2f}")
     print()
 
 
@@ -160,23 +163,23 @@ def compare_tax_years():
     print("=== Tax Year Comparison ===")
     print("Single person earning €50,000 - comparing 2023 vs 2024")
 
-    system = IrishTaxBenefitSystem()
-    simulation = Simulation(system=system)
-
-    simulation.add_person(
-        person_id="person_1",
-        age=30,
-        employment_income=50000,
+    simulation = Simulation(
+        situation={
+            "people": {
+                "person_1": {
+                    "age": {"2023": 30, "2024": 30},
+                    "employment_income": {"2023": 50_000, "2024": 50_000},
+                },
+            },
+            "tax_units": {"tax_unit_1": {"adults": ["person_1"]}},
+            "households": {"household_1": {"members": ["person_1"]}},
+        }
     )
 
-    simulation.add_tax_unit(tax_unit_id="tax_unit_1", adults=["person_1"])
-
-    simulation.add_household(household_id="household_1", members=["person_1"])
-
     for year in ["2023", "2024"]:
-        income_tax = simulation.calculate("income_tax", period=year)["person_1"]
-        usc = simulation.calculate("usc", period=year)["person_1"]
-        employee_prsi = simulation.calculate("employee_prsi", period=year)["person_1"]
+        income_tax = simulation.calculate("income_tax_net", period=year)[0]
+        usc = simulation.calculate("usc", period=year)[0]
+        employee_prsi = simulation.calculate("employee_prsi", period=year)[0]
 
         total_taxes = income_tax + usc + employee_prsi
         net_income = 50000 - total_taxes
@@ -189,6 +192,39 @@ def compare_tax_years():
     print()
 
 
+def create_bulk_example():
+    """Example: Many households at once, built from flat arrays."""
+    print("=== Bulk Example ===")
+    print("10,000 single earners, €0 to €150,000, built with build_simulation")
+
+    # For large populations, one array per variable replaces a situation
+    # dict. Each person here is their own household.
+    earnings = np.linspace(0, 150_000, 10_000)
+    simulation = build_simulation(
+        household_id=np.arange(len(earnings)),
+        inputs={
+            "age": np.full(len(earnings), 40),
+            "employment_income": earnings,
+        },
+        period="2024",
+    )
+
+    taxes = (
+        simulation.calculate("income_tax_net", "2024")
+        + simulation.calculate("usc", "2024")
+        + simulation.calculate("employee_prsi", "2024")
+    )
+
+    print(f"Total Taxes: €{taxes.sum():,.0f}")
+    for threshold in [30_000, 60_000, 100_000]:
+        index = np.searchsorted(earnings, threshold)
+        print(
+            f"  Earning €{earnings[index]:,.0f}: taxes €{taxes[index]:,.2f} "
+            f"({taxes[index] / earnings[index] * 100:.1f}% effective)"
+        )
+    print()
+
+
 if __name__ == "__main__":
     print("PolicyEngine Ireland - Example Calculations")
     print("=" * 50)
@@ -199,6 +235,7 @@ if __name__ == "__main__":
         create_single_earner_example()
         create_pensioner_example()
         compare_tax_years()
+        create_bulk_example()
 
         print("✅ All examples completed successfully!")
         print("\nTo learn more about PolicyEngine Ireland:")
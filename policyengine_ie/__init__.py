@@ -4,8 +4,14 @@ PolicyEngine Ireland
 A microsimulation model of the Irish tax and benefit system.
 """
 
-from policyengine_ie.system import IrishTaxBenefitSystem
+from importlib.metadata import PackageNotFoundError, version
 
-__version__ = "0.1.0"
+from policyengine_ie.system import IrishTaxBenefitSystem, Simulation
 
-__all__ = ["IrishTaxBenefitSystem"]
+try:
+    __version__ = version("policyengine-ie")
+except PackageNotFoundError:
+    # Running from a source tree that is not installed
+    __version__ = "unknown"
+
+__all__ = ["IrishTaxBenefitSystem", "Simulation"]
@@ -0,0 +1,194 @@
+"""
+Command-line interface for PolicyEngine Ireland.
+
+Usage::
+
+    python -m policyengine_ie run --input households.parquet \
+        --variables income_tax_net,usc,employee_prsi --period 2024 \
+        --reform reform.json --output out.parquet
+
+    python -m policyengine_ie serve --port 8080
+
+    python -m policyengine_ie precision
+
+    python -m policyengine_ie validate --reference legacy.calculator:usc \
+        --variables usc --period 2025 --households 1000000
+
+    python -m policyengine_ie lint
+"""
+
+import argparse
+import importlib
+import sys
+from pathlib import Path
+from typing import List
+
+from policyengine_ie import batch, precision, service, validation, vectorization
+from policyengine_ie.reforms import ParametricReform, baseline_system
+
+
+def run(args: argparse.Namespace) -> None:
+    reform = None
+    if args.reform is not None:
+        reform = ParametricReform.from_json(Path(args.reform).read_text())
+    variables = [name.strip() for name in args.variables.split(",") if name.strip()]
+    people = batch.run(
+        args.input,
+        args.output,
+        variables,
+        str(args.period),
+        reform=reform,
+        chunk_size=args.chunk_size,
+    )
+    print(f"Wrote {people:,} people to {args.output}", file=sys.stderr)
+
+
+def compare_precision(args: argparse.Namespace) -> None:
+    deviations = precision.compare_precision(args.paths or None)
+    deviations.sort(key=lambda deviation: deviation.deviation, reverse=True)
+    for deviation in deviations[: args.top]:
+        print(
+            f"{deviation.deviation:10.4f}  {deviation.variable} "
+            f"({deviation.period}): {deviation.test}"
+        )
+    largest = deviations[0].deviation if deviations else 0.0
+    print(
+        f"Largest deviation over {len(deviations):,} outputs: €{largest:.4f}",
+        file=sys.stderr,
+    )
+
+
+def validate(args: argparse.Namespace) -> None:
+    module, _, name = args.reference.partition(":")
+    if not name:
+        raise SystemExit("Give the reference as module:function.")
+    reference = getattr(importlib.import_module(module), name)
+    variables = [name.strip() for name in args.variables.split(",") if name.strip()]
+    population = validation.synthetic_population(args.households, args.seed)
+    report = validation.differential_test(
+        reference,
+        variables,
+        population,
+        str(args.period),
+        tolerance=args.tolerance,
+        chunk_size=args.chunk_size,
+    )
+    print(report.summary())
+    for variable, variable_report in report.variables.items():
+        if variable_report.examples:
+            household = validation.shrink_household(
+                reference,
+                variable,
+                validation.select_household(population, variable_report.examples[0]),
+                str(args.period),
+                tolerance=args.tolerance,
+            )
+            print(f"Minimal household failing {variable}:")
+            for person in range(len(household["household_id"])):
+                values = ", ".join(
+                    f"{key}={values[person]}"
+                    for key, values in household.items()
+                    if key != "household_id"
+                )
+                print(f"  {values}")
+    if not report.passed:
+        sys.exit(1)
+
+
+def lint(args: argparse.Namespace) -> None:
+    issues = vectorization.check_formulas(baseline_system(), args.variables or None)
+    for issue in issues:
+        print(issue)
+    print(f"{len(issues):,} issues found", file=sys.stderr)
+    if issues:
+        sys.exit(1)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m policyengine_ie",
+        description="PolicyEngine Ireland",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser(
+        "run", help="Calculate variables for a CSV or Parquet file of people"
+    )
+    run_parser.add_argument("--input", required=True, help="CSV or Parquet input")
+    run_parser.add_argument("--output", required=True, help="CSV or Parquet output")
+    run_parser.add_argument(
+        "--variables", required=True, help="Comma-separated variables to calculate"
+    )
+    run_parser.add_argument("--period", required=True, help="Period, e.g. 2024")
+    run_parser.add_argument("--reform", help="JSON file of parameter changes")
+    run_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=batch.DEFAULT_CHUNK_SIZE,
+        help="Rows to read at a time",
+    )
+    run_parser.set_defaults(handler=run)
+
+    precision_parser = commands.add_parser(
+        "precision",
+        help="Compare single and double precision over the YAML policy tests",
+    )
+    precision_parser.add_argument(
+        "paths", nargs="*", help="YAML test files or directories"
+    )
+    precision_parser.add_argument(
+        "--top", type=int, default=10, help="Largest deviations to list"
+    )
+    precision_parser.set_defaults(handler=compare_precision)
+
+    validate_parser = commands.add_parser(
+        "validate",
+        help="Compare with a reference calculator over a synthetic population",
+    )
+    validate_parser.add_argument(
+        "--reference", required=True, help="Reference calculator, as module:function"
+    )
+    validate_parser.add_argument(
+        "--variables", required=True, help="Comma-separated variables to compare"
+    )
+    validate_parser.add_argument("--period", required=True, help="Period, e.g. 2025")
+    validate_parser.add_argument(
+        "--households", type=int, default=100_000, help="Households to generate"
+    )
+    validate_parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    validate_parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=validation.DEFAULT_TOLERANCE,
+        help="Largest difference in euros that is not a mismatch",
+    )
+    validate_parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=validation.DEFAULT_CHUNK_SIZE,
+        help="People to calculate at a time",
+    )
+    validate_parser.set_defaults(handler=validate)
+
+    lint_parser = commands.add_parser("lint", help="Check that formulas are vectorized")
+    lint_parser.add_argument(
+        "variables",
+        nargs="*",
+        help="Variables to check. Defaults to those under variables/gov",
+    )
+    lint_parser.set_defaults(handler=lint)
+
+    serve_parser = commands.add_parser("serve", help="Run the HTTP service")
+    serve_parser.set_defaults(handler=None)
+
+    args, remaining = parser.parse_known_args(argv)
+    if args.command == "serve":
+        service.main(remaining)
+        return
+    if remaining:
+        parser.error(f"unrecognized arguments: {' '.join(remaining)}")
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
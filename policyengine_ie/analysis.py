@@ -0,0 +1,379 @@
+"""
+Weighted distributional analysis of simulation results.
+
+Statistics are calculated from NumPy arrays of household values and weights:
+each income distribution is sorted once, after which quantiles, decile
+membership, poverty rates and the Gini coefficient are read off the sorted
+arrays, and group statistics (by county, household type or any other coded
+variable) are weighted ``bincount`` sums. No DataFrames are built.
+
+Following CSO practice, household income is equivalised with the national
+scale (one for the first adult, 0.66 for each other person aged 14 or over
+and 0.33 for each child under 14) and every person is counted, so household
+statistics are weighted by ``household_weight`` times household size.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+
+# CSO national equivalence scale
+FIRST_ADULT_WEIGHT = 1.0
+OTHER_ADULT_WEIGHT = 0.66
+CHILD_WEIGHT = 0.33
+CHILD_AGE_LIMIT = 14
+
+# At-risk-of-poverty line, as a share of median equivalised income
+POVERTY_LINE_MEDIAN_SHARE = 0.6
+
+# Changes in household income smaller than this, in euros, count as no change
+NO_CHANGE_TOLERANCE = 1.0
+
+HOUSEHOLD_TYPES = [
+    "Single adult",
+    "Lone parent",
+    "Couple or adults, no children",
+    "Couple or adults with children",
+]
+
+
+class WeightedDistribution:
+    """
+    A weighted distribution, sorted once on construction.
+
+    Args:
+        values: One value per record.
+        weights: Weight of each record.
+    """
+
+    def __init__(self, values: np.ndarray, weights: np.ndarray):
+        values = np.asarray(values, dtype=float)
+        weights = np.asarray(weights, dtype=float)
+        if values.shape != weights.shape:
+            raise ValueError(f"Got {len(values)} values but {len(weights)} weights.")
+        self.order = np.argsort(values, kind="stable")
+        self.values = values[self.order]
+        self.weights = weights[self.order]
+        self.cumulative_weights = np.cumsum(self.weights)
+        self.total_weight = self.cumulative_weights[-1] if len(self.weights) else 0.0
+        if self.total_weight <= 0:
+            raise ValueError("Weights must sum to a positive total.")
+
+    def quantile(self, quantiles) -> np.ndarray:
+        """Smallest values with at least the given shares of weight at or below."""
+        positions = np.searchsorted(
+            self.cumulative_weights,
+            np.asarray(quantiles, dtype=float) * self.total_weight,
+            side="left",
+        )
+        return self.values[np.minimum(positions, len(self.values) - 1)]
+
+    def median(self) -> float:
+        return float(self.quantile(0.5))
+
+    def mean(self) -> float:
+        return float(np.dot(self.values, self.weights) / self.total_weight)
+
+    def groups(self, count: int = 10) -> np.ndarray:
+        """
+        Which of ``count`` equal-weight groups (e.g. deciles) each record is
+        in, numbered from zero, in the records' original order.
+        """
+        share_below = (self.cumulative_weights - self.weights) / self.total_weight
+        sorted_groups = np.minimum((share_below * count).astype(int), count - 1)
+        groups = np.empty_like(sorted_groups)
+        groups[self.order] = sorted_groups
+        return groups
+
+    def share_below(self, threshold: float) -> float:
+        """Share of weight on values strictly below the threshold."""
+        position = np.searchsorted(self.values, threshold, side="left")
+        if position == 0:
+            return 0.0
+        return float(self.cumulative_weights[position - 1] / self.total_weight)
+
+    def gini(self) -> float:
+        """The Gini coefficient, from the area under the Lorenz curve."""
+        weighted_values = self.values * self.weights
+        cumulative_values = np.cumsum(weighted_values)
+        total_value = cumulative_values[-1]
+        if total_value == 0:
+            return 0.0
+        # Trapezium under each step of the Lorenz curve
+        lorenz_area = np.dot(self.weights, 2 * cumulative_values - weighted_values) / (
+            2 * self.total_weight * total_value
+        )
+        return float(1 - 2 * lorenz_area)
+
+
+def weighted_quantiles(values, weights, quantiles) -> np.ndarray:
+    return WeightedDistribution(values, weights).quantile(quantiles)
+
+
+def gini(values, weights) -> float:
+    return WeightedDistribution(values, weights).gini()
+
+
+def poverty_rate(
+    values,
+    weights,
+    line: float = None,
+    median_share: float = POVERTY_LINE_MEDIAN_SHARE,
+) -> float:
+    """
+    Share of weight below a poverty line, by default the at-risk-of-poverty
+    line of 60% of the weighted median.
+    """
+    distribution = WeightedDistribution(values, weights)
+    if line is None:
+        line = median_share * distribution.median()
+    return distribution.share_below(line)
+
+
+def group_codes(values) -> Tuple[np.ndarray, List[str]]:
+    """
+    Integer codes from zero and a label for each, for any array of groups.
+
+    Enum arrays keep their enum's order and names; other arrays are coded in
+    sorted order of their distinct values.
+    """
+    possible_values = getattr(values, "possible_values", None)
+    if possible_values is not None:
+        return np.asarray(values, dtype=int), [item.name for item in possible_values]
+    labels, codes = np.unique(np.asarray(values), return_inverse=True)
+    return codes, [str(label) for label in labels]
+
+
+def group_means(codes, values, weights, count: int) -> np.ndarray:
+    """Weighted mean of the values in each group, NaN for empty groups."""
+    totals = np.bincount(codes, weights=values * weights, minlength=count)
+    weight_totals = np.bincount(codes, weights=weights, minlength=count)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return totals / weight_totals
+
+
+def winners_and_losers(
+    change,
+    weights,
+    codes=None,
+    count: int = 1,
+    tolerance: float = NO_CHANGE_TOLERANCE,
+) -> Dict[str, np.ndarray]:
+    """
+    Shares of weight gaining, losing and seeing no change, in each group.
+
+    Args:
+        change: Change in income of each record.
+        weights: Weight of each record.
+        codes: Group of each record, from zero. All records are in one group
+            if not given.
+        count: Number of groups.
+        tolerance: Changes no larger than this count as no change.
+    """
+    change = np.asarray(change, dtype=float)
+    weights = np.asarray(weights, dtype=float)
+    if codes is None:
+        codes = np.zeros(len(change), dtype=int)
+    outcome = np.sign(change) * (np.abs(change) > tolerance)
+    # One bincount over (group, outcome) pairs
+    counts = np.bincount(
+        codes * 3 + outcome.astype(int) + 1,
+        weights=weights,
+        minlength=3 * count,
+    ).reshape(count, 3)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        shares = counts / counts.sum(axis=1, keepdims=True)
+    return {
+        "lose": shares[:, 0],
+        "no_change": shares[:, 1],
+        "gain": shares[:, 2],
+    }
+
+
+def equivalence_scale(simulation, period) -> np.ndarray:
+    """The CSO national equivalence scale of each household."""
+    household = simulation.populations["household"]
+    age = simulation.calculate("age", period)
+    people = household.nb_persons()
+    children = household.sum(age < CHILD_AGE_LIMIT)
+    other_adults = np.maximum(people - children - 1, 0)
+    return (
+        FIRST_ADULT_WEIGHT + OTHER_ADULT_WEIGHT * other_adults + CHILD_WEIGHT * children
+    )
+
+
+def household_type(simulation, period) -> np.ndarray:
+    """Code of each household in ``HOUSEHOLD_TYPES``."""
+    household = simulation.populations["household"]
+    age = simulation.calculate("age", period)
+    adults = household.sum(age >= 18)
+    has_children = household.any(age < 18)
+    return np.select(
+        [adults <= 1, adults > 1],
+        [
+            np.where(has_children, 1, 0),
+            np.where(has_children, 3, 2),
+        ],
+    )
+
+
+def household_values(simulation, variable: str, period) -> np.ndarray:
+    """A variable as one value per household, summing over members."""
+    entity = simulation.tax_benefit_system.get_variable(
+        variable, check_existence=True
+    ).entity
+    return simulation.map_result(
+        simulation.calculate(variable, period), entity.key, "household"
+    )
+
+
+def household_groups(simulation, variable: str, period) -> Tuple[np.ndarray, List[str]]:
+    """
+    Codes and labels of a grouping variable for each household. Values of
+    person and other group variables are taken from the household's first
+    member.
+    """
+    if variable == "household_type":
+        return household_type(simulation, period), list(HOUSEHOLD_TYPES)
+    entity = simulation.tax_benefit_system.get_variable(
+        variable, check_existence=True
+    ).entity
+    values = simulation.calculate(variable, period)
+    if entity.key != "household":
+        codes, labels = group_codes(values)
+        if not entity.is_person:
+            codes = simulation.populations[entity.key].project(codes)
+        household = simulation.populations["household"]
+        return household.value_from_first_person(codes), labels
+    return group_codes(values)
+
+
+def _income_and_weights(simulation, variable: str, period, equivalise: bool):
+    income = household_values(simulation, variable, period)
+    if equivalise:
+        income = income / equivalence_scale(simulation, period)
+    household = simulation.populations["household"]
+    weights = simulation.calculate("household_weight", period) * household.nb_persons()
+    return income, weights
+
+
+def distribution_summary(
+    simulation,
+    income_variable: str,
+    period,
+    equivalise: bool = True,
+    quantile_groups: int = 10,
+) -> dict:
+    """
+    Summary statistics of a household income distribution.
+
+    Returns:
+        A dict with ``mean``, ``median``, ``quantiles`` (the upper bounds of
+        all but the top quantile group), ``gini``, ``poverty_line`` and
+        ``poverty_rate``.
+    """
+    income, weights = _income_and_weights(
+        simulation, income_variable, period, equivalise
+    )
+    distribution = WeightedDistribution(income, weights)
+    median = distribution.median()
+    poverty_line = POVERTY_LINE_MEDIAN_SHARE * median
+    return {
+        "mean": distribution.mean(),
+        "median": median,
+        "quantiles": distribution.quantile(
+            np.arange(1, quantile_groups) / quantile_groups
+        ),
+        "gini": distribution.gini(),
+        "poverty_line": poverty_line,
+        "poverty_rate": distribution.share_below(poverty_line),
+    }
+
+
+def reform_impact(
+    baseline,
+    reformed,
+    income_variable: str,
+    period,
+    group_by: Sequence[str] = ("household_type",),
+    equivalise: bool = True,
+    quantile_groups: int = 10,
+) -> dict:
+    """
+    Distributional impact of a reform on household income.
+
+    Households are ranked into deciles (or ``quantile_groups``) by baseline
+    income. The poverty line is held at its baseline level.
+
+    Args:
+        baseline: Baseline simulation.
+        reformed: Reformed simulation of the same households.
+        income_variable: Income measure, summed over household members.
+        period: Period to compare.
+        group_by: Variables to break winners and losers down by, e.g.
+            ``"county"`` or ``"household_type"``.
+        equivalise: Whether to equivalise income for ranking and poverty.
+        quantile_groups: Number of income groups.
+
+    Returns:
+        A dict with baseline and reformed ``gini`` and ``poverty_rate``,
+        ``quantile_groups`` giving the mean and relative change in each
+        income group, ``winners_and_losers`` overall, and
+        ``by_group[variable]`` with ``labels``, ``mean_change`` and winners
+        and losers for each grouping variable.
+    """
+    baseline_income, weights = _income_and_weights(
+        baseline, income_variable, period, equivalise
+    )
+    reformed_income, _ = _income_and_weights(
+        reformed, income_variable, period, equivalise
+    )
+    change = household_values(reformed, income_variable, period) - household_values(
+        baseline, income_variable, period
+    )
+    baseline_distribution = WeightedDistribution(baseline_income, weights)
+    reformed_distribution = WeightedDistribution(reformed_income, weights)
+    poverty_line = POVERTY_LINE_MEDIAN_SHARE * baseline_distribution.median()
+
+    income_groups = baseline_distribution.groups(quantile_groups)
+    household_income = household_values(baseline, income_variable, period)
+    group_change = group_means(income_groups, change, weights, quantile_groups)
+    group_income = group_means(
+        income_groups, household_income, weights, quantile_groups
+    )
+    with np.errstate(invalid="ignore", divide="ignore"):
+        relative_change = group_change / group_income
+
+    impact = {
+        "gini": {
+            "baseline": baseline_distribution.gini(),
+            "reform": reformed_distribution.gini(),
+        },
+        "poverty_rate": {
+            "baseline": baseline_distribution.share_below(poverty_line),
+            "reform": reformed_distribution.share_below(poverty_line),
+        },
+        "quantile_groups": {
+            "mean_change": group_change,
+            "relative_change": relative_change,
+            "winners_and_losers": winners_and_losers(
+                change, weights, income_groups, quantile_groups
+            ),
+        },
+        "winners_and_losers": {
+            outcome: float(shares[0])
+            for outcome, shares in winners_and_losers(change, weights).items()
+        },
+        "by_group": {},
+    }
+    for variable in group_by:
+        codes, labels = household_groups(baseline, variable, period)
+        impact["by_group"][variable] = {
+            "labels": labels,
+            "mean_change": group_means(codes, change, weights, len(labels)),
+            "winners_and_losers": winners_and_losers(
+                change, weights, codes, len(labels)
+            ),
+        }
+    return impact
@@ -0,0 +1,304 @@
+"""
+Batch calculation over flat CSV or Parquet files.
+
+Input files have one row per person. Columns are:
+
+- ``person_id``: optional, defaults to the row number.
+- ``person_<entity>_id`` for each group entity (``household``, ``tax_unit``,
+  ``benefit_unit``, ``family``): optional, defaults to the household ID,
+  which itself defaults to the person ID.
+- ``person_<entity>_role``: optional role in each group, e.g. ``adult`` or
+  ``child``. By default people aged 18 or over take the entity's first role
+  and younger people its second.
+- Any input variable, either plain (``employment_income``, input for the
+  run's period) or with a period (``employment_income__2024``). Values of
+  group variables are read from the group's first member.
+
+Only the columns the requested variables need are read (see
+``policyengine_ie.plan``). Rows are read in chunks, never splitting a
+household across chunks (rows of one household must be contiguous), and
+each chunk is calculated as one simulation, dropping intermediate variables
+once they are no longer needed. The output has ``person_id``, the group ID columns and one
+column per requested variable; group variables are repeated for each member.
+"""
+
+from pathlib import Path
+from typing import Iterator, List, Union
+
+import numpy as np
+import pandas as pd
+
+from policyengine_ie.plan import ExecutionPlan, execution_plan, run_plan
+from policyengine_ie.reforms import ParametricReform, reformed_system
+from policyengine_ie.situations import quiet_structure_warning
+from policyengine_ie.system import IrishTaxBenefitSystem, Simulation
+
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+ADULT_AGE = 18
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as error:
+        raise ImportError(
+            "Reading and writing Parquet files requires pyarrow. "
+            "Install it with `pip install policyengine-ie[parquet]`."
+        ) from error
+    return pyarrow
+
+
+def _is_parquet(path: Union[str, Path]) -> bool:
+    return Path(path).suffix.lower() in (".parquet", ".pq")
+
+
+def read_columns(path: Union[str, Path]) -> List[str]:
+    """The column names of a flat file, without reading its rows."""
+    if _is_parquet(path):
+        pyarrow = _require_pyarrow()
+        return list(pyarrow.parquet.ParquetFile(path).schema_arrow.names)
+    return list(pd.read_csv(path, nrows=0).columns)
+
+
+def _read_frames(
+    path: Union[str, Path], chunk_size: int, columns: List[str] = None
+) -> Iterator[pd.DataFrame]:
+    if _is_parquet(path):
+        pyarrow = _require_pyarrow()
+        parquet_file = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet_file.iter_batches(batch_size=chunk_size, columns=columns):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, usecols=columns)
+
+
+def read_chunks(
+    path: Union[str, Path],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    columns: List[str] = None,
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a flat file in chunks of whole households.
+
+    The last household of each chunk read is held back and joined to the
+    next one, so no household is split.
+
+    Args:
+        path: CSV or Parquet file.
+        chunk_size: Rows read at a time.
+        columns: Columns to read. Defaults to all of them.
+    """
+    held_back = None
+    for frame in _read_frames(path, chunk_size, columns):
+        if held_back is not None:
+            frame = pd.concat([held_back, frame], ignore_index=True)
+        if "person_household_id" not in frame or len(frame) == 0:
+            held_back = None
+            yield frame
+            continue
+        household_ids = frame["person_household_id"].to_numpy()
+        last = household_ids[-1]
+        # Start of the run of rows sharing the last household ID
+        start = len(frame)
+        while start > 0 and household_ids[start - 1] == last:
+            start -= 1
+        held_back = frame.iloc[start:]
+        if start > 0:
+            yield frame.iloc[:start].reset_index(drop=True)
+    if held_back is not None and len(held_back) > 0:
+        yield held_back.reset_index(drop=True)
+
+
+def _variable_name(column: str) -> str:
+    return column.split("__")[0]
+
+
+def plan_columns(
+    columns: List[str],
+    variables: List[str],
+    system: IrishTaxBenefitSystem,
+) -> tuple:
+    """
+    Plan the calculation of variables from a file with the given columns.
+
+    Returns:
+        The ``ExecutionPlan``, and the columns it needs read: the ID and
+        role columns, ``age`` (which sets default roles) and the plan's
+        inputs.
+    """
+    plan = execution_plan(
+        system, variables, provided=[_variable_name(column) for column in columns]
+    )
+    structure = {"person_id"}
+    for entity in system.group_entities:
+        structure |= {f"person_{entity.key}_id", f"person_{entity.key}_role"}
+    needed = set(plan.inputs) | {"age"}
+    columns = [
+        column
+        for column in columns
+        if column in structure or _variable_name(column) in needed
+    ]
+    return plan, columns
+
+
+def prepare_chunk(
+    frame: pd.DataFrame,
+    period: str,
+    system: IrishTaxBenefitSystem,
+    offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Fill in default IDs and roles and attach periods to variable columns.
+
+    Args:
+        frame: The chunk's rows.
+        period: Period of variable columns given without one.
+        system: Tax-benefit system whose variables and entities to use.
+        offset: Number of rows in earlier chunks. Default person IDs count
+            on from it, so they are unique across chunks.
+
+    Returns:
+        A DataFrame in the flat format policyengine-core builds simulations
+        from.
+    """
+    frame = frame.copy()
+    count = len(frame)
+    if "person_id" not in frame:
+        frame["person_id"] = np.arange(offset, offset + count)
+    if "person_household_id" not in frame:
+        frame["person_household_id"] = frame["person_id"]
+    if "age" in frame:
+        is_adult = frame["age"].to_numpy() >= ADULT_AGE
+    elif f"age__{period}" in frame:
+        is_adult = frame[f"age__{period}"].to_numpy() >= ADULT_AGE
+    else:
+        is_adult = np.ones(count, dtype=bool)
+
+    for entity in system.group_entities:
+        id_column = f"person_{entity.key}_id"
+        role_column = f"person_{entity.key}_role"
+        if id_column not in frame:
+            frame[id_column] = frame["person_household_id"]
+        if role_column not in frame:
+            roles = [role.key for role in entity.roles]
+            frame[role_column] = np.where(is_adult, roles[0], roles[-1])
+
+    renamed = {}
+    for column in frame.columns:
+        if column in system.variables:
+            renamed[column] = f"{column}__{period}"
+    return frame.rename(columns=renamed)
+
+
+def calculate_chunk(
+    frame: pd.DataFrame,
+    variables: List[str],
+    period: str,
+    system: IrishTaxBenefitSystem,
+    plan: ExecutionPlan = None,
+    offset: int = 0,
+) -> pd.DataFrame:
+    """
+    Calculate variables for one chunk of people.
+
+    Args:
+        frame: The chunk's rows.
+        variables: Variables to calculate.
+        period: Period to calculate.
+        system: Tax-benefit system to calculate with.
+        plan: Optional execution plan for the variables. With one,
+            intermediate variables are dropped once no longer needed.
+        offset: Number of rows in earlier chunks, as for ``prepare_chunk``.
+
+    Returns:
+        One row per person: their IDs and the requested variables.
+    """
+    frame = prepare_chunk(frame, period, system, offset)
+    with quiet_structure_warning():
+        simulation = Simulation(tax_benefit_system=system, dataset=frame)
+    id_columns = ["person_id"] + [
+        f"person_{entity.key}_id" for entity in system.group_entities
+    ]
+    output = {column: frame[column].to_numpy() for column in id_columns}
+    if plan is None:
+        results = simulation.calculate_many(variables, period, map_to="person")
+    else:
+        results = run_plan(simulation, plan, period, map_to="person")
+    for variable, values in results.items():
+        if hasattr(values, "decode_to_str"):
+            values = values.decode_to_str()
+        output[variable] = values
+    return pd.DataFrame(output)
+
+
+class _Writer:
+    """Appends DataFrames to a CSV or Parquet file."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.parquet = _is_parquet(path)
+        self._writer = None
+        self._started = False
+
+    def write(self, frame: pd.DataFrame) -> None:
+        if self.parquet:
+            pyarrow = _require_pyarrow()
+            table = pyarrow.Table.from_pandas(frame, preserve_index=False)
+            if self._writer is None:
+                self._writer = pyarrow.parquet.ParquetWriter(self.path, table.schema)
+            self._writer.write_table(table)
+        else:
+            frame.to_csv(
+                self.path,
+                mode="a" if self._started else "w",
+                header=not self._started,
+                index=False,
+            )
+        self._started = True
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def run(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    variables: List[str],
+    period: str,
+    reform: Union[dict, ParametricReform] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> int:
+    """
+    Calculate variables for every person in a flat file.
+
+    Args:
+        input_path: CSV or Parquet file with one row per person.
+        output_path: CSV or Parquet file to write, chosen by extension.
+        variables: Variables to calculate.
+        period: Period to calculate them for, also the period of input
+            columns given without one.
+        reform: Optional parametric reform.
+        chunk_size: Rows read at a time.
+
+    Returns:
+        The number of people written.
+    """
+    system = reformed_system(reform)
+    unknown = [name for name in variables if name not in system.variables]
+    if unknown:
+        raise ValueError(f"Unknown variables: {', '.join(unknown)}.")
+    plan, columns = plan_columns(read_columns(input_path), variables, system)
+    writer = _Writer(output_path)
+    people = 0
+    try:
+        for chunk in read_chunks(input_path, chunk_size, columns):
+            result = calculate_chunk(chunk, variables, period, system, plan, people)
+            writer.write(result)
+            people += len(result)
+    finally:
+        writer.close()
+    return people
@@ -0,0 +1,303 @@
+"""
+Exact budget constraints of a household.
+
+Income tax, USC and employee PRSI are piecewise linear in earnings, so a
+household's net income, as a function of one person's gross earnings, is a
+set of straight-line segments. ``budget_constraint`` returns those segments
+directly instead of sampling net income on a dense grid:
+
+1. Candidate breakpoints are read from the band parameters: the USC
+   exemption threshold and band limits, the income tax standard rate band
+   and the point at which tax exceeds credits, and the PRSI weekly
+   threshold, tapered credit limit and the end of the credit's taper. Each
+   is shifted by the person's other income and deductions.
+2. The model is evaluated at four points inside each interval between
+   candidates, all intervals in one simulation. Where the four points are
+   collinear the interval is one segment. Where they are not (a kink or jump
+   the candidates missed), the interval is split where the lines through its
+   first two and last two points meet, which is exactly the kink if there is
+   one, or else in half, and the pieces are checked again.
+3. Adjacent segments on the same line are merged, so the breakpoints left
+   are the points where the marginal rate or net income actually changes.
+   Jumps in net income are located to within a euro.
+
+This takes a few model evaluations per band rather than one per sample
+point, and the result answers net income and marginal rate lookups with a
+binary search over the segments.
+"""
+
+from dataclasses import dataclass
+from typing import List, Union
+
+import numpy as np
+from policyengine_core.periods import period as period_
+
+from policyengine_ie.gross_net import DEFAULT_PERIOD, DEFAULT_SITUATION, HouseholdCopies
+from policyengine_ie.reforms import ParametricReform, reformed_system
+
+
+# Net income is evaluated at four points in every interval: a quarter of
+# the way in from each end, and close to each end, at most EDGE euros in
+PROBE_SHARE = 0.25
+EDGE_SHARE = 0.01
+EDGE = 0.25
+
+# Intervals narrower than this, in euros, are not split further
+MIN_WIDTH = 1.0
+
+# Gross income the constraint is traced to if no candidate breakpoint is
+# higher; net income is linear beyond the highest breakpoint
+DEFAULT_MAX_GROSS = 200_000
+
+
+@dataclass
+class BudgetConstraint:
+    """
+    Net income as straight-line segments of gross income.
+
+    Segment ``i`` covers gross incomes above ``starts[i]`` up to and
+    including ``ends[i]``, on which net income is
+    ``intercepts[i] + slopes[i] * gross``. The last segment has no end.
+    """
+
+    starts: np.ndarray
+    ends: np.ndarray
+    slopes: np.ndarray
+    intercepts: np.ndarray
+
+    @property
+    def breakpoints(self) -> np.ndarray:
+        """Gross incomes at which the slope or level of net income changes."""
+        return self.starts[1:]
+
+    def _segment(self, gross) -> np.ndarray:
+        segment = np.searchsorted(self.starts, gross, side="left") - 1
+        return np.clip(segment, 0, len(self.starts) - 1)
+
+    def net(self, gross) -> np.ndarray:
+        """Net income at each gross income."""
+        gross = np.asarray(gross, dtype=float)
+        segment = self._segment(gross)
+        return self.intercepts[segment] + self.slopes[segment] * gross
+
+    def marginal_tax_rate(self, gross) -> np.ndarray:
+        """Share of an extra euro of gross income lost at each gross income."""
+        return 1 - self.slopes[self._segment(np.asarray(gross, dtype=float))]
+
+    def to_dict(self) -> dict:
+        return {
+            "starts": self.starts.tolist(),
+            "ends": [None if np.isinf(end) else end for end in self.ends.tolist()],
+            "slopes": self.slopes.tolist(),
+            "intercepts": self.intercepts.tolist(),
+        }
+
+
+def _candidate_breakpoints(
+    household: HouseholdCopies, period: str, system
+) -> List[float]:
+    """Gross incomes at which the band parameters put a kink or a jump."""
+    simulation = household.simulation
+    position = household.positions[0]
+
+    def value(variable: str) -> float:
+        return float(simulation.calculate(variable, period)[position])
+
+    gross = value(household.gross_variable)
+    other_income = value("gross_income_for_usc") - gross
+    deductions = value("total_deductions")
+    standard_rate_band = value("standard_rate_band")
+    credits = value("income_tax_credits")
+
+    p = system.parameters(period_(period).start).gov.revenue
+    usc = p.usc.thresholds
+    candidates = [
+        usc.exemption_threshold,
+        usc.reduced_rate_income_threshold,
+        usc.band_1_upper,
+        usc.band_2_upper,
+        usc.band_3_upper,
+    ]
+    candidates = [threshold - other_income for threshold in candidates]
+
+    # Income tax starts after deductions, changes rate at the standard rate
+    # band and is only paid once it exceeds credits
+    rates = p.income_tax.rates
+    taxable_start = deductions - other_income
+    candidates += [taxable_start, taxable_start + standard_rate_band]
+    if credits <= rates.standard_rate * standard_rate_band:
+        candidates.append(taxable_start + credits / rates.standard_rate)
+    else:
+        candidates.append(
+            taxable_start
+            + standard_rate_band
+            + (credits - rates.standard_rate * standard_rate_band) / rates.higher_rate
+        )
+
+    # PRSI starts above the weekly threshold, where the credit tapers away
+    # by one sixth of earnings above the threshold
+    prsi = p.prsi.thresholds
+    weeks = 52
+    candidates += [
+        weeks * prsi.employee_weekly_threshold,
+        weeks * prsi.tapered_credit_upper_limit,
+        weeks * (prsi.employee_weekly_threshold + 6 * prsi.weekly_prsi_credit),
+    ]
+    return candidates
+
+
+def _line(segment: list, gross: float) -> float:
+    return segment[3] + segment[2] * gross
+
+
+def _assemble(segments: List[tuple], tolerance: float) -> List[list]:
+    """
+    Join segments into one budget constraint, with breakpoints only where
+    the line changes.
+    """
+    segments = [list(segment) for segment in sorted(segments)]
+    # Jumps were left as gaps narrower than MIN_WIDTH; place each jump in
+    # the middle of its gap
+    for left, right in zip(segments, segments[1:]):
+        if right[0] > left[1]:
+            left[1] = right[0] = (left[1] + right[0]) / 2
+    changed = True
+    while changed:
+        changed = False
+        merged = [segments[0]]
+        for segment in segments[1:]:
+            last = merged[-1]
+            same_line = all(
+                abs(_line(segment, x) - _line(last, x)) <= tolerance
+                for x in segment[:2]
+            )
+            if same_line:
+                # Refit the merged segment from both ends
+                start_value = _line(last, last[0])
+                end_value = _line(segment, segment[1])
+                last[2] = (end_value - start_value) / (segment[1] - last[0])
+                last[3] = start_value - last[2] * last[0]
+                last[1] = segment[1]
+            else:
+                merged.append(segment)
+        segments = merged
+        # A short segment left where splitting stopped near a kink is
+        # replaced by the kink where its neighbours' lines meet
+        for index in range(1, len(segments) - 1):
+            left, middle, right = segments[index - 1 : index + 2]
+            if left[2] == right[2]:
+                continue
+            kink = (right[3] - left[3]) / (left[2] - right[2])
+            # The middle line must pass through the kink to within tolerance
+            on_kink = abs(_line(middle, kink) - _line(left, kink)) <= tolerance
+            if middle[0] <= kink <= middle[1] and on_kink:
+                left[1] = right[0] = kink
+                del segments[index]
+                changed = True
+                break
+    return segments
+
+
+def budget_constraint(
+    situation: dict = None,
+    period: str = DEFAULT_PERIOD,
+    person: str = None,
+    gross_variable: str = "employment_income",
+    net_variable: str = "household_net_income",
+    reform: Union[dict, ParametricReform] = None,
+    max_gross: float = None,
+    tolerance: float = 0.05,
+    max_rounds: int = 40,
+) -> BudgetConstraint:
+    """
+    Net income of a household as exact segments of one person's earnings.
+
+    Args:
+        situation: Household, as passed to ``Simulation``. Defaults to a
+            single adult aged 35. Any value of ``gross_variable`` in it is
+            replaced.
+        period: Period to calculate.
+        person: Person whose earnings vary. Defaults to the situation's
+            first person.
+        gross_variable: Earnings input to vary. Candidate breakpoints assume
+            it is employment income; kinks in other inputs are found by
+            splitting intervals.
+        net_variable: Net income to trace.
+        reform: Optional parametric reform.
+        max_gross: Highest gross income to check for kinks. Defaults to
+            twice the highest candidate breakpoint, and at least €200,000.
+        tolerance: Largest distance, in euros, of a probe from a segment's
+            line for the probes to count as collinear.
+        max_rounds: Most rounds of splitting intervals.
+    """
+    situation = situation or DEFAULT_SITUATION
+    system = reformed_system(reform)
+    arguments = (period, person, gross_variable, net_variable, reform)
+
+    probe = HouseholdCopies(situation, 1, *arguments)
+    # Evaluate at a positive income, so credits given to earners apply
+    probe.net(np.array([1.0]))
+    candidates = _candidate_breakpoints(probe, period, system)
+    top = max_gross or max([2 * c for c in candidates] + [DEFAULT_MAX_GROSS])
+    edges = np.unique([0.0, top] + [c for c in candidates if 0 < c < top])
+
+    pending = list(zip(edges[:-1], edges[1:]))
+    segments = []
+    for _ in range(max_rounds):
+        if not pending:
+            break
+        intervals = np.array(pending)
+        starts, widths = intervals[:, 0], intervals[:, 1] - intervals[:, 0]
+        edges_in = np.minimum(EDGE_SHARE * widths, EDGE)
+        points = np.stack(
+            [
+                starts + edges_in,
+                starts + PROBE_SHARE * widths,
+                starts + (1 - PROBE_SHARE) * widths,
+                starts + widths - edges_in,
+            ],
+            axis=1,
+        )
+        copies = HouseholdCopies(situation, points.size, *arguments)
+        values = copies.net(points.ravel()).reshape(points.shape)
+
+        # Collinear if the inner probes lie on the chord between the outer ones
+        chord_slope = (values[:, 3] - values[:, 0]) / (points[:, 3] - points[:, 0])
+        chord = values[:, :1] + chord_slope[:, None] * (points - points[:, :1])
+        collinear = np.all(np.abs(chord - values) <= tolerance, axis=1)
+        left_slope = (values[:, 1] - values[:, 0]) / (points[:, 1] - points[:, 0])
+        right_slope = (values[:, 3] - values[:, 2]) / (points[:, 3] - points[:, 2])
+
+        pending = []
+        for index, (start, end) in enumerate(intervals):
+            if end - start <= MIN_WIDTH and not collinear[index]:
+                # A jump: leave a gap for _assemble to close
+                continue
+            if collinear[index]:
+                slope = chord_slope[index]
+                intercept = values[index, 0] - slope * points[index, 0]
+                segments.append((start, end, slope, intercept))
+                continue
+            # Where the lines through the probe pairs at each end meet
+            kink = None
+            if left_slope[index] != right_slope[index]:
+                kink = (
+                    values[index, 2]
+                    - values[index, 0]
+                    + left_slope[index] * points[index, 0]
+                    - right_slope[index] * points[index, 2]
+                ) / (left_slope[index] - right_slope[index])
+            if kink is None or not start < kink < end:
+                kink = (start + end) / 2
+            pending += [(start, kink), (kink, end)]
+    if pending:
+        raise ValueError(
+            f"Budget constraint did not resolve after {max_rounds} rounds."
+        )
+
+    merged = _assemble(segments, tolerance)
+    merged[-1][1] = np.inf
+    starts, ends, slopes, intercepts = map(np.array, zip(*merged))
+    return BudgetConstraint(
+        starts=starts, ends=ends, slopes=slopes, intercepts=intercepts
+    )
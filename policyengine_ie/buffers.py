@@ -0,0 +1,100 @@
+"""
+Scratch arrays reused across formula evaluations.
+
+A formula written in whole-array expressions allocates a new array, one per
+person, for every intermediate result: the USC bands or the PRSI credit
+taper each need several. On a run over millions of people those
+temporaries cost more time in allocation and page faults than in
+arithmetic. Formulas can instead borrow scratch arrays from ``scratch``,
+work in them in place with numpy's ``out=`` arguments, and hand them back
+for the next formula to reuse::
+
+    with scratch.borrow(income, 2) as (band, rate):
+        np.subtract(income, lower, out=band)
+        ...
+
+Borrowed arrays are uninitialised and are returned to the pool when the
+``with`` block ends, so a formula's result must never be one of them. Each
+thread has its own pool, and at most ``max_bytes`` of free arrays are kept.
+"""
+
+import threading
+from contextlib import contextmanager
+from typing import Tuple
+
+import numpy as np
+
+
+DEFAULT_MAX_BYTES = 512 * 2**20
+
+
+class BufferPool:
+    """
+    Free arrays, by shape and dtype, for formulas to borrow.
+
+    Args:
+        max_bytes: Most bytes of free arrays to keep, per thread. Arrays
+            handed back beyond this are left to the garbage collector.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+
+    def _state(self) -> threading.local:
+        state = self._local
+        if not hasattr(state, "free"):
+            state.free = {}
+            state.free_bytes = 0
+            state.allocations = 0
+        return state
+
+    @property
+    def free_bytes(self) -> int:
+        """Bytes of free arrays held for this thread."""
+        return self._state().free_bytes
+
+    @property
+    def allocations(self) -> int:
+        """Arrays this thread has had to allocate rather than reuse."""
+        return self._state().allocations
+
+    def take(self, like, dtype=None) -> np.ndarray:
+        """An uninitialised array of the shape of ``like``."""
+        like = np.asarray(like)
+        dtype = np.dtype(dtype or like.dtype)
+        state = self._state()
+        free = state.free.get((like.shape, dtype))
+        if free:
+            array = free.pop()
+            state.free_bytes -= array.nbytes
+            return array
+        state.allocations += 1
+        return np.empty(like.shape, dtype=dtype)
+
+    def give(self, *arrays: np.ndarray) -> None:
+        """Hand arrays back for reuse."""
+        state = self._state()
+        for array in arrays:
+            if state.free_bytes + array.nbytes > self.max_bytes:
+                continue
+            state.free.setdefault((array.shape, array.dtype), []).append(array)
+            state.free_bytes += array.nbytes
+
+    @contextmanager
+    def borrow(self, like, count: int = 1, dtype=None) -> Tuple[np.ndarray, ...]:
+        """Borrow ``count`` arrays of the shape of ``like`` for a block."""
+        arrays = tuple(self.take(like, dtype) for _ in range(count))
+        try:
+            yield arrays
+        finally:
+            self.give(*arrays)
+
+    def clear(self) -> None:
+        """Release this thread's free arrays."""
+        state = self._state()
+        state.free = {}
+        state.free_bytes = 0
+
+
+scratch = BufferPool()
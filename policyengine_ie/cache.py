@@ -0,0 +1,300 @@
+"""
+Content-addressed cache of calculated variable arrays.
+
+Results are keyed on everything that determines them: the model (its
+installed version and a hash of its formula and parameter files), the reform
+hash, a hash of the situation or dataset, the variable and the period.
+A simulation given a cache (see ``policyengine_ie.Simulation``) looks each
+requested variable up before calculating it and stores what it calculates.
+
+Two backends are provided: ``MemoryResultCache``, an in-process LRU, and
+``DiskResultCache``, a directory of ``.npy`` files shared between processes.
+Both evict least recently used arrays to stay within a size limit in bytes.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+
+def _digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def situation_hash(situation: dict) -> str:
+    """Hash a situation dict, ignoring key order."""
+    return _digest(json.dumps(situation, sort_keys=True, default=str).encode())
+
+
+def file_hash(path: Union[str, Path], chunk_size: int = 1 << 20) -> str:
+    """Hash the contents of a dataset file."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@lru_cache(maxsize=None)
+def model_hash() -> str:
+    """
+    Hash the model: its installed version and the contents of its source and
+    parameter files. Any change to a formula or parameter file, released or
+    not, gives a new hash.
+    """
+    from policyengine_ie import __version__
+
+    package = Path(__file__).parent
+    digest = hashlib.sha256(__version__.encode())
+    files = sorted(
+        path
+        for pattern in ("*.py", "*.yaml")
+        for path in package.rglob(pattern)
+        if "tests" not in path.relative_to(package).parts
+    )
+    for path in files:
+        digest.update(str(path.relative_to(package).as_posix()).encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def parameter_hash(system) -> str:
+    """Hash every legislated value of every parameter of a tax-benefit
+    system. Uprated values follow from these, so are left out."""
+    from policyengine_core.parameters import Parameter
+
+    from policyengine_ie.uprating import UPRATED
+
+    values = [
+        [
+            parameter.name,
+            [
+                [v.instant_str, v.value]
+                for v in parameter.values_list
+                if not v.metadata.get(UPRATED)
+            ],
+        ]
+        for parameter in system.parameters.get_descendants()
+        if isinstance(parameter, Parameter)
+    ]
+    return _digest(json.dumps(values, default=str).encode())
+
+
+def result_key(
+    model: str,
+    reform_hash: str,
+    input_hash: str,
+    variable: str,
+    period: str,
+) -> str:
+    """The cache key of one calculated array. ``model`` is ``model_hash()``."""
+    fields = [model, reform_hash or "", input_hash, variable, str(period)]
+    return _digest("\x1f".join(fields).encode())
+
+
+def is_cacheable(array) -> bool:
+    """Whether an array can be stored: plain numeric or boolean values."""
+    return type(array) is np.ndarray and array.dtype.kind in "biuf"
+
+
+@dataclass
+class CacheStats:
+    """Counts of cache lookups and writes."""
+
+    hits: int = 0
+    misses: int = 0
+    stores: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate,
+        }
+
+
+class ResultCache:
+    """
+    Base class for result cache backends.
+
+    Subclasses implement ``_load``, ``_store``, ``_evict`` and ``_clear``;
+    this class keeps the least-recently-used order, the size limit and the
+    statistics.
+
+    Args:
+        max_bytes: Largest total size of stored arrays. Older arrays are
+            evicted to stay within it.
+    """
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._sizes: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+    def __len__(self) -> int:
+        return len(self._sizes)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        """The array stored under ``key``, or ``None``. Arrays are read-only."""
+        if key not in self._sizes:
+            # Stored by another process since this cache was opened
+            size = self._find(key)
+            if size is not None:
+                self._sizes[key] = size
+                self._total_bytes += size
+                self._evict_to_limit()
+        array = self._load(key) if key in self._sizes else None
+        if array is None:
+            self.stats.misses += 1
+            return None
+        self._sizes.move_to_end(key)
+        self.stats.hits += 1
+        return array
+
+    def put(self, key: str, array: np.ndarray) -> None:
+        """Store a copy of ``array`` under ``key``."""
+        if not is_cacheable(array) or array.nbytes > self.max_bytes:
+            return
+        if key in self._sizes:
+            self._total_bytes -= self._sizes.pop(key)
+        array = np.array(array, copy=True)
+        array.flags.writeable = False
+        self._store(key, array)
+        self._sizes[key] = array.nbytes
+        self._total_bytes += array.nbytes
+        self.stats.stores += 1
+        self._evict_to_limit()
+
+    def _evict_to_limit(self) -> None:
+        while self._total_bytes > self.max_bytes:
+            oldest, size = self._sizes.popitem(last=False)
+            self._total_bytes -= size
+            self._evict(oldest)
+            self.stats.evictions += 1
+
+    def clear(self) -> None:
+        """Remove every stored array."""
+        self._clear()
+        self._sizes.clear()
+        self._total_bytes = 0
+
+    def _find(self, key: str) -> Optional[int]:
+        """Size of an array stored under ``key`` elsewhere, or ``None``."""
+        return None
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        raise NotImplementedError
+
+    def _store(self, key: str, array: np.ndarray) -> None:
+        raise NotImplementedError
+
+    def _evict(self, key: str) -> None:
+        raise NotImplementedError
+
+    def _clear(self) -> None:
+        raise NotImplementedError
+
+
+class MemoryResultCache(ResultCache):
+    """Result cache holding arrays in this process's memory."""
+
+    def __init__(self, max_bytes: int = 1 << 30):
+        super().__init__(max_bytes)
+        self._arrays = {}
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        return self._arrays.get(key)
+
+    def _store(self, key: str, array: np.ndarray) -> None:
+        self._arrays[key] = array
+
+    def _evict(self, key: str) -> None:
+        self._arrays.pop(key, None)
+
+    def _clear(self) -> None:
+        self._arrays.clear()
+
+
+class DiskResultCache(ResultCache):
+    """
+    Result cache storing each array as ``<key>.npy`` in a directory.
+
+    Arrays already in the directory are picked up, oldest first, so the
+    cache survives restarts. A key not yet known is looked for in the
+    directory, so processes on one machine share the arrays they store.
+    Reads memory-map the files.
+
+    Args:
+        directory: Directory to store arrays in. Created if missing.
+        max_bytes: Largest total size of stored arrays.
+    """
+
+    def __init__(self, directory: Union[str, Path], max_bytes: int = 10 << 30):
+        super().__init__(max_bytes)
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        existing = sorted(
+            self.directory.glob("*.npy"), key=lambda path: path.stat().st_mtime
+        )
+        for path in existing:
+            size = path.stat().st_size
+            self._sizes[path.stem] = size
+            self._total_bytes += size
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.npy"
+
+    def _find(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    def _load(self, key: str) -> Optional[np.ndarray]:
+        path = self._path(key)
+        try:
+            array = np.load(path, mmap_mode="r")
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            # Removed by another process, or partly written
+            self._total_bytes -= self._sizes.pop(key, 0)
+            return None
+        return array
+
+    def _store(self, key: str, array: np.ndarray) -> None:
+        # Write to a temporary file first so readers never see half an array
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(descriptor, "wb") as f:
+            np.save(f, array)
+        os.replace(temporary, self._path(key))
+
+    def _evict(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    def _clear(self) -> None:
+        for path in self.directory.glob("*.npy"):
+            path.unlink(missing_ok=True)
@@ -0,0 +1,333 @@
+"""
+Calibration of household weights to administrative totals.
+
+Survey weights are adjusted so that weighted model outputs match totals
+published by Revenue and the Department of Social Protection, such as income
+tax and USC yield, Child Benefit recipients or Jobseeker's Allowance
+claimants by age band. Totals are supplied by the caller as ``Target``
+objects; none are shipped with the model.
+
+Each target is a weighted sum over households, so calibration needs each
+household's contribution to each target. Only the target variables (and any
+variables they are filtered on) are calculated, once, and their household
+contributions are stored as a sparse households x targets loss matrix. Every
+iteration of the optimiser then costs one pass over the matrix's non-zero
+entries, so a million households calibrate in seconds to minutes.
+
+Two methods are available:
+
+- ``"gradient"``: minimises the mean squared relative error of the targets
+  over log weight adjustments with Adam, with a penalty on moving far from
+  the initial weights. It always returns weights, even when the targets
+  cannot all be met.
+- ``"raking"``: generalised raking (Deville and Särndal, 1992), which finds
+  the weights ``initial * exp(X @ lambda)`` that meet every target exactly
+  using Newton's method on ``lambda``. It needs consistent targets.
+"""
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+import numpy as np
+
+
+@dataclass
+class Target:
+    """
+    An administrative total that weighted model outputs should match.
+
+    Args:
+        name: Label for reporting.
+        value: The administrative total.
+        variable: Variable to aggregate.
+        statistic: ``"sum"`` to total the variable, or ``"count"`` to count
+            entities where it is positive (or true).
+        filter_variable: Optional variable of the same entity restricting
+            the target to entities with ``lower <= value < upper``.
+        lower: Lower bound for ``filter_variable``, inclusive.
+        upper: Upper bound for ``filter_variable``, exclusive.
+    """
+
+    name: str
+    value: float
+    variable: str
+    statistic: str = "sum"
+    filter_variable: str = None
+    lower: float = -np.inf
+    upper: float = np.inf
+
+
+class LossMatrix:
+    """
+    Sparse households x targets matrix of contributions to each target.
+
+    Stored in coordinate form with every column scaled by its target value,
+    so each scaled target is one.
+
+    Args:
+        rows: Household index of each non-zero entry.
+        columns: Target index of each non-zero entry.
+        values: Contribution of each entry, before scaling.
+        targets: Target values.
+        household_count: Number of households.
+        names: Target names.
+    """
+
+    def __init__(
+        self,
+        rows: np.ndarray,
+        columns: np.ndarray,
+        values: np.ndarray,
+        targets: np.ndarray,
+        household_count: int,
+        names: Sequence[str] = None,
+    ):
+        self.targets = np.asarray(targets, dtype=float)
+        if np.any(self.targets == 0):
+            raise ValueError("Target values must be non-zero.")
+        self.rows = np.asarray(rows, dtype=np.int64)
+        self.columns = np.asarray(columns, dtype=np.int64)
+        self.values = np.asarray(values, dtype=float) / self.targets[self.columns]
+        self.household_count = household_count
+        self.names = list(names) if names is not None else None
+
+    @property
+    def target_count(self) -> int:
+        return len(self.targets)
+
+    def estimates(self, weights: np.ndarray) -> np.ndarray:
+        """Weighted totals for each target, divided by the target."""
+        return np.bincount(
+            self.columns,
+            weights=self.values * weights[self.rows],
+            minlength=self.target_count,
+        )
+
+    def transpose_product(self, vector: np.ndarray) -> np.ndarray:
+        """Each household's contributions combined with a per-target vector."""
+        return np.bincount(
+            self.rows,
+            weights=self.values * vector[self.columns],
+            minlength=self.household_count,
+        )
+
+    def gram(self, weights: np.ndarray) -> np.ndarray:
+        """The targets x targets matrix ``X^T diag(weights) X``."""
+        gram = np.zeros((self.target_count, self.target_count))
+        for target in range(self.target_count):
+            in_target = self.columns == target
+            column = np.zeros(self.household_count)
+            column[self.rows[in_target]] = self.values[in_target]
+            gram[:, target] = np.bincount(
+                self.columns,
+                weights=self.values * (weights * column)[self.rows],
+                minlength=self.target_count,
+            )
+        return gram
+
+
+def build_loss_matrix(simulation, targets: List[Target], period) -> LossMatrix:
+    """
+    Calculate each household's contribution to each target.
+
+    Args:
+        simulation: Simulation over the survey households.
+        targets: Targets to calibrate to.
+        period: Period to calculate the target variables for.
+    """
+    system = simulation.tax_benefit_system
+    household_count = simulation.populations["household"].count
+    rows, columns, values = [], [], []
+    for index, target in enumerate(targets):
+        if target.statistic not in ("sum", "count"):
+            raise ValueError(
+                f"Target '{target.name}' has statistic '{target.statistic}'; "
+                "use 'sum' or 'count'."
+            )
+        entity = system.get_variable(target.variable, check_existence=True).entity
+        contribution = np.asarray(simulation.calculate(target.variable, period))
+        if target.statistic == "count":
+            contribution = (contribution > 0).astype(float)
+        else:
+            contribution = contribution.astype(float)
+        if target.filter_variable is not None:
+            filter_entity = system.get_variable(
+                target.filter_variable, check_existence=True
+            ).entity
+            if filter_entity.key != entity.key:
+                raise ValueError(
+                    f"Target '{target.name}' filters {entity.plural} on "
+                    f"'{target.filter_variable}', which is defined for "
+                    f"{filter_entity.plural}."
+                )
+            filter_values = simulation.calculate(target.filter_variable, period)
+            contribution *= (filter_values >= target.lower) & (
+                filter_values < target.upper
+            )
+        household_contribution = simulation.map_result(
+            contribution, entity.key, "household"
+        )
+        non_zero = np.flatnonzero(household_contribution)
+        rows.append(non_zero)
+        columns.append(np.full(len(non_zero), index))
+        values.append(household_contribution[non_zero])
+    return LossMatrix(
+        np.concatenate(rows),
+        np.concatenate(columns),
+        np.concatenate(values),
+        [target.value for target in targets],
+        household_count,
+        [target.name for target in targets],
+    )
+
+
+@dataclass
+class CalibrationResult:
+    """Calibrated weights and how closely they meet the targets."""
+
+    weights: np.ndarray
+    relative_errors: np.ndarray
+    iterations: int
+    converged: bool
+    names: List[str] = None
+
+    @property
+    def max_relative_error(self) -> float:
+        return float(np.max(np.abs(self.relative_errors)))
+
+
+def _calibrate_gradient(
+    matrix: LossMatrix,
+    initial_weights: np.ndarray,
+    iterations: int,
+    tolerance: float,
+    learning_rate: float,
+    regularisation: float,
+) -> tuple:
+    # Adam on log adjustments, so weights stay positive
+    adjustment = np.zeros(matrix.household_count)
+    first_moment = np.zeros_like(adjustment)
+    second_moment = np.zeros_like(adjustment)
+    beta_1, beta_2, epsilon = 0.9, 0.999, 1e-8
+    count = matrix.household_count
+    for iteration in range(1, iterations + 1):
+        weights = initial_weights * np.exp(adjustment)
+        errors = matrix.estimates(weights) - 1
+        if np.max(np.abs(errors)) < tolerance:
+            return weights, iteration - 1, True
+        # Gradient of mean squared relative error plus the penalty
+        gradient = (
+            matrix.transpose_product(2 * errors / matrix.target_count) * weights
+            + 2 * regularisation * adjustment / count
+        )
+        first_moment = beta_1 * first_moment + (1 - beta_1) * gradient
+        second_moment = beta_2 * second_moment + (1 - beta_2) * gradient**2
+        corrected_first = first_moment / (1 - beta_1**iteration)
+        corrected_second = second_moment / (1 - beta_2**iteration)
+        adjustment -= (
+            learning_rate * corrected_first / (np.sqrt(corrected_second) + epsilon)
+        )
+    weights = initial_weights * np.exp(adjustment)
+    errors = matrix.estimates(weights) - 1
+    return weights, iterations, bool(np.max(np.abs(errors)) < tolerance)
+
+
+def _calibrate_raking(
+    matrix: LossMatrix,
+    initial_weights: np.ndarray,
+    iterations: int,
+    tolerance: float,
+) -> tuple:
+    multipliers = np.zeros(matrix.target_count)
+    weights = initial_weights
+    for iteration in range(iterations):
+        residual = 1 - matrix.estimates(weights)
+        if np.max(np.abs(residual)) < tolerance:
+            return weights, iteration, True
+        step = np.linalg.lstsq(matrix.gram(weights), residual, rcond=None)[0]
+        # Halve the Newton step until the largest error falls
+        for _ in range(30):
+            candidate = multipliers + step
+            candidate_weights = initial_weights * np.exp(
+                matrix.transpose_product(candidate)
+            )
+            candidate_residual = 1 - matrix.estimates(candidate_weights)
+            if np.max(np.abs(candidate_residual)) < np.max(np.abs(residual)):
+                break
+            step /= 2
+        multipliers = candidate
+        weights = candidate_weights
+    residual = 1 - matrix.estimates(weights)
+    return weights, iterations, bool(np.max(np.abs(residual)) < tolerance)
+
+
+def calibrate(
+    matrix: LossMatrix,
+    initial_weights: np.ndarray,
+    method: str = "gradient",
+    iterations: int = None,
+    tolerance: float = 1e-3,
+    learning_rate: float = 0.05,
+    regularisation: float = 1e-3,
+) -> CalibrationResult:
+    """
+    Adjust weights so weighted totals match the targets.
+
+    Args:
+        matrix: Output of ``build_loss_matrix``.
+        initial_weights: Starting household weights.
+        method: ``"gradient"`` or ``"raking"``.
+        iterations: Most iterations to run. Defaults to 2,000 for the
+            gradient method and 50 for raking.
+        tolerance: Stop once every target is within this relative error.
+        learning_rate: Step size of the gradient method.
+        regularisation: Weight of the gradient method's penalty on the mean
+            squared log adjustment to the initial weights.
+    """
+    initial_weights = np.asarray(initial_weights, dtype=float)
+    if len(initial_weights) != matrix.household_count:
+        raise ValueError(
+            f"Expected {matrix.household_count} weights, got {len(initial_weights)}."
+        )
+    if method == "gradient":
+        weights, used, converged = _calibrate_gradient(
+            matrix,
+            initial_weights,
+            iterations or 2_000,
+            tolerance,
+            learning_rate,
+            regularisation,
+        )
+    elif method == "raking":
+        weights, used, converged = _calibrate_raking(
+            matrix, initial_weights, iterations or 50, tolerance
+        )
+    else:
+        raise ValueError(f"Unknown calibration method '{method}'.")
+    return CalibrationResult(
+        weights=weights,
+        relative_errors=matrix.estimates(weights) - 1,
+        iterations=used,
+        converged=converged,
+        names=matrix.names,
+    )
+
+
+def calibrate_simulation(
+    simulation,
+    targets: List[Target],
+    period,
+    method: str = "gradient",
+    **options,
+) -> CalibrationResult:
+    """
+    Calibrate a simulation's ``household_weight`` to targets.
+
+    The calibrated weights are set as the simulation's ``household_weight``
+    for the period.
+    """
+    matrix = build_loss_matrix(simulation, targets, period)
+    initial_weights = simulation.calculate("household_weight", period)
+    result = calibrate(matrix, initial_weights, method, **options)
+    simulation.set_input("household_weight", period, result.weights)
+    return result
@@ -0,0 +1,225 @@
+"""
+Gross-to-net and net-to-gross calculations for many salaries at once.
+
+``net_for_gross`` calculates net income for an array of gross salaries, and
+``gross_for_net`` finds the gross salary that gives each of an array of net
+incomes. Copies of the household, one per salary, are built as one
+simulation (see ``policyengine_ie.situations.repeat_situation``), so every
+iteration of the solver is one pass of the model over all targets.
+
+Income tax, USC and PRSI are piecewise linear in gross income, so net income
+is too. The solver evaluates each copy at its guess and ten euros above it,
+giving the marginal retention rate, and takes a Newton step: when the guess
+and the root lie on the same linear piece the step lands on the root, so
+most targets converge after crossing two or three kinks. Steps are kept
+inside a bracket of guesses known to be too low and too high, and fall back
+to bisection, so cliffs such as the USC exemption threshold cannot stall the
+solver. Where net income jumps past a target, the gross salary just past the
+jump is returned; where net income falls as gross income rises, as it does
+just above the USC exemption threshold, the gross salary returned gives the
+target net income but may not be the smallest that does.
+"""
+
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+
+from policyengine_ie.reforms import ParametricReform, reformed_system
+from policyengine_ie.situations import quiet_structure_warning, repeat_situation
+from policyengine_ie.system import Simulation
+
+
+DEFAULT_PERIOD = "2024"
+
+# Gross step used to measure the marginal retention rate, in euros. Large
+# enough that float32 rounding of net income barely affects the slope
+STEP = 10.0
+
+DEFAULT_SITUATION = {
+    "people": {"you": {"age": {DEFAULT_PERIOD: 35}}},
+}
+
+
+@dataclass
+class GrossNetResult:
+    """Gross salaries found for each target net income."""
+
+    gross: np.ndarray
+    net: np.ndarray
+    iterations: int
+    converged: np.ndarray
+
+
+class HouseholdCopies:
+    """
+    Copies of one household in a single simulation, each with its own value
+    of one person's ``gross_variable``.
+
+    Args:
+        situation: The household, as passed to ``Simulation``.
+        copies: Number of copies.
+        period: Period to calculate.
+        person: Person whose ``gross_variable`` varies. Defaults to the
+            situation's first person.
+        gross_variable: Input to vary.
+        net_variable: Output ``net`` returns.
+        reform: Optional parametric reform.
+    """
+
+    def __init__(
+        self,
+        situation: dict,
+        copies: int,
+        period: str,
+        person: str,
+        gross_variable: str,
+        net_variable: str,
+        reform,
+    ):
+        system = reformed_system(reform)
+        people = list(situation.get("people") or {})
+        if person is None and people:
+            person = people[0]
+        if person not in people:
+            raise ValueError(f"The situation has no person '{person}'.")
+        self.period = period
+        self.gross_variable = gross_variable
+        self.net_variable = net_variable
+        with quiet_structure_warning():
+            self.simulation = Simulation(
+                tax_benefit_system=system,
+                dataset=repeat_situation(situation, copies, system),
+            )
+        self.positions = np.arange(copies) * len(people) + people.index(person)
+        self.inputs = np.asarray(
+            self.simulation.calculate(gross_variable, period), dtype=float
+        ).copy()
+
+    def net(self, gross: np.ndarray) -> np.ndarray:
+        """``net_variable`` of each copy, given each copy's gross value."""
+        self.inputs[self.positions] = gross
+        self.simulation.set_input(self.gross_variable, self.period, self.inputs)
+        self.simulation.drop_computed_arrays()
+        values = self.simulation.calculate(
+            self.net_variable, self.period, map_to="person"
+        )
+        return np.asarray(values, dtype=float)[self.positions]
+
+
+def net_for_gross(
+    gross,
+    situation: dict = None,
+    period: str = DEFAULT_PERIOD,
+    person: str = None,
+    gross_variable: str = "employment_income",
+    net_variable: str = "household_net_income",
+    reform: Union[dict, ParametricReform] = None,
+) -> np.ndarray:
+    """
+    Net income at each of an array of gross salaries.
+
+    Args:
+        gross: Gross salaries.
+        situation: Household whose net income to calculate, as passed to
+            ``Simulation``. Defaults to a single adult aged 35.
+        period: Period to calculate.
+        person: Person whose ``gross_variable`` is set. Defaults to the
+            situation's first person.
+        gross_variable: Input to vary.
+        net_variable: Output to read, for the person or the group they are
+            in.
+        reform: Optional parametric reform.
+    """
+    gross = np.atleast_1d(np.asarray(gross, dtype=float))
+    household = HouseholdCopies(
+        situation or DEFAULT_SITUATION,
+        len(gross),
+        period,
+        person,
+        gross_variable,
+        net_variable,
+        reform,
+    )
+    return household.net(gross)
+
+
+def gross_for_net(
+    net,
+    situation: dict = None,
+    period: str = DEFAULT_PERIOD,
+    person: str = None,
+    gross_variable: str = "employment_income",
+    net_variable: str = "household_net_income",
+    reform: Union[dict, ParametricReform] = None,
+    tolerance: float = 0.01,
+    max_iterations: int = 50,
+) -> GrossNetResult:
+    """
+    Gross salary giving each of an array of net incomes.
+
+    Takes the same arguments as ``net_for_gross``, and:
+
+    Args:
+        net: Target net incomes.
+        tolerance: Largest error in net income, in euros. Where net income
+            jumps past a target, the search stops once the gross salary is
+            known to within this amount.
+        max_iterations: Most model evaluations to run.
+    """
+    target = np.atleast_1d(np.asarray(net, dtype=float))
+    count = len(target)
+    # Each target is evaluated at its guess and one step above
+    household = HouseholdCopies(
+        situation or DEFAULT_SITUATION,
+        2 * count,
+        period,
+        person,
+        gross_variable,
+        net_variable,
+        reform,
+    )
+    guess = np.maximum(target, 0)
+    low = np.zeros(count)
+    high = np.full(count, np.inf)
+    converged = np.zeros(count, dtype=bool)
+    value = np.zeros(count)
+    iteration = 0
+    for iteration in range(1, max_iterations + 1):
+        values = household.net(np.concatenate([guess, guess + STEP]))
+        value, above = values[:count], values[count:]
+        error = value - target
+        too_low = error < 0
+        low = np.where(too_low, np.maximum(low, guess), low)
+        high = np.where(too_low, high, np.minimum(high, guess))
+        converged = (np.abs(error) <= tolerance) | (high - low <= tolerance)
+        if converged.all():
+            break
+        slope = (above - value) / STEP
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = guess - error / slope
+        bracketed = np.isfinite(high)
+        usable = (slope > 0) & (newton > low) & (newton < high)
+        guess = np.where(
+            converged,
+            guess,
+            np.where(
+                usable,
+                newton,
+                np.where(bracketed, (low + high) / 2, 2 * low + 1_000),
+            ),
+        )
+    # Where net income jumps past the target, the top of the bracket is the
+    # smallest gross salary that reaches it
+    jumped = converged & (np.abs(value - target) > tolerance)
+    if jumped.any():
+        guess = np.where(jumped, high, guess)
+        value = np.where(
+            jumped, household.net(np.concatenate([guess, guess]))[:count], value
+        )
+    return GrossNetResult(
+        gross=guess,
+        net=value,
+        iterations=iteration,
+        converged=converged,
+    )
@@ -0,0 +1,255 @@
+"""
+Compiled loop kernels for branch-heavy formulas.
+
+Formulas written in whole-array NumPy evaluate every branch of a ``select``
+or ``where`` for every person and build a temporary array for each
+condition. Some formulas also have a loop kernel here: the same rules as one
+loop over people, which numba compiles to machine code so each person is
+handled in a single pass through the branches that apply to them.
+
+Each variable with a kernel is calculated by one of three backends:
+
+- ``"numpy"``: the formula's NumPy code. The default.
+- ``"numba"``: the kernel, compiled with numba on first use. Needs numba
+  (``pip install policyengine-ie[jit]``) but no GPU.
+- ``"python"``: the kernel run as plain Python, for checking kernels
+  against the NumPy code on small inputs without numba.
+
+Backends are chosen per variable with ``set_backend`` or ``using_backend``,
+or for every variable with the ``POLICYENGINE_IE_BACKEND`` environment
+variable. Kernels take arrays and parameter values, and fill and return
+``out``.
+"""
+
+import os
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable
+
+
+NUMPY = "numpy"
+NUMBA = "numba"
+PYTHON = "python"
+BACKENDS = (NUMPY, NUMBA, PYTHON)
+
+KERNELS: Dict[str, "LoopKernel"] = {}
+
+_backends: Dict[str, str] = {}
+
+
+def _require_numba():
+    try:
+        import numba
+    except ImportError as error:
+        raise ImportError(
+            "The numba backend requires numba. "
+            "Install it with `pip install policyengine-ie[jit]`."
+        ) from error
+    return numba
+
+
+class LoopKernel:
+    """
+    A loop over people implementing one variable's formula.
+
+    Args:
+        variable: The variable the kernel calculates.
+        function: The loop, in the subset of Python numba compiles.
+    """
+
+    def __init__(self, variable: str, function: Callable):
+        self.variable = variable
+        self.function = function
+        self._compiled = None
+
+    def compiled(self) -> Callable:
+        if self._compiled is None:
+            numba = _require_numba()
+            self._compiled = numba.njit(cache=True, nogil=True)(self.function)
+        return self._compiled
+
+    def __call__(self, *args):
+        if backend(self.variable) == NUMBA:
+            return self.compiled()(*args)
+        return self.function(*args)
+
+
+def loop_kernel(variable: str) -> Callable[[Callable], LoopKernel]:
+    """Register a function as the loop kernel of a variable."""
+
+    def register(function: Callable) -> LoopKernel:
+        kernel = LoopKernel(variable, function)
+        KERNELS[variable] = kernel
+        return kernel
+
+    return register
+
+
+def _check_backend(name: str) -> str:
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend '{name}'; use one of {', '.join(BACKENDS)}.")
+    if name == NUMBA:
+        _require_numba()
+    return name
+
+
+def default_backend() -> str:
+    """The backend of variables not given one with ``set_backend``."""
+    return _check_backend(os.environ.get("POLICYENGINE_IE_BACKEND", NUMPY))
+
+
+def backend(variable: str) -> str:
+    """The backend a variable is calculated with."""
+    if variable not in KERNELS:
+        return NUMPY
+    return _backends.get(variable) or default_backend()
+
+
+def use_kernel(variable: str) -> bool:
+    """Whether a formula should call its loop kernel."""
+    return backend(variable) != NUMPY
+
+
+def set_backend(name: str, variables: Iterable[str] = None) -> None:
+    """
+    Calculate variables with a backend.
+
+    Args:
+        name: ``"numpy"``, ``"numba"`` or ``"python"``.
+        variables: Variables to switch. Defaults to every variable with a
+            kernel.
+    """
+    _check_backend(name)
+    variables = list(KERNELS) if variables is None else list(variables)
+    for variable in variables:
+        if variable not in KERNELS:
+            raise ValueError(f"Variable '{variable}' has no loop kernel.")
+        _backends[variable] = name
+
+
+@contextmanager
+def using_backend(name: str, variables: Iterable[str] = None):
+    """Calculate variables with a backend inside a ``with`` block."""
+    previous = dict(_backends)
+    set_backend(name, variables)
+    try:
+        yield
+    finally:
+        _backends.clear()
+        _backends.update(previous)
+
+
+@loop_kernel("jobseekers_allowance")
+def jobseekers_allowance(
+    age,
+    eligible,
+    independent,
+    qualified_adults,
+    qualified_children,
+    independent_rate,
+    young_rate,
+    adult_rate,
+    qualified_adult_rate,
+    qualified_child_rate,
+    out,
+):
+    for i in range(len(out)):
+        if not eligible[i]:
+            out[i] = 0
+            continue
+        if age[i] >= 25:
+            personal_rate = adult_rate
+        elif independent[i]:
+            personal_rate = independent_rate
+        else:
+            personal_rate = young_rate
+        out[i] = 52 * (
+            personal_rate
+            + qualified_adults[i] * qualified_adult_rate
+            + qualified_children[i] * qualified_child_rate
+        )
+    return out
+
+
+@loop_kernel("standard_rate_band")
+def standard_rate_band(
+    basis,
+    is_spouse,
+    is_assessable,
+    has_child_carer_credit,
+    spouse_income,
+    single,
+    single_with_child,
+    married,
+    max_increase,
+    out,
+):
+    for i in range(len(out)):
+        if is_spouse[i] and basis[i] == 0:
+            # Joint assessment: the band is the assessable spouse's
+            if is_assessable[i]:
+                out[i] = married + min(max_increase, max(0.0, spouse_income[i]))
+            else:
+                out[i] = 0
+        elif has_child_carer_credit[i] and not is_spouse[i]:
+            out[i] = single_with_child
+        else:
+            out[i] = single
+    return out
+
+
+@loop_kernel("employee_prsi")
+def employee_prsi(
+    employment_income,
+    age,
+    rate,
+    threshold,
+    credit_limit,
+    weekly_credit,
+    out,
+):
+    for i in range(len(out)):
+        weekly_earnings = employment_income[i] / 52
+        if age[i] < 16 or age[i] >= 70 or weekly_earnings <= threshold:
+            out[i] = 0
+            continue
+        prsi = employment_income[i] * rate
+        if weekly_earnings <= credit_limit:
+            # The credit tapers by a sixth of earnings above the threshold
+            credit = max(0.0, weekly_credit - (weekly_earnings - threshold) / 6)
+            prsi = max(0.0, prsi - 52 * credit)
+        out[i] = prsi
+    return out
+
+
+@loop_kernel("child_benefit")
+def child_benefit(
+    age,
+    is_in_education,
+    is_twin,
+    is_multiple_birth,
+    age_limit,
+    education_age_limit,
+    age_threshold,
+    under_threshold_rate,
+    over_threshold_rate,
+    twins_multiplier,
+    multiple_births_multiplier,
+    out,
+):
+    for i in range(len(out)):
+        eligible = age[i] < age_limit or (
+            age[i] < education_age_limit and is_in_education[i]
+        )
+        if not eligible:
+            out[i] = 0
+            continue
+        if age[i] < age_threshold:
+            monthly_rate = under_threshold_rate
+        else:
+            monthly_rate = over_threshold_rate
+        if is_multiple_birth[i]:
+            monthly_rate *= multiple_births_multiplier
+        elif is_twin[i]:
+            monthly_rate *= twins_multiplier
+        out[i] = 12 * monthly_rate
+    return out
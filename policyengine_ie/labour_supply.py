@@ -0,0 +1,233 @@
+"""
+Labour supply responses to tax changes.
+
+A static costing holds everyone's earnings fixed. With a labour supply
+response, each earner's employment income in the reformed simulation
+changes in proportion to the change in their marginal retention rate
+(one minus the marginal rate of income tax, USC and employee PRSI) and in
+their tax unit's net earnings::
+
+    change in earnings / earnings
+        = substitution elasticity * change in retention rate / retention rate
+        + income elasticity * change in net earnings / net earnings
+
+The change in net earnings is the reform's, at baseline earnings, so the
+response does not feed its own income effect.
+
+This is the intensive margin only: nobody starts or stops work. Elasticities
+are single numbers or arrays with one value per person.
+
+Marginal rates are measured by raising earnings by ``STEP`` euros and
+recalculating the three taxes. In a tax unit with two earners each is
+stepped in a separate pass, so the band and credits joint assessment shares
+between spouses are not counted twice. The new earnings change marginal
+rates in turn, so the substitution response is iterated to a fixed point. Each pass
+recalculates only the variables calculated from employment income
+(``policyengine_ie.plan.dependents``), keeping everything else the
+simulation holds, and every step is whole-array, so the cost of a response
+grows linearly with the population.
+"""
+
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Union
+
+import numpy as np
+from policyengine_core.periods import period as period_
+
+from policyengine_ie.gross_net import STEP
+from policyengine_ie.plan import dependents
+
+
+EARNINGS = "employment_income"
+
+TAXES = ("income_tax_net", "usc", "employee_prsi")
+
+# Largest change in anyone's earnings, in euros, between iterations at
+# which the response counts as converged
+TOLERANCE = 1.0
+
+MAX_ITERATIONS = 20
+
+
+@dataclass
+class LabourSupplyElasticities:
+    """
+    Intensive-margin elasticities of earnings.
+
+    Args:
+        substitution: Elasticity with respect to the marginal retention
+            rate. Positive: people work more when they keep more of an
+            extra euro.
+        income: Elasticity with respect to net earnings. Usually negative:
+            people work less when they are better off.
+    """
+
+    substitution: Union[float, np.ndarray] = 0.0
+    income: Union[float, np.ndarray] = 0.0
+
+
+@dataclass
+class LabourSupplyResponse:
+    """Earnings and marginal rates before and after a labour supply response."""
+
+    baseline_earnings: np.ndarray
+    earnings: np.ndarray
+    baseline_marginal_rate: np.ndarray
+    marginal_rate: np.ndarray
+    iterations: int
+    converged: bool
+
+    @property
+    def change(self) -> np.ndarray:
+        """Change in each person's employment income."""
+        return self.earnings - self.baseline_earnings
+
+
+def _values(simulation, variable: str, period) -> np.ndarray:
+    return np.asarray(simulation.calculate(variable, period), dtype=float)
+
+
+def _taxes(simulation, period) -> np.ndarray:
+    """Each person's tax unit's total income tax, USC and employee PRSI."""
+    taxes = sum(_values(simulation, tax, period) for tax in TAXES)
+    return simulation.persons.tax_unit.sum(taxes)
+
+
+def _net_earnings(simulation, period) -> np.ndarray:
+    """Each person's tax unit's employment income after the taxes."""
+    earnings = simulation.persons.tax_unit.sum(_values(simulation, EARNINGS, period))
+    return earnings - _taxes(simulation, period)
+
+
+def _set_earnings(simulation, period, earnings: np.ndarray) -> None:
+    """Set employment income and drop the values calculated from it."""
+    budget = simulation.__dict__.get("memory_budget")
+    for variable in dependents(simulation.tax_benefit_system, [EARNINGS]):
+        holder = simulation.get_holder(variable)
+        # Values the data supplies do not depend on employment income here
+        if holder.get_array(period) is None or holder.is_derived(period):
+            holder.delete_arrays(period)
+        if budget is not None:
+            budget.discard(variable, period)
+    simulation.set_input(EARNINGS, period, earnings)
+
+
+@contextmanager
+def _earnings_set_to(simulation, period, earnings: np.ndarray):
+    """Calculate with other earnings inside a block, then put back the
+    original earnings and the values calculated from them."""
+    original = _values(simulation, EARNINGS, period).copy()
+    saved = {}
+    for variable in dependents(simulation.tax_benefit_system, [EARNINGS]):
+        holder = simulation.get_holder(variable)
+        array = holder.get_array(period)
+        if array is not None and holder.is_derived(period):
+            saved[variable] = array
+    _set_earnings(simulation, period, earnings)
+    try:
+        yield
+    finally:
+        _set_earnings(simulation, period, original)
+        for variable, array in saved.items():
+            simulation.get_holder(variable).put_in_cache(array, period, derived=True)
+
+
+def marginal_tax_rates(simulation, period, step: float = STEP) -> np.ndarray:
+    """
+    Marginal rate of income tax, USC and employee PRSI on each person's
+    employment income: the rise in their tax unit's taxes per euro of
+    earnings. Zero for people with no employment income.
+
+    The simulation's values are left as they were.
+    """
+    period = period_(period)
+    earnings = _values(simulation, EARNINGS, period)
+    people = simulation.persons
+    is_earner = earnings > 0
+    rates = np.zeros_like(earnings)
+    if not is_earner.any():
+        return rates
+    taxes = _taxes(simulation, period)
+    # One pass per earner position within a tax unit, highest earner first
+    position = people.get_rank(people.tax_unit, -earnings, condition=is_earner)
+    for rank in range(int(position.max()) + 1):
+        stepped = position == rank
+        with _earnings_set_to(simulation, period, earnings + step * stepped):
+            stepped_taxes = _taxes(simulation, period)
+        rates[stepped] = (stepped_taxes - taxes)[stepped] / step
+    return rates
+
+
+def apply_labour_supply_response(
+    baseline,
+    reformed,
+    period,
+    elasticities: LabourSupplyElasticities,
+    tolerance: float = TOLERANCE,
+    max_iterations: int = MAX_ITERATIONS,
+) -> LabourSupplyResponse:
+    """
+    Change employment income in a reformed simulation by the labour supply
+    response to the reform.
+
+    Args:
+        baseline: Baseline simulation.
+        reformed: Reformed simulation of the same people. Its employment
+            income is replaced with the responded earnings, and the values
+            calculated from it are dropped, so later calculations include
+            the response.
+        period: Year of the response.
+        elasticities: Earnings elasticities.
+        tolerance: Largest change in anyone's earnings, in euros, between
+            iterations at which to stop.
+        max_iterations: Most iterations before stopping unconverged. At
+            least one.
+
+    Returns:
+        Baseline and responded earnings, and marginal rates at each.
+    """
+    if max_iterations < 1:
+        raise ValueError("max_iterations must be at least 1.")
+    period = period_(period)
+    baseline_earnings = _values(baseline, EARNINGS, period).copy()
+    if len(_values(reformed, EARNINGS, period)) != len(baseline_earnings):
+        raise ValueError("The baseline and reformed simulations have different people.")
+    baseline_rate = marginal_tax_rates(baseline, period)
+    baseline_net = _net_earnings(baseline, period)
+    is_earner = baseline_earnings > 0
+
+    earnings = _values(reformed, EARNINGS, period).copy()
+    with _earnings_set_to(reformed, period, baseline_earnings):
+        reformed_net = _net_earnings(reformed, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        income_change = np.where(baseline_net > 0, reformed_net / baseline_net - 1, 0)
+    converged = False
+    for iteration in range(1, max_iterations + 1):
+        rate = marginal_tax_rates(reformed, period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            retention_change = np.where(
+                baseline_rate < 1, (1 - rate) / (1 - baseline_rate) - 1, 0
+            )
+        response = (
+            elasticities.substitution * retention_change
+            + elasticities.income * income_change
+        )
+        target = np.where(
+            is_earner, np.maximum(0, baseline_earnings * (1 + response)), earnings
+        )
+        gap = np.abs(target - earnings).max(initial=0)
+        earnings = target
+        _set_earnings(reformed, period, earnings)
+        if gap <= tolerance:
+            converged = True
+            break
+
+    return LabourSupplyResponse(
+        baseline_earnings=baseline_earnings,
+        earnings=earnings,
+        baseline_marginal_rate=baseline_rate,
+        marginal_rate=marginal_tax_rates(reformed, period),
+        iterations=iteration,
+        converged=converged,
+    )
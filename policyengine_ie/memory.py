@@ -0,0 +1,159 @@
+"""
+Memory budget for calculated arrays.
+
+A simulation keeps every array it calculates, for every period, until it is
+discarded. Runs over several years or reforms can need more memory than the
+machine has. With a budget::
+
+    simulation = Simulation(dataset=..., memory_budget=2 * 2**30)
+
+the calculated arrays held are counted after each top-level ``calculate``,
+and while they exceed the budget the least recently used are spilled to
+``.npy`` files and dropped from memory. A spilled array is loaded back when
+any calculation, top-level or one a formula makes, asks for that variable
+and period, so it is never calculated twice. Reloaded arrays are
+memory-mapped copy-on-write: pages are read from disk as they are used, and
+the array can be changed like a calculated one without changing the file.
+Inputs are never spilled. ``MemoryBudget(..., spill=False)`` drops arrays
+instead, and they are recalculated if needed again.
+
+The budget is enforced between top-level calculations, so one calculation
+can still use more than the budget while it runs.
+"""
+
+import shutil
+import tempfile
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+
+
+@dataclass
+class MemoryStats:
+    """What a memory budget has done so far."""
+
+    spills: int = 0
+    reloads: int = 0
+    evictions: int = 0
+    spilled_bytes: int = 0
+    held_bytes: int = 0
+    peak_bytes: int = 0
+
+
+class MemoryBudget:
+    """
+    Limit on the bytes of calculated arrays a simulation holds in memory.
+    Each simulation needs its own budget.
+
+    Args:
+        max_bytes: Most bytes of calculated arrays to keep in memory
+            between top-level calculations.
+        spill: Whether to write arrays dropped from memory to disk, to load
+            them back if needed, rather than recalculate them.
+        directory: Directory for spilled arrays. Defaults to a new temporary
+            directory, removed with the budget.
+    """
+
+    def __init__(self, max_bytes: int, spill: bool = True, directory: str = None):
+        if max_bytes < 0:
+            raise ValueError("The memory budget must not be negative.")
+        self.max_bytes = max_bytes
+        self.spill = spill
+        self._directory = Path(directory) if directory is not None else None
+        self._temporary = directory is None
+        self.stats = MemoryStats()
+        # Calculated (variable, period) keys, least recently used first
+        self._used: OrderedDict = OrderedDict()
+        self._spilled = {}
+        # Spill files of reloaded arrays, still mapped
+        self._reloaded = {}
+
+    @property
+    def directory(self) -> Path:
+        if self._directory is None:
+            self._directory = Path(tempfile.mkdtemp(prefix="policyengine_ie_spill_"))
+        return self._directory
+
+    def touch(self, variable: str, period) -> None:
+        """Record that a variable's value for a period was used."""
+        key = (variable, period)
+        self._used[key] = None
+        self._used.move_to_end(key)
+
+    def before_calculate(self, simulation, variable: str, period) -> None:
+        """Load back a variable's spilled array for a period before a
+        calculation reads it."""
+        if (variable, period) in self._spilled:
+            self._reload(simulation, variable, period)
+
+    def _reload(self, simulation, variable: str, period) -> None:
+        path = self._spilled.pop((variable, period))
+        holder = simulation.get_holder(variable)
+        if holder.get_array(period) is None:
+            holder.put_in_cache(np.load(path, mmap_mode="c"), period, derived=True)
+            self._reloaded[(variable, period)] = path
+            self.stats.reloads += 1
+        else:
+            Path(path).unlink(missing_ok=True)
+        self.touch(variable, period)
+
+    def _held(self, simulation) -> Tuple[int, list]:
+        """Bytes of calculated arrays held, and their keys, LRU first."""
+        held, total = [], 0
+        for key in list(self._used):
+            variable, period = key
+            holder = simulation.get_holder(variable)
+            array = holder.get_array(period)
+            if array is None or not holder.is_derived(period):
+                del self._used[key]
+                continue
+            # Memory-mapped arrays are on disk, not in memory
+            size = 0 if isinstance(array, np.memmap) else array.nbytes
+            held.append((key, array, size))
+            total += size
+        return total, held
+
+    def enforce(self, simulation) -> None:
+        """Spill or drop least recently used arrays until within budget."""
+        total, held = self._held(simulation)
+        self.stats.peak_bytes = max(self.stats.peak_bytes, total)
+        for (variable, period), array, size in held:
+            if total <= self.max_bytes:
+                break
+            if size == 0:
+                continue
+            if self.spill:
+                path = self.directory / f"{variable}__{period}.npy"
+                np.save(path, np.asarray(array))
+                self._spilled[(variable, period)] = path
+                self.stats.spills += 1
+                self.stats.spilled_bytes += size
+            else:
+                self.stats.evictions += 1
+            simulation.get_holder(variable).delete_arrays(period)
+            del self._used[(variable, period)]
+            total -= size
+        self.stats.held_bytes = total
+
+    def discard(self, variable: str, period) -> None:
+        """Forget a spilled array, for when its value is no longer valid."""
+        for files in (self._spilled, self._reloaded):
+            path = files.pop((variable, period), None)
+            if path is not None:
+                Path(path).unlink(missing_ok=True)
+        self._used.pop((variable, period), None)
+
+    def clear(self) -> None:
+        """Forget spilled arrays, for when calculated values are dropped."""
+        for path in [*self._spilled.values(), *self._reloaded.values()]:
+            Path(path).unlink(missing_ok=True)
+        self._spilled = {}
+        self._reloaded = {}
+        self._used.clear()
+
+    def __del__(self):
+        if self._temporary and self._directory is not None:
+            shutil.rmtree(self._directory, ignore_errors=True)
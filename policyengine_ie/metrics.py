@@ -0,0 +1,230 @@
+"""
+Metrics of simulation runs.
+
+A simulation given one or more sinks::
+
+    simulation = Simulation(
+        dataset=...,
+        metrics=[JsonLinesSink("metrics.jsonl"), PrometheusTextSink("ie.prom")],
+    )
+
+emits a machine-readable record when it is built and after each top-level
+``calculate``. Records are dicts:
+
+- ``"simulation"``: ``system_build_seconds`` (building the tax-benefit
+  system, once per process for the cached baseline), ``load_seconds``
+  (building the simulation and loading its situation or dataset) and
+  ``people``.
+- ``"calculate"``: the ``variable`` and ``period`` requested, ``seconds``
+  in all, and ``variables``, the seconds spent in each variable calculated
+  along the way, excluding those it asked for. An ``error`` names the
+  exception if the calculation failed.
+
+Both also give ``peak_rss_bytes`` (the process's peak resident set size),
+``array_bytes`` (arrays the simulation holds), ``result_cache`` and
+``memory_budget`` statistics where the simulation has them, and ``time``.
+
+Sinks are ``JsonLinesSink`` (one JSON record per line), ``PrometheusTextSink``
+(running totals in the text format read by the node exporter's textfile
+collector) and ``CallbackSink`` (any function of a record, which a plain
+function given as a sink is wrapped in).
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """Peak resident set size of this process, if the platform reports it."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MetricsSink:
+    """Somewhere to send metrics records."""
+
+    def emit(self, record: dict) -> None:
+        raise NotImplementedError
+
+
+class CallbackSink(MetricsSink):
+    """Sink calling a function with each record."""
+
+    def __init__(self, callback: Callable[[dict], None]):
+        self.callback = callback
+
+    def emit(self, record: dict) -> None:
+        self.callback(record)
+
+
+class JsonLinesSink(MetricsSink):
+    """Sink appending each record to a file as a line of JSON."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+
+    def emit(self, record: dict) -> None:
+        with open(self.path, "a") as file:
+            file.write(json.dumps(record, default=str) + "\n")
+
+
+class PrometheusTextSink(MetricsSink):
+    """
+    Sink keeping running totals and gauges from records and rewriting them
+    to a file in the Prometheus text format after each record.
+
+    Args:
+        path: File to write, conventionally ending ``.prom``.
+        prefix: Prefix of metric names.
+    """
+
+    def __init__(self, path: Union[str, Path], prefix: str = "policyengine_ie"):
+        self.path = Path(path)
+        self.prefix = prefix
+        self.counters: Dict[str, float] = {}
+        self.gauges: Dict[str, float] = {}
+
+    def _add(self, name: str, value: float, **labels) -> None:
+        key = self._key(name, labels)
+        self.counters[key] = self.counters.get(key, 0) + value
+
+    def _set(self, name: str, value: Optional[float], **labels) -> None:
+        if value is not None:
+            self.gauges[self._key(name, labels)] = value
+
+    def _key(self, name: str, labels: dict) -> str:
+        if not labels:
+            return f"{self.prefix}_{name}"
+        text = ",".join(
+            f'{key}="{str(value).replace(chr(34), chr(39))}"'
+            for key, value in sorted(labels.items())
+        )
+        return f"{self.prefix}_{name}{{{text}}}"
+
+    def emit(self, record: dict) -> None:
+        if record["event"] == "simulation":
+            self._add("simulations_total", 1)
+            self._add("load_seconds_total", record["load_seconds"])
+            self._set("system_build_seconds", record["system_build_seconds"])
+        else:
+            self._add("calculations_total", 1, variable=record["variable"])
+            self._add("calculate_seconds_total", record["seconds"])
+            if "error" in record:
+                self._add("calculation_errors_total", 1, error=record["error"])
+            for variable, seconds in record["variables"].items():
+                self._add("variable_seconds_total", seconds, variable=variable)
+        self._set("peak_rss_bytes", record["peak_rss_bytes"])
+        self._set("array_bytes", record["array_bytes"])
+        for source in ("result_cache", "memory_budget"):
+            for name, value in (record.get(source) or {}).items():
+                self._set(f"{source}_{name}", value)
+        lines = [f"{key} {value}" for key, value in sorted(self.counters.items())]
+        lines += [f"{key} {value}" for key, value in sorted(self.gauges.items())]
+        # Written whole and renamed, so a scrape never sees half a file
+        temporary = self.path.with_name(self.path.name + ".tmp")
+        temporary.write_text("\n".join(lines) + "\n")
+        os.replace(temporary, self.path)
+
+
+def sinks(metrics) -> List[MetricsSink]:
+    """Sinks from a sink, a function or a list of either."""
+    if metrics is None:
+        return []
+    if not isinstance(metrics, (list, tuple)):
+        metrics = [metrics]
+    return [
+        sink if isinstance(sink, MetricsSink) else CallbackSink(sink)
+        for sink in metrics
+    ]
+
+
+class MetricsRecorder:
+    """
+    Times a simulation's calculations and emits records to its sinks.
+
+    Args:
+        metrics: Sinks, as for ``sinks``.
+    """
+
+    def __init__(self, metrics):
+        self.sinks = sinks(metrics)
+        # [variable, start, seconds in variables it asked for]
+        self._stack: List[list] = []
+        self._seconds: Dict[str, float] = {}
+
+    def _state(self, simulation) -> dict:
+        result_cache = simulation.__dict__.get("result_cache")
+        memory_budget = simulation.__dict__.get("memory_budget")
+        return {
+            "time": time.time(),
+            "peak_rss_bytes": peak_rss_bytes(),
+            "array_bytes": simulation.get_memory_usage()["total_nb_bytes"],
+            "result_cache": (
+                result_cache.stats.to_dict() if result_cache is not None else None
+            ),
+            "memory_budget": (
+                dict(vars(memory_budget.stats)) if memory_budget is not None else None
+            ),
+        }
+
+    def emit(self, record: dict) -> None:
+        for sink in self.sinks:
+            sink.emit(record)
+
+    def simulation_built(self, simulation, load_seconds: float) -> None:
+        system = simulation.tax_benefit_system
+        self.emit(
+            {
+                "event": "simulation",
+                "system_build_seconds": getattr(system, "build_seconds", None),
+                "load_seconds": load_seconds,
+                "people": int(simulation.persons.count),
+                **self._state(simulation),
+            }
+        )
+
+    @contextmanager
+    def timing(self, simulation, variable: str, period):
+        """Time one ``calculate`` call, emitting a record if top-level."""
+        frame = [variable, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        error = None
+        try:
+            yield
+        except BaseException as exception:
+            error = type(exception).__name__
+            raise
+        finally:
+            self._stack.pop()
+            seconds = time.perf_counter() - frame[1]
+            self._seconds[variable] = (
+                self._seconds.get(variable, 0.0) + seconds - frame[2]
+            )
+            if self._stack:
+                self._stack[-1][2] += seconds
+            else:
+                record = {
+                    "event": "calculate",
+                    "variable": variable,
+                    "period": str(period),
+                    "seconds": seconds,
+                    "variables": self._seconds,
+                }
+                if error is not None:
+                    record["error"] = error
+                self._seconds = {}
+                self.emit({**record, **self._state(simulation)})
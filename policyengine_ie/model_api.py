@@ -12,6 +12,8 @@ from policyengine_core.periods import YEAR, MONTH, ETERNITY, period
 from policyengine_core.holders import set_input_dispatch_by_period
 from policyengine_core.reforms import Reform
 from policyengine_core.simulations import Simulation
+from policyengine_core.enums import Enum
+import numpy as np
 from numpy import (
     maximum as max_,
     minimum as min_,
@@ -33,5 +35,32 @@ from policyengine_ie.entities import (
     entities,
 )
 
+# Helpers for parameters that change part-way through a year
+from policyengine_ie.utils import intra_year_segments, parameter_values
+
+# Rate band lookup by binary search over a scale's thresholds
+from policyengine_ie.utils import band_amounts
+
+# Income tax assessment bases and helpers shared by the income tax variables
+from policyengine_ie.utils import (
+    ASSESSMENT_BASES,
+    JOINT_ASSESSMENT,
+    SEPARATE_ASSESSMENT,
+    SINGLE_ASSESSMENT,
+    assessed_band,
+    assessed_credits,
+    assessed_income,
+    banded_income_tax,
+)
+
+# Float type of the simulation, for arrays formulas allocate
+from policyengine_ie.precision import float_type
+
+# Scratch arrays for formulas that work in place
+from policyengine_ie.buffers import scratch
+
+# Loop kernels for formulas with a compiled backend
+from policyengine_ie import jit
+
 # Currency and unit definitions
 EUR = "currency-EUR"
@@ -0,0 +1,274 @@
+"""
+Execution plans for requested variables.
+
+A plan is worked out from the variable dependency graph alone, before any
+data is read. The dependencies of a variable are the variables its formulas
+request, found by parsing the formula source for calls such as
+``person("taxable_income", period)``, and those listed in its ``adds`` and
+``subtracts``. From the requested outputs a plan gives:
+
+- the input variables needed, so a dataset's other columns need not be
+  loaded;
+- an order to calculate the rest in, each after the variables it uses;
+- the point after which each intermediate variable is no longer needed, so
+  its arrays can be dropped to keep peak memory down.
+
+``run_plan`` calculates a plan in a simulation, dropping intermediates as it
+goes. The batch runner uses both. ``dependents`` walks the graph the other
+way, to the variables an input change affects, and ``parameter_readers``
+finds the variables a parameter change affects directly.
+"""
+
+import ast
+import inspect
+import re
+import textwrap
+import weakref
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+
+_dependencies = weakref.WeakKeyDictionary()
+_dependents = weakref.WeakKeyDictionary()
+_formula_paths = weakref.WeakKeyDictionary()
+
+
+def _formula_dependencies(formula, variables) -> List[str]:
+    tree = ast.parse(textwrap.dedent(inspect.getsource(formula)))
+    names = []
+    for node in ast.walk(tree):
+        if not isinstance(node, ast.Call) or not node.args:
+            continue
+        first = node.args[0]
+        if isinstance(first, (ast.List, ast.Tuple)):
+            constants = first.elts
+        else:
+            constants = [first]
+        for constant in constants:
+            if isinstance(constant, ast.Constant) and constant.value in variables:
+                names.append(constant.value)
+    return names
+
+
+def dependencies(system, variable: str) -> List[str]:
+    """Variables that calculating a variable uses directly."""
+    cache = _dependencies.setdefault(system, {})
+    if variable not in cache:
+        definition = system.get_variable(variable, check_existence=True)
+        names = list(definition.adds or []) + list(definition.subtracts or [])
+        for formula in definition.formulas.values():
+            names += _formula_dependencies(formula, system.variables)
+        cache[variable] = list(
+            dict.fromkeys(name for name in names if name != variable)
+        )
+    return cache[variable]
+
+
+def dependents(system, variables: Iterable[str]) -> List[str]:
+    """
+    Variables calculated, directly or through others, from any of
+    ``variables``: those whose values change when they do.
+    """
+    used_by = _dependents.get(system)
+    if used_by is None:
+        used_by = {}
+        for name in system.variables:
+            for dependency in dependencies(system, name):
+                used_by.setdefault(dependency, []).append(name)
+        _dependents[system] = used_by
+    found = {}
+    pending = list(variables)
+    while pending:
+        for name in used_by.get(pending.pop(), []):
+            if name not in found:
+                found[name] = None
+                pending.append(name)
+    return list(found)
+
+
+def _parameter_chain(node, aliases):
+    """The parameter path an expression reads, if it reads one."""
+    if isinstance(node, ast.Attribute):
+        if node.attr == "gov":
+            return ("gov",)
+        base = _parameter_chain(node.value, aliases)
+        return None if base is None else base + (node.attr,)
+    if isinstance(node, ast.Subscript) and isinstance(node.slice, ast.Constant):
+        base = _parameter_chain(node.value, aliases)
+        return None if base is None else base + (str(node.slice.value),)
+    if isinstance(node, ast.Name):
+        return aliases.get(node.id)
+    return None
+
+
+def _parameter_paths(formula) -> set:
+    """
+    Parameter nodes a formula reads or passes on, as paths from ``gov``.
+
+    Names bound to a node, as in ``p = parameters(period).gov.revenue.usc``,
+    are followed where they are used. A path is taken as far as the formula
+    names it: a node passed whole to a helper gives the node's path.
+    """
+    tree = ast.parse(textwrap.dedent(inspect.getsource(formula)))
+    aliases, bindings = {}, set()
+    changed = True
+    while changed:
+        changed = False
+        for node in ast.walk(tree):
+            if (
+                isinstance(node, ast.Assign)
+                and len(node.targets) == 1
+                and isinstance(node.targets[0], ast.Name)
+            ):
+                chain = _parameter_chain(node.value, aliases)
+                if chain is not None:
+                    bindings.add(id(node.value))
+                    if aliases.get(node.targets[0].id) != chain:
+                        aliases[node.targets[0].id] = chain
+                        changed = True
+    # Expressions extended by an attribute or key are not read whole
+    extended = {
+        id(node.value)
+        for node in ast.walk(tree)
+        if isinstance(node, (ast.Attribute, ast.Subscript))
+        and _parameter_chain(node, aliases) is not None
+    }
+    paths = set()
+    for node in ast.walk(tree):
+        if id(node) in extended or id(node) in bindings:
+            continue
+        if isinstance(node, ast.Name) and not isinstance(node.ctx, ast.Load):
+            continue
+        chain = _parameter_chain(node, aliases)
+        if chain is not None:
+            paths.add(chain)
+    return paths
+
+
+def parameter_readers(system, parameter: str) -> List[str]:
+    """
+    Variables whose formulas may read a parameter: those reading it, one of
+    its children, or a node containing it. Formulas pass nodes such as
+    ``gov.revenue.income_tax.credits`` to helpers that read any of their
+    descendants, so a formula using such a node counts as reading all of
+    them.
+    """
+    paths_by_variable = _formula_paths.get(system)
+    if paths_by_variable is None:
+        paths_by_variable = {
+            name: set().union(*map(_parameter_paths, variable.formulas.values()))
+            for name, variable in system.variables.items()
+        }
+        _formula_paths[system] = paths_by_variable
+    # A bracket of a scale, such as ``...yearly_average_bands[2].amount``,
+    # has the bracket index as a node
+    path = tuple(part for part in re.split(r"[.\[\]]+", parameter) if part)
+    return [
+        name
+        for name, paths in paths_by_variable.items()
+        if any(path[: len(read)] == read or read[: len(path)] == path for read in paths)
+    ]
+
+
+@dataclass
+class ExecutionPlan:
+    """
+    How to calculate a set of output variables.
+
+    Args:
+        outputs: Variables requested.
+        inputs: Variables needed that are read from the data rather than
+            calculated.
+        order: Variables to calculate, each after those it uses.
+        release: For a variable in ``order``, the intermediate variables
+            no longer needed once it is calculated.
+    """
+
+    outputs: List[str]
+    inputs: List[str]
+    order: List[str]
+    release: Dict[str, List[str]] = field(default_factory=dict)
+
+
+def execution_plan(
+    system, outputs: Iterable[str], provided: Iterable[str] = ()
+) -> ExecutionPlan:
+    """
+    Plan the calculation of output variables.
+
+    Args:
+        system: Tax-benefit system to plan for.
+        outputs: Variables requested.
+        provided: Variables the data supplies. They are read, not
+            calculated, even if they have formulas.
+    """
+    outputs = list(dict.fromkeys(outputs))
+    provided = set(provided)
+    inputs, order = [], []
+    # Depth-first, adding each variable after everything it uses
+    state = {}
+    for output in outputs:
+        stack = [(output, False)]
+        while stack:
+            variable, expanded = stack.pop()
+            if expanded:
+                state[variable] = "done"
+                order.append(variable)
+                continue
+            if state.get(variable) == "done":
+                continue
+            if state.get(variable) == "visiting":
+                raise ValueError(f"Variable '{variable}' depends on itself.")
+            definition = system.get_variable(variable, check_existence=True)
+            is_calculated = (
+                definition.formulas or definition.adds or definition.subtracts
+            )
+            if variable in provided or not is_calculated:
+                state[variable] = "done"
+                inputs.append(variable)
+                continue
+            state[variable] = "visiting"
+            stack.append((variable, True))
+            for dependency in reversed(dependencies(system, variable)):
+                if state.get(dependency) != "done":
+                    stack.append((dependency, False))
+
+    # Release each intermediate after the last variable that uses it
+    last_use = {}
+    for variable in order:
+        for dependency in dependencies(system, variable):
+            last_use[dependency] = variable
+    release = {}
+    for variable in order:
+        if variable in last_use and variable not in outputs:
+            release.setdefault(last_use[variable], []).append(variable)
+    return ExecutionPlan(
+        outputs=outputs, inputs=sorted(inputs), order=order, release=release
+    )
+
+
+def run_plan(
+    simulation, plan: ExecutionPlan, period, map_to: str = None
+) -> Dict[str, np.ndarray]:
+    """
+    Calculate a plan's outputs, dropping intermediates once used.
+
+    Args:
+        simulation: Simulation to calculate in.
+        plan: Output of ``execution_plan`` for the simulation's system.
+        period: Period to calculate.
+        map_to: Optional entity to map outputs to, e.g. ``"person"``.
+
+    Returns:
+        The value of each output variable.
+    """
+    for variable in plan.order:
+        simulation.calculate(variable, period)
+        for intermediate in plan.release.get(variable, []):
+            simulation.get_holder(intermediate).delete_arrays(period)
+    return {
+        variable: simulation.calculate(variable, period, map_to=map_to)
+        for variable in plan.outputs
+    }
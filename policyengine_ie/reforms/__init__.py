@@ -0,0 +1,9 @@
+"""Reforms to the Irish tax and benefit system."""
+
+from policyengine_ie.reforms.parametric import (
+    ParametricReform,
+    baseline_system,
+    reformed_system,
+)
+
+__all__ = ["ParametricReform", "baseline_system", "reformed_system"]
@@ -0,0 +1,184 @@
+"""
+Parameter-only reforms given as dicts.
+
+A parametric reform maps parameter paths to the values they take from given
+instants, for example::
+
+    {"gov.revenue.usc.rates.band_3": {"2025-01-01": 0.035}}
+
+The dict is validated once against the baseline parameter tree and compiled
+to a list of updates. Applying it clones the cached baseline system and
+updates the clone's parameters, so no YAML is read again. Each compiled reform
+has a hash of its normalised updates, and reformed systems are cached by that
+hash, so a reform that arrives again reuses the system built the first time.
+"""
+
+import hashlib
+import json
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple, Union
+
+from policyengine_core.parameters import Parameter
+from policyengine_core.periods import instant
+
+from policyengine_ie.system import IrishTaxBenefitSystem
+from policyengine_ie.uprating import clear_uprating
+
+
+# Number of reformed systems kept by ``reformed_system``
+REFORMED_SYSTEM_CACHE_SIZE = 32
+
+ParameterUpdate = Tuple[str, str, Optional[str], Union[int, float, bool]]
+
+
+@lru_cache(maxsize=1)
+def baseline_system() -> IrishTaxBenefitSystem:
+    """The baseline system, built once per process."""
+    return IrishTaxBenefitSystem()
+
+
+def _parse_period_key(period_key) -> Tuple[str, Optional[str]]:
+    """
+    Translate a period key into the first and last days it covers.
+
+    ``"2025"``, ``"2025-06"`` and ``"2025-06-01"`` apply from that instant
+    onward; ``"2025-01-01.2025-12-31"`` applies from the first date to the
+    second, inclusive.
+    """
+    period_key = str(period_key)
+    if "." in period_key:
+        start, stop = period_key.split(".")
+        start, stop = str(instant(start)), str(instant(stop))
+        if stop < start:
+            raise ValueError(f"Period '{period_key}' ends before it starts.")
+        return start, stop
+    return str(instant(period_key)), None
+
+
+def _check_value(path: str, period_key, value) -> None:
+    if isinstance(value, (bool, int, float)):
+        return
+    raise ValueError(
+        f"Reform value for '{path}' at '{period_key}' must be a number or "
+        f"boolean, got {value!r}."
+    )
+
+
+class ParametricReform:
+    """
+    A validated, hashed set of parameter updates.
+
+    Args:
+        changes: Dict mapping parameter paths to ``{period_key: value}``.
+        system: System to validate the paths against. Defaults to the
+            cached baseline system.
+    """
+
+    def __init__(
+        self,
+        changes: Dict[str, Dict[str, Union[int, float, bool]]],
+        system: IrishTaxBenefitSystem = None,
+    ):
+        if system is None:
+            system = baseline_system()
+        self.updates: List[ParameterUpdate] = self._compile(changes, system)
+        # Numbers are hashed as floats, so 3 and 3.0 give the same hash
+        hashed = [
+            [path, start, stop, value if isinstance(value, bool) else float(value)]
+            for path, start, stop, value in self.updates
+        ]
+        canonical = json.dumps(hashed, sort_keys=True, separators=(",", ":"))
+        self.hash: str = hashlib.sha256(canonical.encode()).hexdigest()
+
+    @staticmethod
+    def _compile(changes: dict, system: IrishTaxBenefitSystem) -> list:
+        if not isinstance(changes, dict):
+            raise ValueError(
+                f"A reform must be a dict of parameter paths, got {type(changes).__name__}."
+            )
+        updates = []
+        for path, values in changes.items():
+            parameter = system.parameters.get_child(path)
+            if not isinstance(parameter, Parameter):
+                raise ValueError(
+                    f"'{path}' is a group of parameters; reforms must name a single parameter."
+                )
+            if not isinstance(values, dict):
+                raise ValueError(
+                    f"Reform values for '{path}' must be a dict of period keys to values."
+                )
+            for period_key, value in values.items():
+                _check_value(path, period_key, value)
+                start, stop = _parse_period_key(period_key)
+                updates.append([path, start, stop, value])
+        # Later-starting updates are applied last, so they are not
+        # overwritten by an open-ended update starting earlier.
+        updates.sort(key=lambda update: (update[0], update[1]))
+        return updates
+
+    @classmethod
+    def from_json(cls, text: str, system: IrishTaxBenefitSystem = None):
+        """Compile a reform from its JSON representation."""
+        return cls(json.loads(text), system)
+
+    def apply(self, system: IrishTaxBenefitSystem) -> None:
+        """Update the parameters of ``system`` in place."""
+        # Reformed values are uprated from, not over, the baseline's uprating
+        clear_uprating(system)
+        for path, start, stop, value in self.updates:
+            parameter = system.parameters.get_child(path)
+            parameter.update(
+                start=instant(start),
+                stop=instant(stop) if stop is not None else None,
+                value=value,
+            )
+        system._parameters_at_instant_cache = {}
+
+    def to_dict(self) -> dict:
+        """The reform in the dict format it was given in, normalised."""
+        changes = {}
+        for path, start, stop, value in self.updates:
+            period_key = start if stop is None else f"{start}.{stop}"
+            changes.setdefault(path, {})[period_key] = value
+        return changes
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, ParametricReform) and self.hash == other.hash
+
+    def __hash__(self) -> int:
+        return hash(self.hash)
+
+    def __repr__(self) -> str:
+        return f"ParametricReform({self.to_dict()!r})"
+
+
+_reformed_systems: "OrderedDict[str, IrishTaxBenefitSystem]" = OrderedDict()
+
+
+def reformed_system(
+    reform: Union[ParametricReform, dict, None],
+) -> IrishTaxBenefitSystem:
+    """
+    The baseline system with a parametric reform applied.
+
+    Systems are cached by reform hash, so identical reforms share one system.
+    ``None`` or an empty reform gives the cached baseline system.
+    """
+    if reform is None:
+        return baseline_system()
+    if not isinstance(reform, ParametricReform):
+        reform = ParametricReform(reform)
+    if not reform.updates:
+        return baseline_system()
+    system = _reformed_systems.get(reform.hash)
+    if system is not None:
+        _reformed_systems.move_to_end(reform.hash)
+        return system
+    system = baseline_system().clone()
+    reform.apply(system)
+    system.reform_hash = reform.hash
+    _reformed_systems[reform.hash] = system
+    if len(_reformed_systems) > REFORMED_SYSTEM_CACHE_SIZE:
+        _reformed_systems.popitem(last=False)
+    return system
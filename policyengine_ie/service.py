@@ -0,0 +1,355 @@
+"""
+Local HTTP calculation service.
+
+Run with::
+
+    python -m policyengine_ie.service --port 8080 --workers 4
+
+and send household calculations as JSON::
+
+    POST /calculate
+    {
+        "situation": {"people": {"you": {"employment_income": {"2024": 50000}}}},
+        "variables": ["income_tax_net", "usc"],
+        "period": "2024",
+        "reform": {"gov.revenue.usc.rates.band_3": {"2024-01-01": 0.035}}
+    }
+
+which returns ``{"result": {"usc": {"you": 1304.62}, ...}}``, each variable
+keyed by the IDs of the entity it is defined for. ``GET /health`` returns
+the service's counters.
+
+Requests arriving within one tick of each other are grouped by reform and
+each group is calculated as one stacked simulation (see
+``policyengine_ie.situations``) in a pool of worker processes, each of which
+builds the baseline system once when it starts. Only the standard library
+is used.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from http import HTTPStatus
+from typing import List, Optional
+
+from policyengine_ie.reforms import ParametricReform, baseline_system, reformed_system
+from policyengine_ie.situations import split_ids, split_results, stack_situations
+from policyengine_ie.system import Simulation
+
+
+DEFAULT_PERIOD = "2024"
+
+# Largest number of requests calculated in one stacked simulation
+MAX_BATCH_SIZE = 512
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1 << 20
+
+
+def _warm_worker() -> None:
+    """Build the baseline system when a worker process starts."""
+    baseline_system()
+
+
+def _calculate(simulation: Simulation, requests: List[dict]) -> List[dict]:
+    results = [{} for _ in requests]
+    by_period = {}
+    for request in requests:
+        variables = by_period.setdefault(request["period"], {})
+        variables.update(dict.fromkeys(request["variables"]))
+    positions = {}
+    splits = {}
+    for period, variables in by_period.items():
+        values = simulation.calculate_many(list(variables), period)
+        for variable, array in values.items():
+            entity = simulation.tax_benefit_system.get_variable(variable).entity
+            if entity.key not in positions:
+                ids = simulation.populations[entity.key].ids
+                positions[entity.key] = split_ids(ids)
+            splits[variable, period] = split_results(
+                array, positions[entity.key], len(requests)
+            )
+    for index, request in enumerate(requests):
+        for variable in request["variables"]:
+            results[index][variable] = splits[variable, request["period"]][index]
+    return results
+
+
+def calculate_batch(reform: Optional[dict], requests: List[dict]) -> List[dict]:
+    """
+    Calculate a batch of requests under one reform.
+
+    The requests are stacked into one simulation. If that fails, each is
+    calculated on its own so one invalid situation does not fail the others.
+
+    Args:
+        reform: Parametric reform dict, or ``None`` for the baseline.
+        requests: Dicts with ``situation``, ``variables`` and ``period``.
+
+    Returns:
+        For each request, ``{"result": ...}`` or ``{"error": message}``.
+    """
+    system = reformed_system(reform)
+    try:
+        situation = stack_situations([r["situation"] for r in requests], system)
+        simulation = Simulation(tax_benefit_system=system, situation=situation)
+        return [{"result": result} for result in _calculate(simulation, requests)]
+    except Exception:
+        return [_calculate_one(system, request) for request in requests]
+
+
+def _calculate_one(system, request: dict) -> dict:
+    try:
+        situation = stack_situations([request["situation"]], system)
+        simulation = Simulation(tax_benefit_system=system, situation=situation)
+        return {"result": _calculate(simulation, [request])[0]}
+    except Exception as error:
+        return {"error": f"{type(error).__name__}: {error}"}
+
+
+class RequestError(ValueError):
+    """A request that cannot be calculated."""
+
+
+def parse_request(body: dict) -> tuple:
+    """
+    Validate a ``/calculate`` request body.
+
+    Returns:
+        The reform hash (``""`` for the baseline), the reform dict, and the
+        request to pass to ``calculate_batch``.
+    """
+    if not isinstance(body, dict):
+        raise RequestError("The request body must be a JSON object.")
+    situation = body.get("situation")
+    if not isinstance(situation, dict) or not situation.get("people"):
+        raise RequestError("'situation' must be an object with 'people'.")
+    variables = body.get("variables")
+    if (
+        not isinstance(variables, list)
+        or not variables
+        or not all(isinstance(name, str) for name in variables)
+    ):
+        raise RequestError("'variables' must be a non-empty list of names.")
+    known = baseline_system().variables
+    unknown = [name for name in variables if name not in known]
+    if unknown:
+        raise RequestError(f"Unknown variables: {', '.join(unknown)}.")
+    reform = body.get("reform") or None
+    reform_hash = ""
+    if reform is not None:
+        try:
+            reform_hash = ParametricReform(reform).hash
+        except ValueError as error:
+            raise RequestError(f"Invalid reform: {error}")
+    request = {
+        "situation": situation,
+        "variables": variables,
+        "period": str(body.get("period", DEFAULT_PERIOD)),
+    }
+    return reform_hash, reform, request
+
+
+class CalculationService:
+    """
+    Batches calculation requests and runs them in an executor.
+
+    Args:
+        executor: Where batches run. Defaults to a process pool with
+            ``workers`` processes that build the baseline system on start.
+        workers: Number of worker processes if no executor is given.
+        tick: Seconds to wait after the first request of a batch for others
+            to arrive.
+        max_batch_size: Largest number of requests in one batch.
+    """
+
+    def __init__(
+        self,
+        executor: Executor = None,
+        workers: int = None,
+        tick: float = 0.005,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ):
+        if executor is None:
+            executor = ProcessPoolExecutor(
+                max_workers=workers or os.cpu_count(),
+                initializer=_warm_worker,
+            )
+        self.executor = executor
+        self.tick = tick
+        self.max_batch_size = max_batch_size
+        self.stats = {"requests": 0, "batches": 0, "errors": 0}
+        self._queue: Optional[asyncio.Queue] = None
+        self._batcher: Optional[asyncio.Task] = None
+        self._running = set()
+
+    async def start(self) -> None:
+        self._queue = asyncio.Queue()
+        self._batcher = asyncio.create_task(self._run_batches())
+
+    async def stop(self) -> None:
+        if self._batcher is not None:
+            self._batcher.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    async def calculate(self, body: dict) -> dict:
+        """Queue one request and wait for its result."""
+        reform_hash, reform, request = parse_request(body)
+        future = asyncio.get_running_loop().create_future()
+        self.stats["requests"] += 1
+        await self._queue.put((reform_hash, reform, request, future))
+        return await future
+
+    async def _run_batches(self) -> None:
+        while True:
+            pending = [await self._queue.get()]
+            await asyncio.sleep(self.tick)
+            while len(pending) < self.max_batch_size and not self._queue.empty():
+                pending.append(self._queue.get_nowait())
+            groups = {}
+            for reform_hash, reform, request, future in pending:
+                group = groups.setdefault(reform_hash, (reform, [], []))
+                group[1].append(request)
+                group[2].append(future)
+            for reform, requests, futures in groups.values():
+                task = asyncio.create_task(self._run_batch(reform, requests, futures))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
+
+    async def _run_batch(self, reform, requests, futures) -> None:
+        self.stats["batches"] += 1
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                self.executor, calculate_batch, reform, requests
+            )
+        except Exception as error:
+            results = [{"error": f"{type(error).__name__}: {error}"}] * len(futures)
+        for future, result in zip(futures, results):
+            if "error" in result:
+                self.stats["errors"] += 1
+            if not future.done():
+                future.set_result(result)
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve HTTP/1.1 requests on one connection until it closes."""
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                request_line, *header_lines = head.decode("latin-1").split("\r\n")
+                method, path, _ = (request_line.split(" ", 2) + ["", ""])[:3]
+                headers = {}
+                for line in header_lines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+                try:
+                    length = int(headers.get("content-length", 0) or 0)
+                except ValueError:
+                    length = -1
+                if length < 0:
+                    await self._respond(
+                        writer,
+                        HTTPStatus.BAD_REQUEST,
+                        {"error": "Invalid Content-Length."},
+                        keep_alive=False,
+                    )
+                    break
+                if length > MAX_BODY_SIZE:
+                    await self._respond(
+                        writer,
+                        HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                        {"error": "Request body too large."},
+                        keep_alive=False,
+                    )
+                    break
+                body = await reader.readexactly(length) if length else b""
+                status, response = await self._route(method, path, body)
+                keep_alive = headers.get("connection", "").lower() != "close"
+                await self._respond(writer, status, response, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def _route(self, method: str, path: str, body: bytes) -> tuple:
+        if method == "GET" and path == "/health":
+            return HTTPStatus.OK, {"status": "ok", **self.stats}
+        if path != "/calculate":
+            return HTTPStatus.NOT_FOUND, {"error": f"No route for {path}."}
+        if method != "POST":
+            return HTTPStatus.METHOD_NOT_ALLOWED, {"error": "Use POST."}
+        try:
+            result = await self.calculate(json.loads(body or b"null"))
+        except (json.JSONDecodeError, RequestError) as error:
+            return HTTPStatus.BAD_REQUEST, {"error": str(error)}
+        if "error" in result:
+            return HTTPStatus.UNPROCESSABLE_ENTITY, result
+        return HTTPStatus.OK, result
+
+    @staticmethod
+    async def _respond(
+        writer: asyncio.StreamWriter,
+        status: HTTPStatus,
+        body: dict,
+        keep_alive: bool,
+    ) -> None:
+        content = json.dumps(body).encode()
+        head = (
+            f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(content)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + content)
+        await writer.drain()
+
+
+async def serve(
+    host: str = "127.0.0.1",
+    port: int = 8080,
+    workers: int = None,
+    tick: float = 0.005,
+) -> None:
+    """Run the service until cancelled."""
+    service = CalculationService(workers=workers, tick=tick)
+    await service.start()
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await service.stop()
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="PolicyEngine Ireland service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default: CPUs)"
+    )
+    parser.add_argument(
+        "--tick-ms",
+        type=float,
+        default=5,
+        help="Milliseconds to collect requests into one batch",
+    )
+    args = parser.parse_args(argv)
+    # Build the baseline system before accepting requests
+    baseline_system()
+    try:
+        asyncio.run(serve(args.host, args.port, args.workers, args.tick_ms / 1000))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
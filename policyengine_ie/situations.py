@@ -0,0 +1,162 @@
+"""
+Combining household situations into one simulation.
+
+Many small situations are much cheaper to calculate as a single simulation
+than one at a time, because each formula then runs once over all of them.
+``stack_situations`` prefixes every entity ID with the situation's position,
+so IDs from different situations cannot clash, and ``split_results`` maps
+calculated arrays back to each situation's own IDs.
+"""
+
+import logging
+from contextlib import contextmanager
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from policyengine_ie.system import IrishTaxBenefitSystem, Simulation
+
+
+SEPARATOR = "/"
+
+
+def _stacked_id(index: int, entity_id) -> str:
+    return f"{index}{SEPARATOR}{entity_id}"
+
+
+def stack_situations(
+    situations: List[dict], system: IrishTaxBenefitSystem
+) -> Dict[str, dict]:
+    """
+    Combine situations into one situation with prefixed entity IDs.
+
+    A situation that leaves out a group entity gets one group of that entity
+    containing all its people, as it would if simulated on its own.
+
+    Args:
+        situations: Situation dicts, as passed to ``Simulation``.
+        system: The system whose entities the situations use.
+
+    Returns:
+        One situation containing every person and group.
+    """
+    person_plural = system.person_entity.plural
+    stacked = {person_plural: {}}
+    for entity in system.group_entities:
+        stacked[entity.plural] = {}
+
+    for index, situation in enumerate(situations):
+        people = situation.get(person_plural) or {}
+        if not people:
+            raise ValueError(f"Situation {index} has no {person_plural}.")
+        for person_id, variables in people.items():
+            stacked[person_plural][_stacked_id(index, person_id)] = variables
+
+        for entity in system.group_entities:
+            groups = situation.get(entity.plural)
+            if groups is None:
+                first_role = entity.roles[0]
+                groups = {
+                    entity.key: {first_role.plural or first_role.key: list(people)}
+                }
+            role_keys = {role.plural or role.key for role in entity.roles}
+            for group_id, group in groups.items():
+                stacked_group = {}
+                for key, value in group.items():
+                    if key in role_keys:
+                        value = [_stacked_id(index, member) for member in value]
+                    stacked_group[key] = value
+                stacked[entity.plural][_stacked_id(index, group_id)] = stacked_group
+
+    return stacked
+
+
+def split_ids(ids) -> Dict[int, List[tuple]]:
+    """
+    Group stacked entity IDs by situation.
+
+    Returns:
+        For each situation index, the ``(position, original ID)`` of each of
+        its entities in the stacked arrays.
+    """
+    positions = {}
+    for position, stacked_id in enumerate(ids):
+        index, entity_id = str(stacked_id).split(SEPARATOR, 1)
+        positions.setdefault(int(index), []).append((position, entity_id))
+    return positions
+
+
+def split_results(values, positions: Dict[int, List[tuple]], count: int) -> List[dict]:
+    """
+    Split one stacked array into a dict of values per situation.
+
+    Args:
+        values: Array calculated over the stacked simulation.
+        positions: Output of ``split_ids`` for the array's entity.
+        count: Number of situations stacked.
+
+    Returns:
+        For each situation, a dict from its entity IDs to values.
+    """
+    values = values.tolist()
+    results = [{} for _ in range(count)]
+    for index, members in positions.items():
+        results[index] = {
+            entity_id: values[position] for position, entity_id in members
+        }
+    return results
+
+
+class _IgnoreStructureColumns(logging.Filter):
+    """Hide the warning that ID and role columns are not variables."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        return not record.getMessage().startswith("The dataset contains")
+
+
+@contextmanager
+def quiet_structure_warning():
+    """
+    Hide policyengine-core's warning about the ID and role columns of flat
+    datasets while building a simulation from one.
+    """
+    root = logging.getLogger()
+    log_filter = _IgnoreStructureColumns()
+    root.addFilter(log_filter)
+    try:
+        yield
+    finally:
+        root.removeFilter(log_filter)
+
+
+def repeat_situation(
+    situation: dict, copies: int, system: IrishTaxBenefitSystem
+) -> pd.DataFrame:
+    """
+    Many copies of one situation as a flat dataset.
+
+    Building a simulation from a flat dataset scales linearly with the
+    number of people, unlike building one from a large situation dict.
+    Person ``i`` of copy ``c`` is row ``c * n + i``, where ``n`` is the
+    number of people in the situation, in the situation's order.
+
+    Returns:
+        A DataFrame to pass to ``Simulation`` as ``dataset``.
+    """
+    simulation = Simulation(tax_benefit_system=system, situation=situation)
+    inputs = simulation.to_input_dataframe()
+    count = simulation.populations["person"].count
+    copy = np.repeat(np.arange(copies), count)
+    columns = {"person_id": np.arange(copies * count)}
+    for entity in system.group_entities:
+        population = simulation.populations[entity.key]
+        columns[f"person_{entity.key}_id"] = copy * population.count + np.tile(
+            population.members_entity_id, copies
+        )
+        columns[f"person_{entity.key}_role"] = np.tile(
+            [role.key for role in population.members_role], copies
+        )
+    for column in inputs.columns:
+        columns[column] = np.tile(inputs[column].to_numpy(), copies)
+    return pd.DataFrame(columns)
@@ -0,0 +1,257 @@
+"""
+Snapshots of whole simulations.
+
+``save_simulation`` writes everything a simulation holds to a directory: the
+entity structure (ids and memberships), every input, and every calculated
+array for every period, as one ``.npy`` file each, with a ``manifest.json``
+recording the model and policyengine-core versions, hashes of the model's
+files (see ``policyengine_ie.cache.model_hash``) and of the system's
+parameters, and the precision. ``load_simulation`` builds a simulation from a
+snapshot without calculating anything. Arrays are memory-mapped rather than
+read, so a large baseline loads in the time it takes to map its files, and
+pages are only read from disk as they are used::
+
+    save_simulation(baseline, "snapshots/baseline-2024")
+    ...
+    baseline = load_simulation("snapshots/baseline-2024")
+    reformed = load_simulation("snapshots/baseline-2024", reform=reform)
+
+Loading with a reform, into a system whose parameters or precision differ,
+or after a formula or parameter file has changed, restores only the inputs:
+the snapshot's calculated arrays are for another model, so the simulation
+calculates its own. A snapshot
+saved by another version of the model or of policyengine-core is refused.
+"""
+
+import json
+from importlib.metadata import PackageNotFoundError, version
+from pathlib import Path
+from typing import Union
+
+import numpy as np
+from policyengine_core.entities import Role
+from policyengine_core.enums import Enum, EnumArray
+from policyengine_core.periods import period as period_
+
+from policyengine_ie.cache import model_hash, parameter_hash
+
+
+MANIFEST = "manifest.json"
+
+FORMAT_VERSION = 1
+
+
+def _core_version() -> str:
+    try:
+        return version("policyengine-core")
+    except PackageNotFoundError:
+        return "unknown"
+
+
+def _file_name(*parts: str) -> str:
+    return "__".join(str(part).replace(":", "_") for part in parts) + ".npy"
+
+
+def _plain(array) -> np.ndarray:
+    """An array ``np.save`` writes without pickling."""
+    array = np.asarray(array)
+    if array.dtype == object:
+        array = array.astype(str)
+    return array
+
+
+def _role_codes(population, entity: dict) -> np.ndarray:
+    """Members' roles as indices into the entity's roles, recorded in
+    ``entity``. Roles a dataset gave as plain values are kept as they are."""
+    members_role = population.members_role
+    roles = population.entity.flattened_roles
+    if len(members_role) and not isinstance(members_role[0], Role):
+        entity["roles"] = None
+        return _plain(members_role)
+    entity["roles"] = [role.key for role in roles]
+    codes = np.zeros(len(members_role), dtype=np.uint8)
+    for index, role in enumerate(roles):
+        codes[members_role == role] = index
+    return codes
+
+
+def save_simulation(simulation, path: Union[str, Path]) -> Path:
+    """
+    Write a simulation's entity structure, inputs and calculated arrays to a
+    directory.
+
+    Args:
+        simulation: Simulation to save.
+        path: Directory to write to. Created if needed; files of an earlier
+            snapshot there are overwritten.
+
+    Returns:
+        The directory.
+    """
+    from policyengine_ie import __version__
+
+    path = Path(path)
+    path.mkdir(parents=True, exist_ok=True)
+    system = simulation.tax_benefit_system
+
+    entities = {}
+    for key, population in simulation.populations.items():
+        entity = {"count": int(population.count), "ids": _file_name("entity", key)}
+        np.save(path / entity["ids"], _plain(population.ids))
+        if not population.entity.is_person:
+            structure = {
+                "members_entity_id": population.members_entity_id,
+                "members_role": _role_codes(population, entity),
+                "members_position": population.members_position,
+            }
+            for name, array in structure.items():
+                entity[name] = _file_name("entity", key, name)
+                np.save(path / entity[name], np.asarray(array))
+        entities[key] = entity
+
+    arrays = []
+    for name in sorted(system.variables):
+        holder = simulation.get_holder(name)
+        for known_period in holder.get_known_periods():
+            array = holder.get_array(known_period)
+            if array is None:
+                continue
+            file = _file_name(name, known_period)
+            np.save(path / file, _plain(array))
+            arrays.append(
+                {
+                    "variable": name,
+                    "period": str(known_period),
+                    "file": file,
+                    "derived": bool(holder.is_derived(known_period)),
+                }
+            )
+
+    manifest = {
+        "format": FORMAT_VERSION,
+        "model_version": __version__,
+        "core_version": _core_version(),
+        "model_hash": model_hash(),
+        "parameter_hash": parameter_hash(system),
+        "precision": getattr(system, "precision", None),
+        "entities": entities,
+        "arrays": arrays,
+    }
+    # The manifest is written last, so a snapshot is only readable once whole
+    temporary = path / (MANIFEST + ".tmp")
+    temporary.write_text(json.dumps(manifest, indent=2))
+    temporary.replace(path / MANIFEST)
+    return path
+
+
+def read_manifest(path: Union[str, Path]) -> dict:
+    """The manifest of a snapshot directory."""
+    file = Path(path) / MANIFEST
+    if not file.is_file():
+        raise ValueError(f"'{path}' is not a simulation snapshot.")
+    return json.loads(file.read_text())
+
+
+def _check_versions(manifest: dict) -> None:
+    from policyengine_ie import __version__
+
+    if manifest.get("format") != FORMAT_VERSION:
+        raise ValueError(
+            f"The snapshot has format {manifest.get('format')}; "
+            f"this version reads format {FORMAT_VERSION}."
+        )
+    saved = (manifest["model_version"], manifest["core_version"])
+    current = (__version__, _core_version())
+    if saved != current:
+        raise ValueError(
+            "The snapshot was saved with policyengine-ie {} and "
+            "policyengine-core {}, not the installed {} and {}.".format(
+                *saved, *current
+            )
+        )
+
+
+def load_simulation(
+    path: Union[str, Path],
+    reform=None,
+    tax_benefit_system=None,
+    mmap: bool = True,
+    **kwargs,
+):
+    """
+    Build a simulation from a snapshot.
+
+    Args:
+        path: Snapshot directory written by ``save_simulation``.
+        reform: Optional reform, as for ``Simulation``. Only the snapshot's
+            inputs are restored.
+        tax_benefit_system: Optional system to load into. Defaults to the
+            baseline, or the reformed system for ``reform``.
+        mmap: Whether to memory-map arrays read-only rather than read them
+            into memory.
+        **kwargs: Other arguments to ``Simulation``, such as
+            ``memory_budget``.
+
+    Returns:
+        The simulation, holding the snapshot's inputs, and its calculated
+        arrays if they are valid for the system.
+    """
+    from policyengine_ie.reforms import baseline_system, reformed_system
+    from policyengine_ie.system import Simulation
+
+    path = Path(path)
+    manifest = read_manifest(path)
+    _check_versions(manifest)
+    if tax_benefit_system is None:
+        tax_benefit_system = (
+            reformed_system(reform) if reform is not None else baseline_system()
+        )
+    mmap_mode = "r" if mmap else None
+
+    def load(file: str) -> np.ndarray:
+        return np.load(path / file, mmap_mode=mmap_mode)
+
+    populations = tax_benefit_system.instantiate_entities()
+    for key, entity in manifest["entities"].items():
+        population = populations[key]
+        population.ids = load(entity["ids"])
+        population.count = entity["count"]
+        if "members_entity_id" in entity:
+            population.members_entity_id = load(entity["members_entity_id"])
+            population.members_position = load(entity["members_position"])
+            members_role = load(entity["members_role"])
+            if entity["roles"] is not None:
+                roles = {role.key: role for role in population.entity.flattened_roles}
+                members_role = np.array(
+                    [roles[role] for role in entity["roles"]], dtype=object
+                )[members_role]
+            population.members_role = members_role
+
+    simulation = Simulation(
+        tax_benefit_system=tax_benefit_system, populations=populations, **kwargs
+    )
+
+    calculated_valid = (
+        manifest.get("model_hash") == model_hash()
+        and manifest["parameter_hash"] == parameter_hash(tax_benefit_system)
+        and manifest["precision"] == getattr(tax_benefit_system, "precision", None)
+    )
+    for entry in manifest["arrays"]:
+        variable = tax_benefit_system.variables.get(entry["variable"])
+        if variable is None or (entry["derived"] and not calculated_valid):
+            continue
+        array = load(entry["file"])
+        if variable.value_type is Enum:
+            array = EnumArray(array, variable.possible_values)
+        array_period = period_(entry["period"])
+        if entry["derived"]:
+            simulation.get_holder(variable.name).put_in_cache(
+                array, array_period, derived=True
+            )
+        else:
+            simulation.set_input(variable.name, array_period, array)
+    simulation.input_variables = sorted(
+        {entry["variable"] for entry in manifest["arrays"] if not entry["derived"]}
+        & set(tax_benefit_system.variables)
+    )
+    return simulation
@@ -0,0 +1,174 @@
+"""
+Building simulations from flat arrays.
+
+A situation dict is parsed one person and one group at a time, and a flat
+dataset goes through the same per-entity builder. For large populations
+``build_simulation`` instead takes one array per person for each group
+entity's ID and a role code, and builds every entity's membership, role
+and position arrays directly in whole-array NumPy and pandas::
+
+    simulation = build_simulation(
+        household_id=household_ids,
+        tax_unit_id=tax_unit_ids,
+        role=np.where(ages >= 18, ADULT, CHILD),
+        inputs={"age": ages, "employment_income": earnings},
+        period="2024",
+    )
+
+Groups are numbered in the order their first member appears. Role codes
+are ``ADULT`` and ``CHILD``: adults and children of tax and benefit units,
+parents and children of families, and members of households.
+"""
+
+from typing import Dict, Mapping, Union
+
+import numpy as np
+import pandas as pd
+
+
+ADULT = 0
+CHILD = 1
+
+
+def _group_ids(name: str, ids, count: int):
+    ids = np.asarray(ids)
+    if len(ids) != count:
+        raise ValueError(f"{name} has {len(ids)} values for {count} people.")
+    # Hash-based, so linear in the number of people
+    codes, unique_ids = pd.factorize(ids, sort=False)
+    return codes, np.asarray(unique_ids)
+
+
+def build_populations(
+    system,
+    household_id,
+    tax_unit_id=None,
+    benefit_unit_id=None,
+    family_id=None,
+    role: Union[np.ndarray, Mapping[str, np.ndarray]] = None,
+    person_id=None,
+):
+    """
+    Entity populations for people described by flat arrays.
+
+    Args:
+        system: Tax-benefit system whose entities to build.
+        household_id: Each person's household.
+        tax_unit_id: Each person's tax unit. Defaults to their household.
+        benefit_unit_id: Each person's benefit unit. Defaults to their
+            household.
+        family_id: Each person's family. Defaults to their household.
+        role: Each person's role code, ``ADULT`` or ``CHILD``, or a dict of
+            role codes by entity key. Defaults to ``ADULT``.
+        person_id: Person IDs. Defaults to ``0`` to ``n - 1``.
+
+    Returns:
+        Populations by entity key, to pass to ``Simulation`` as
+        ``populations``.
+    """
+    household_id = np.asarray(household_id)
+    count = len(household_id)
+    group_ids = {
+        "household": household_id,
+        "tax_unit": tax_unit_id,
+        "benefit_unit": benefit_unit_id,
+        "family": family_id,
+    }
+    if role is None:
+        role = np.full(count, ADULT, dtype=np.int8)
+    populations = system.instantiate_entities()
+
+    people = populations[system.person_entity.key]
+    people.ids = np.arange(count) if person_id is None else np.asarray(person_id)
+    if len(people.ids) != count:
+        raise ValueError(f"person_id has {len(people.ids)} values for {count} people.")
+    people.count = count
+
+    for entity in system.group_entities:
+        ids = group_ids.get(entity.key)
+        codes, unique_ids = _group_ids(
+            f"{entity.key}_id", household_id if ids is None else ids, count
+        )
+        population = populations[entity.key]
+        population.ids = unique_ids
+        population.count = len(unique_ids)
+        population.members_entity_id = codes
+        population.members_position = (
+            pd.Series(codes).groupby(codes, sort=False).cumcount().to_numpy()
+        )
+
+        entity_role = role.get(entity.key, ADULT) if isinstance(role, Mapping) else role
+        entity_role = np.broadcast_to(np.asarray(entity_role), (count,))
+        roles = np.array(entity.flattened_roles, dtype=object)
+        if count and (entity_role.min() < 0 or entity_role.max() > CHILD):
+            raise ValueError(f"Role codes for {entity.key} must be ADULT or CHILD.")
+        # Entities with one role, such as households, give it to everyone
+        population.members_role = roles[np.minimum(entity_role, len(roles) - 1)]
+
+    return populations
+
+
+def build_simulation(
+    household_id,
+    tax_unit_id=None,
+    benefit_unit_id=None,
+    family_id=None,
+    role: Union[np.ndarray, Mapping[str, np.ndarray]] = None,
+    person_id=None,
+    inputs: Dict[str, Union[np.ndarray, Dict[str, np.ndarray]]] = None,
+    period: str = None,
+    tax_benefit_system=None,
+    **kwargs,
+):
+    """
+    A simulation of people described by flat arrays.
+
+    Args:
+        household_id, tax_unit_id, benefit_unit_id, family_id, role,
+            person_id: As for ``build_populations``.
+        inputs: Input values by variable: an array over the variable's
+            entity for ``period``, or a dict of arrays by period.
+        period: Period of inputs given as arrays.
+        tax_benefit_system: System to simulate. Defaults to the baseline, or
+            the system with a ``reform`` keyword argument applied.
+        **kwargs: Other arguments to ``Simulation``, such as ``reform``.
+
+    Returns:
+        The simulation.
+    """
+    from policyengine_ie.reforms import (
+        ParametricReform,
+        baseline_system,
+        reformed_system,
+    )
+    from policyengine_ie.system import IrishTaxBenefitSystem, Simulation
+
+    if tax_benefit_system is None:
+        reform = kwargs.pop("reform", None)
+        if reform is None:
+            tax_benefit_system = baseline_system()
+        elif isinstance(reform, (dict, ParametricReform)):
+            tax_benefit_system = reformed_system(reform)
+        else:
+            tax_benefit_system = IrishTaxBenefitSystem(reform=reform)
+    populations = build_populations(
+        tax_benefit_system,
+        household_id,
+        tax_unit_id=tax_unit_id,
+        benefit_unit_id=benefit_unit_id,
+        family_id=family_id,
+        role=role,
+        person_id=person_id,
+    )
+    simulation = Simulation(
+        tax_benefit_system=tax_benefit_system, populations=populations, **kwargs
+    )
+    for variable, values in (inputs or {}).items():
+        if not isinstance(values, Mapping):
+            if period is None:
+                raise ValueError(f"Give a period for the values of '{variable}'.")
+            values = {period: values}
+        for value_period, array in values.items():
+            simulation.set_input(variable, value_period, np.asarray(array))
+    simulation.input_variables = list(inputs or {})
+    return simulation
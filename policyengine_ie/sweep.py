@@ -0,0 +1,154 @@
+"""
+Parameter sweeps.
+
+A sweep calculates outputs for each of K values of one parameter, for
+example the third USC rate from 3% to 5% in steps of 0.1 percentage points::
+
+    sweep = parameter_sweep(
+        simulation,
+        "gov.revenue.usc.rates.band_3",
+        np.arange(0.03, 0.0505, 0.001),
+        ["usc"],
+        "2025",
+    )
+    sweep.total_change("usc")  # Revenue at each rate, against the baseline
+
+Results have the parameter as a leading axis of length K against the
+population. Rather than K reformed simulations each calculating everything,
+a sweep calculates the outputs once in the simulation, then in one branch
+of it sets each value in turn and recalculates only the variables whose
+formulas read the parameter and those calculated from them (see
+``policyengine_ie.plan.parameter_readers`` and ``dependents``). Everything
+else is read from the baseline values the branch shares.
+"""
+
+from dataclasses import dataclass
+from typing import Dict, List, Sequence
+
+import numpy as np
+from policyengine_core.periods import period as period_
+
+from policyengine_ie.analysis import household_values
+from policyengine_ie.plan import dependents, parameter_readers
+from policyengine_ie.reforms import ParametricReform
+
+
+BRANCH_NAME = "parameter_sweep"
+
+
+@dataclass
+class ParameterSweep:
+    """
+    Outputs of a simulation for each value of a parameter.
+
+    Args:
+        parameter: Path of the parameter swept.
+        values: The K values, in order.
+        baseline: Each output's baseline values.
+        results: Each output's values for each parameter value, with shape
+            (K, number of entities).
+        baseline_totals: Each output's weighted total over households.
+        totals: Each output's weighted total for each parameter value.
+    """
+
+    parameter: str
+    values: np.ndarray
+    baseline: Dict[str, np.ndarray]
+    results: Dict[str, np.ndarray]
+    baseline_totals: Dict[str, float]
+    totals: Dict[str, np.ndarray]
+
+    def total_change(self, variable: str) -> np.ndarray:
+        """Change in a variable's weighted total at each parameter value."""
+        return self.totals[variable] - self.baseline_totals[variable]
+
+
+def affected_variables(system, parameter: str) -> List[str]:
+    """Variables whose values can change with a parameter."""
+    readers = parameter_readers(system, parameter)
+    return list(dict.fromkeys(readers + dependents(system, readers)))
+
+
+def _weighted_total(simulation, variable: str, period) -> float:
+    values = household_values(simulation, variable, period)
+    weights = simulation.calculate("household_weight", period)
+    return float(np.dot(values, weights))
+
+
+def parameter_sweep(
+    simulation,
+    parameter: str,
+    values: Sequence[float],
+    variables: Sequence[str],
+    period=None,
+) -> ParameterSweep:
+    """
+    Calculate variables for each of several values of a parameter.
+
+    Args:
+        simulation: Baseline simulation. Its own values are not changed.
+        parameter: Path of the parameter, e.g.
+            ``"gov.dsp.jobseekers.rates.age_25_plus"``. A formula must
+            read it.
+        values: Values to give the parameter from the start of ``period``.
+        variables: Variables to calculate.
+        period: Period to calculate. Defaults to the simulation's default.
+
+    Returns:
+        The baseline and swept values and weighted totals of each variable.
+    """
+    if period is None:
+        period = simulation.default_calculation_period
+    period = period_(period)
+    values = np.asarray(values, dtype=float)
+    variables = list(variables)
+    system = simulation.tax_benefit_system
+    # Validates the parameter path before anything is calculated
+    ParametricReform({parameter: {str(period.start): 0}}, system=system)
+
+    baseline = {name: simulation.calculate(name, period) for name in variables}
+    baseline_totals = {
+        name: _weighted_total(simulation, name, period) for name in variables
+    }
+    affected = affected_variables(system, parameter)
+    if not affected:
+        raise ValueError(
+            f"No formula reads '{parameter}', so sweeping it changes nothing."
+        )
+
+    branch = simulation.get_branch(BRANCH_NAME, clone_system=True)
+    # The branch's results are for other parameters and take no part in
+    # the simulation's cache or memory budget
+    branch.result_cache = None
+    branch.memory_budget = None
+    branch_system = branch.tax_benefit_system
+    branch_system.reform_hash = None
+    results = {name: [] for name in variables}
+    totals = {name: [] for name in variables}
+    try:
+        for value in values:
+            ParametricReform(
+                {parameter: {str(period.start): float(value)}}, system=branch_system
+            ).apply(branch_system)
+            for name in affected:
+                holder = branch.get_holder(name)
+                for known_period in holder.get_known_periods():
+                    # Values the branch shares are stored under "default",
+                    # and those it calculates under its own name
+                    for branch_name in ("default", BRANCH_NAME):
+                        if holder.is_derived(known_period, branch_name):
+                            holder.delete_arrays(known_period, branch_name)
+            for name in variables:
+                results[name].append(np.asarray(branch.calculate(name, period)))
+                totals[name].append(_weighted_total(branch, name, period))
+    finally:
+        simulation.branches.pop(BRANCH_NAME, None)
+
+    return ParameterSweep(
+        parameter=parameter,
+        values=values,
+        baseline=baseline,
+        results={name: np.stack(arrays) for name, arrays in results.items()},
+        baseline_totals=baseline_totals,
+        totals={name: np.array(total) for name, total in totals.items()},
+    )
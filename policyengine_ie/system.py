@@ -6,9 +6,26 @@ parameters and variables for Ireland's social and fiscal policies.
 """
 
 from policyengine_core.taxbenefitsystems import TaxBenefitSystem
+from policyengine_core.simulations import Simulation as CoreSimulation
+from policyengine_core.periods import ETERNITY, period as period_
 from policyengine_ie.entities import entities
+from policyengine_ie.memory import MemoryBudget
+from policyengine_ie.metrics import MetricsRecorder
+from policyengine_ie import vectorization
+from policyengine_ie.uprating import uprate_parameters
+from policyengine_ie.precision import SINGLE, apply_precision, system_with_precision
+from policyengine_ie.cache import (
+    ResultCache,
+    file_hash,
+    model_hash,
+    result_key,
+    situation_hash,
+)
 from pathlib import Path
+from typing import Dict, List, Union
+import numpy as np
 import os
+import time
 
 
 COUNTRY_DIR = Path(__file__).parent
@@ -71,12 +88,293 @@ class IrishTaxBenefitSystem(TaxBenefitSystem):
         Initialize the Irish tax-benefit system.
 
         Args:
-            reform: Optional reform to apply to the baseline system
+            reform: Optional reform to apply to the baseline system. A dict
+                of parameter changes or a ``ParametricReform`` updates this
+                system's parameters in place.
         """
+        start = time.perf_counter()
         super().__init__(entities)
 
+        # Float variables are single precision, except those opting out
+        apply_precision(self, SINGLE)
+
+        # Hash of the parametric reform applied, "" for the baseline and
+        # None if the system was changed in a way that cannot be hashed
+        self.reform_hash = ""
+
         # Apply reform if provided
         if reform is not None:
-            self.apply_reform(reform)
+            from policyengine_ie.reforms import ParametricReform
+
+            if isinstance(reform, dict):
+                reform = ParametricReform(reform, system=self)
+            if isinstance(reform, ParametricReform):
+                reform.apply(self)
+                self.reform_hash = reform.hash
+            else:
+                self.apply_reform(reform)
+                self.reform_hash = None
+
+        # Reported in simulation metrics (see ``policyengine_ie.metrics``)
+        self.build_seconds = time.perf_counter() - start
+
+    def get_parameters_at_instant(self, instant):
+        # Parameters past their last legislated value are uprated on first
+        # use (see ``policyengine_ie.uprating``)
+        uprate_parameters(self, period_(instant).start.year)
+        return super().get_parameters_at_instant(instant)
 
     # Entity properties are handled by parent class
+
+
+class Simulation(CoreSimulation):
+    """
+    A simulation of the Irish tax and benefit system.
+
+    Takes the same arguments as ``policyengine_core.simulations.Simulation``,
+    and additionally:
+
+    Args:
+        reform: A dict of parameter changes or a ``ParametricReform`` is run
+            on a cached reformed system (see ``policyengine_ie.reforms``).
+            Other reforms are passed to policyengine-core unchanged.
+        result_cache: Optional ``ResultCache``. Variables requested directly
+            (not those calculated along the way) are looked up in it before
+            being calculated, and stored in it afterwards.
+        precision: ``"single"`` (float32, the default) or ``"double"``
+            (float64) for float variables. See ``policyengine_ie.precision``.
+        memory_budget: Optional ``MemoryBudget``, or a number of bytes, to
+            limit the calculated arrays held in memory. See
+            ``policyengine_ie.memory``.
+        metrics: Optional sink, function or list of either, to send timing
+            and memory metrics of building the simulation and of each
+            calculation to. See ``policyengine_ie.metrics``.
+    """
+
+    default_tax_benefit_system = IrishTaxBenefitSystem
+
+    def __init__(
+        self,
+        *args,
+        reform=None,
+        result_cache: ResultCache = None,
+        precision: str = None,
+        memory_budget: Union[MemoryBudget, int] = None,
+        metrics=None,
+        **kwargs,
+    ):
+        from policyengine_ie.reforms import (
+            ParametricReform,
+            baseline_system,
+            reformed_system,
+        )
+
+        has_system = bool(args) or kwargs.get("tax_benefit_system") is not None
+        if isinstance(reform, (dict, ParametricReform)) and not has_system:
+            kwargs["tax_benefit_system"] = reformed_system(reform)
+            reform = None
+        elif reform is None and not has_system:
+            kwargs["tax_benefit_system"] = baseline_system()
+        if precision is not None:
+            if args:
+                args = (system_with_precision(args[0], precision),) + args[1:]
+            else:
+                kwargs["tax_benefit_system"] = system_with_precision(
+                    kwargs.get("tax_benefit_system") or baseline_system(), precision
+                )
+
+        self.result_cache = result_cache
+        if memory_budget is not None and not isinstance(memory_budget, MemoryBudget):
+            memory_budget = MemoryBudget(memory_budget)
+        self.memory_budget = memory_budget
+        self._input_hash = None
+        self._inputs_changed = False
+        self._metrics = None
+        start = time.perf_counter()
+        super().__init__(*args, reform=reform, **kwargs)
+        self._inputs_ready = True
+        if metrics is not None:
+            self._metrics = MetricsRecorder(metrics)
+            self._metrics.simulation_built(self, time.perf_counter() - start)
+
+    def _result_cache_key(self, variable_name: str, period) -> str:
+        """The cache key for a variable, or None if results cannot be cached."""
+        if self._inputs_changed or self.reform is not None:
+            return None
+        reform_hash = self.tax_benefit_system.__dict__.get("reform_hash")
+        if reform_hash is None:
+            return None
+        if self._input_hash is None:
+            if self.situation_input is not None:
+                self._input_hash = situation_hash(self.situation_input)
+            elif os.path.isfile(getattr(self.dataset, "file_path", None) or ""):
+                self._input_hash = file_hash(self.dataset.file_path)
+            else:
+                return None
+        return result_key(
+            model_hash(),
+            reform_hash,
+            self._input_hash,
+            variable_name,
+            str(period),
+        )
+
+    def calculate(
+        self,
+        variable_name: str,
+        period=None,
+        map_to: str = None,
+        decode_enums: bool = False,
+    ):
+        if period is None:
+            period = self.default_calculation_period
+        if period is not None:
+            period = period_(period)
+            if period.unit != ETERNITY:
+                # Formulas read parameters from the tree, not through
+                # ``get_parameters_at_instant``, so extend it here
+                uprate_parameters(self.tax_benefit_system, period.stop.year)
+        recorder = self.__dict__.get("_metrics")
+        if recorder is None:
+            result = self._calculate_within_budget(
+                variable_name, period, map_to, decode_enums
+            )
+        else:
+            with recorder.timing(self, variable_name, period):
+                result = self._calculate_within_budget(
+                    variable_name, period, map_to, decode_enums
+                )
+        if self._calculations_in_flight and vectorization.is_strict():
+            # Read by a formula being calculated
+            return vectorization.strict_input(result)
+        return result
+
+    def _calculate(self, variable_name: str, period=None):
+        budget = self.__dict__.get("memory_budget")
+        if budget is not None:
+            # Whatever period a formula reads a spilled array for
+            budget.before_calculate(self, variable_name, period)
+        return super()._calculate(variable_name, period)
+
+    def _run_formula(self, variable, population, period):
+        values = super()._run_formula(variable, population, period)
+        if vectorization.is_strict():
+            return vectorization.check_result(variable, population, values)
+        return values
+
+    def _calculate_within_budget(
+        self,
+        variable_name: str,
+        period=None,
+        map_to: str = None,
+        decode_enums: bool = False,
+    ):
+        budget = self.__dict__.get("memory_budget")
+        if budget is None:
+            return self._calculate_cached(variable_name, period, map_to, decode_enums)
+        outermost = not self._calculations_in_flight
+        result = self._calculate_cached(variable_name, period, map_to, decode_enums)
+        budget.touch(variable_name, period)
+        if outermost:
+            budget.enforce(self)
+        return result
+
+    def _calculate_cached(
+        self,
+        variable_name: str,
+        period=None,
+        map_to: str = None,
+        decode_enums: bool = False,
+    ):
+        if (
+            self.result_cache is None
+            or map_to is not None
+            or decode_enums
+            or self._calculations_in_flight
+        ):
+            return super().calculate(variable_name, period, map_to, decode_enums)
+        if period is None:
+            period = self.default_calculation_period
+        if period is None:
+            return super().calculate(variable_name, period)
+        key = self._result_cache_key(variable_name, period_(period))
+        if key is None:
+            return super().calculate(variable_name, period)
+        result = self.result_cache.get(key)
+        if result is None:
+            result = super().calculate(variable_name, period)
+            self.result_cache.put(key, result)
+            return result
+        # Cached arrays are read-only and may be memory-mapped, so store a
+        # copy as if calculated and return it as a calculation would
+        self.get_holder(variable_name).put_in_cache(
+            np.array(result), period_(period), derived=True
+        )
+        return super().calculate(variable_name, period)
+
+    def _aggregate_depth(self, variable_name: str) -> int:
+        """How many levels of ``adds``/``subtracts`` a variable sits above inputs."""
+        variable = self.tax_benefit_system.get_variable(variable_name)
+        components = [
+            name
+            for names in (variable.adds, variable.subtracts)
+            if isinstance(names, list)
+            for name in names
+        ]
+        if not components:
+            return 0
+        return 1 + max(self._aggregate_depth(name) for name in components)
+
+    def calculate_many(
+        self, variables: List[str], period=None, map_to: str = None
+    ) -> Dict[str, object]:
+        """
+        Calculate several variables for one period in a single sweep.
+
+        Aggregates are calculated first, so the tax-and-transfer chain below
+        an aggregate such as ``household_net_income`` runs once, and the
+        components requested alongside it are then read from the
+        simulation's own storage rather than calculated (or looked up in the
+        result cache) again.
+
+        Args:
+            variables: Variables to calculate.
+            period: Period to calculate them for.
+            map_to: Optional entity to map every result to.
+
+        Returns:
+            A dict from each variable to its values.
+        """
+        if period is None:
+            period = self.default_calculation_period
+        period = period_(period)
+        order = sorted(
+            dict.fromkeys(variables), key=self._aggregate_depth, reverse=True
+        )
+        results = {}
+        for name in order:
+            values = None
+            if self.tax_benefit_system.get_variable(name).definition_period == (
+                period.unit
+            ):
+                values = self.get_holder(name).get_array(period)
+            if values is None:
+                values = self.calculate(name, period)
+            if map_to is not None:
+                entity = self.tax_benefit_system.get_variable(name).entity
+                values = self.map_result(values, entity.key, map_to)
+            results[name] = values
+        return {name: results[name] for name in variables}
+
+    def drop_computed_arrays(self, *args, **kwargs):
+        budget = self.__dict__.get("memory_budget")
+        if budget is not None:
+            budget.clear()
+        return super().drop_computed_arrays(*args, **kwargs)
+
+    def set_input(self, variable_name: str, period, value) -> None:
+        # Inputs set after construction are not part of the situation or
+        # dataset the cache key was built from
+        if self.__dict__.get("_inputs_ready"):
+            self._inputs_changed = True
+        super().set_input(variable_name, period, value)
@@ -0,0 +1,93 @@
+"""Test weighted distributional analysis."""
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.analysis import (
+    WeightedDistribution,
+    distribution_summary,
+    gini,
+    poverty_rate,
+    reform_impact,
+    weighted_quantiles,
+    winners_and_losers,
+)
+
+
+def _situation(incomes):
+    people = {}
+    households = {}
+    for index, (adult_income, children) in enumerate(incomes):
+        members = [f"adult_{index}"]
+        people[f"adult_{index}"] = {
+            "age": {"2024": 40},
+            "employment_income": {"2024": adult_income},
+        }
+        for child in range(children):
+            people[f"child_{index}_{child}"] = {"age": {"2024": 5}}
+            members.append(f"child_{index}_{child}")
+        households[f"household_{index}"] = {"members": members}
+    return {"people": people, "households": households}
+
+
+class TestAnalysis:
+    """Test cases for the weighted statistics and simulation summaries."""
+
+    def test_quantiles_match_repeated_records(self):
+        """Test that integer weights act like repeating records."""
+        generator = np.random.default_rng(1)
+        values = generator.normal(size=200)
+        weights = generator.integers(1, 5, size=200)
+        repeated = np.repeat(values, weights)
+        quantiles = [0.1, 0.5, 0.9]
+        expected = np.quantile(repeated, quantiles, method="inverted_cdf")
+        assert weighted_quantiles(values, weights, quantiles) == pytest.approx(expected)
+
+    def test_gini(self):
+        """Test the Gini coefficient of equal and concentrated incomes."""
+        assert gini([5, 5, 5], [1, 2, 3]) == pytest.approx(0)
+        # One of n people has everything: (n - 1) / n
+        assert gini([0, 0, 0, 100], [1, 1, 1, 1]) == pytest.approx(0.75)
+
+    def test_poverty_rate_uses_median_line(self):
+        """Test that the default line is 60% of the weighted median."""
+        values = [1_000, 5_000, 10_000, 11_000, 12_000]
+        assert poverty_rate(values, np.ones(5)) == pytest.approx(0.4)
+
+    def test_deciles_have_equal_weight(self):
+        """Test that decile groups split the weight evenly."""
+        distribution = WeightedDistribution(np.arange(1_000), np.ones(1_000))
+        groups = distribution.groups(10)
+        assert np.all(np.bincount(groups) == 100)
+        assert groups[0] == 0 and groups[-1] == 9
+
+    def test_winners_and_losers_by_group(self):
+        """Test shares gaining and losing within each group."""
+        shares = winners_and_losers(
+            [10, -10, 0, 10], [1, 1, 1, 3], np.array([0, 0, 1, 1]), 2
+        )
+        assert shares["gain"] == pytest.approx([0.5, 0.75])
+        assert shares["lose"] == pytest.approx([0.5, 0])
+        assert shares["no_change"] == pytest.approx([0, 0.25])
+
+    def test_reform_impact(self):
+        """Test the impact of raising everyone's income by the same amount."""
+        incomes = [(20_000, 2), (40_000, 0), (80_000, 1)]
+        baseline = Simulation(situation=_situation(incomes))
+        reformed = Simulation(
+            situation=_situation([(income + 1_000, n) for income, n in incomes])
+        )
+        summary = distribution_summary(baseline, "employment_income", 2024)
+        # Half of the six people live in the first household
+        assert summary["median"] == pytest.approx(20_000 / 1.66)
+        impact = reform_impact(
+            baseline,
+            reformed,
+            "employment_income",
+            2024,
+            quantile_groups=3,
+        )
+        assert impact["winners_and_losers"]["gain"] == pytest.approx(1)
+        assert impact["gini"]["reform"] < impact["gini"]["baseline"]
+        by_type = impact["by_group"]["household_type"]
+        assert by_type["mean_change"][1] == pytest.approx(1_000)
@@ -0,0 +1,132 @@
+"""Test the flat-file batch runner."""
+
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from policyengine_ie.__main__ import main
+from policyengine_ie.batch import read_chunks, run
+
+
+PEOPLE = pd.DataFrame(
+    {
+        "person_id": [1, 2, 3, 4, 5],
+        "person_household_id": [10, 10, 10, 20, 30],
+        "age": [40, 38, 8, 35, 45],
+        "employment_income": [50_000, 0, 0, 50_000, 100_000],
+    }
+)
+
+
+class TestBatchRunner:
+    """Test cases for chunked reading and calculation of flat files."""
+
+    def test_chunks_keep_households_whole(self, tmp_path):
+        """Test that no household is split across chunks."""
+        path = tmp_path / "people.csv"
+        PEOPLE.to_csv(path, index=False)
+        chunks = list(read_chunks(path, chunk_size=2))
+
+        assert sum(len(chunk) for chunk in chunks) == len(PEOPLE)
+        for chunk in chunks:
+            others = pd.concat([c for c in chunks if c is not chunk])
+            shared = set(chunk.person_household_id) & set(others.person_household_id)
+            assert not shared
+
+    def test_results_do_not_depend_on_chunk_size(self, tmp_path):
+        """Test results against known values for any chunk size."""
+        input_path = tmp_path / "people.csv"
+        PEOPLE.to_csv(input_path, index=False)
+        outputs = []
+        for chunk_size in (2, 100):
+            output_path = tmp_path / f"out_{chunk_size}.csv"
+            people = run(
+                input_path,
+                output_path,
+                ["usc", "child_benefit", "is_married"],
+                "2024",
+                chunk_size=chunk_size,
+            )
+            assert people == len(PEOPLE)
+            outputs.append(pd.read_csv(output_path))
+
+        pd.testing.assert_frame_equal(outputs[0], outputs[1])
+        output = outputs[0]
+        assert list(output.person_id) == [1, 2, 3, 4, 5]
+        np.testing.assert_allclose(
+            output.usc, [1_304.62, 0, 0, 1_304.62, 4_502.86], atol=0.01
+        )
+        np.testing.assert_allclose(output.child_benefit, [0, 0, 2_208, 0, 0])
+        # Tax unit variables are repeated for each member
+        assert list(output.is_married) == [True, True, True, False, False]
+
+    def test_default_ids_are_unique_across_chunks(self, tmp_path):
+        """Test that people without IDs are numbered on from earlier chunks."""
+        input_path = tmp_path / "people.csv"
+        output_path = tmp_path / "out.csv"
+        PEOPLE[["age", "employment_income"]].head(3).to_csv(input_path, index=False)
+        run(input_path, output_path, ["usc"], "2024", chunk_size=2)
+
+        output = pd.read_csv(output_path)
+        assert list(output.person_id) == [0, 1, 2]
+        assert list(output.person_household_id) == [0, 1, 2]
+
+    def test_command_line_with_reform(self, tmp_path):
+        """Test `python -m policyengine_ie run` with a reform file."""
+        input_path = tmp_path / "people.csv"
+        output_path = tmp_path / "out.csv"
+        reform_path = tmp_path / "reform.json"
+        PEOPLE.to_csv(input_path, index=False)
+        reform_path.write_text(
+            json.dumps({"gov.revenue.usc.rates.band_3": {"2024-01-01": 0.035}})
+        )
+        main(
+            [
+                "run",
+                "--input",
+                str(input_path),
+                "--output",
+                str(output_path),
+                "--variables",
+                "usc,income_tax_net",
+                "--period",
+                "2024",
+                "--reform",
+                str(reform_path),
+            ]
+        )
+        output = pd.read_csv(output_path)
+
+        assert abs(output.usc[0] - (1_304.62 - 121.2)) < 0.01
+        # Person 4 is single; person 1 is taxed as married
+        assert abs(output.income_tax_net[3] - 7_850) < 0.01
+        assert abs(output.income_tax_net[0] - 4_375) < 0.01
+
+    def test_parquet(self, tmp_path):
+        """Test Parquet input and output."""
+        pytest.importorskip("pyarrow")
+        input_path = tmp_path / "people.parquet"
+        output_path = tmp_path / "out.parquet"
+        PEOPLE.to_parquet(input_path, index=False)
+        run(input_path, output_path, ["usc"], "2024", chunk_size=2)
+        output = pd.read_parquet(output_path)
+
+        np.testing.assert_allclose(
+            output.usc, [1_304.62, 0, 0, 1_304.62, 4_502.86], atol=0.01
+        )
+
+    def test_unused_columns_are_not_read(self, tmp_path):
+        """Test that only columns the requested variables need are read."""
+        input_path = tmp_path / "people.csv"
+        output_path = tmp_path / "out.csv"
+        # A column of invalid values would fail if it were read
+        PEOPLE.assign(assessable_income_jobseekers="not a number").to_csv(
+            input_path, index=False
+        )
+        run(input_path, output_path, ["usc"], "2024")
+        output = pd.read_csv(output_path)
+        np.testing.assert_allclose(
+            output.usc, [1_304.62, 0, 0, 1_304.62, 4_502.86], atol=0.01
+        )
@@ -0,0 +1,60 @@
+"""Test exact budget constraint extraction."""
+
+import numpy as np
+import pytest
+from policyengine_ie import budget_constraint as module
+from policyengine_ie.budget_constraint import budget_constraint
+from policyengine_ie.gross_net import net_for_gross
+
+
+class TestBudgetConstraint:
+    """Test cases for the piecewise-linear budget constraint."""
+
+    def test_breakpoints_of_single_earner(self):
+        """Test the breakpoints and marginal rates of a single employee."""
+        constraint = budget_constraint()
+        assert constraint.breakpoints == pytest.approx(
+            [
+                13_000,  # USC exemption threshold
+                18_304,  # PRSI threshold, €352 a week
+                18_750,  # Income tax exceeds €3,750 of credits
+                22_048,  # End of the PRSI credit taper, €424 a week
+                25_760,  # USC band 2
+                42_000,  # Standard rate band
+                70_044,  # USC band 3
+            ]
+        )
+        # 40% income tax, 8% USC and 4% PRSI
+        assert constraint.marginal_tax_rate(100_000) == pytest.approx(0.52, abs=1e-4)
+
+    def test_matches_model(self):
+        """Test that the segments reproduce the model's net income."""
+        situation = {
+            "people": {
+                "parent": {
+                    "age": {"2024": 35},
+                    "self_employment_income": {"2024": 5_000},
+                },
+                "child": {"age": {"2024": 4}},
+            },
+            "tax_units": {"tax_unit": {"adults": ["parent"], "children": ["child"]}},
+        }
+        constraint = budget_constraint(situation)
+        gross = np.linspace(0, 250_000, 5_001)
+        expected = net_for_gross(gross, situation=situation)
+        # Net income is calculated in float32
+        assert constraint.net(gross) == pytest.approx(expected, abs=0.05)
+
+    def test_finds_kinks_without_candidates(self, monkeypatch):
+        """Test that kinks missing from the candidates are found by splitting."""
+        expected = budget_constraint().breakpoints
+        monkeypatch.setattr(module, "_candidate_breakpoints", lambda *args: [])
+        found = budget_constraint().breakpoints
+        assert found == pytest.approx(expected, abs=1)
+
+    def test_follows_reform(self):
+        """Test that reformed band limits move the breakpoints."""
+        reform = {"gov.revenue.usc.thresholds.band_2_upper": {"2024-01-01": 30_000}}
+        breakpoints = budget_constraint(reform=reform).breakpoints
+        assert 30_000 in breakpoints
+        assert 25_760 not in breakpoints
@@ -0,0 +1,68 @@
+"""Test the scratch array pool used by formulas."""
+
+import threading
+
+import numpy as np
+from policyengine_ie import Simulation
+from policyengine_ie.buffers import BufferPool, scratch
+
+
+class TestBufferPool:
+    """Test cases for borrowing and reusing scratch arrays."""
+
+    def test_arrays_are_reused(self):
+        """Test that returned arrays are lent out again."""
+        pool = BufferPool()
+        like = np.zeros(100, dtype=np.float32)
+        with pool.borrow(like, 2) as (first, second):
+            assert first is not second
+            assert first.shape == like.shape and first.dtype == np.float32
+        with pool.borrow(like, 2) as (third, fourth):
+            assert {id(third), id(fourth)} == {id(first), id(second)}
+        assert pool.allocations == 2
+        assert pool.free_bytes == 2 * like.nbytes
+
+    def test_shape_and_dtype_are_kept_apart(self):
+        """Test that arrays are only reused for the same shape and dtype."""
+        pool = BufferPool()
+        with pool.borrow(np.zeros(10)):
+            pass
+        with pool.borrow(np.zeros(10), dtype=np.float32):
+            pass
+        with pool.borrow(np.zeros(11)):
+            pass
+        assert pool.allocations == 3
+
+    def test_max_bytes(self):
+        """Test that the pool keeps no more than its limit."""
+        pool = BufferPool(max_bytes=100)
+        pool.give(np.zeros(10), np.zeros(10))
+        assert pool.free_bytes == 80
+        pool.clear()
+        assert pool.free_bytes == 0
+
+    def test_threads_have_their_own_arrays(self):
+        """Test that an array given back in one thread stays in it."""
+        pool = BufferPool()
+        pool.give(np.zeros(10))
+        free_bytes = []
+        thread = threading.Thread(target=lambda: free_bytes.append(pool.free_bytes))
+        thread.start()
+        thread.join()
+        assert free_bytes == [0]
+        assert pool.free_bytes == 80
+
+    def test_formulas_reuse_scratch_arrays(self):
+        """Test that repeated runs of the revenue formulas allocate nothing new."""
+        situation = {
+            "people": {
+                "you": {"age": {"2024": 35}, "employment_income": {"2024": 40_000}}
+            }
+        }
+        variables = ["usc", "employee_prsi", "employer_prsi", "income_tax"]
+        for variable in variables:
+            Simulation(situation=situation).calculate(variable, "2024")
+        allocations = scratch.allocations
+        for variable in variables:
+            Simulation(situation=situation).calculate(variable, "2024")
+        assert scratch.allocations == allocations
@@ -0,0 +1,162 @@
+"""Test the content-addressed result cache."""
+
+import numpy as np
+from policyengine_ie import Simulation
+from policyengine_ie.cache import (
+    DiskResultCache,
+    MemoryResultCache,
+    model_hash,
+    result_key,
+    situation_hash,
+)
+
+
+SITUATION = {
+    "people": {
+        "person_1": {
+            "age": {"2024": 35},
+            "employment_income": {"2024": 50_000},
+        },
+    },
+    "tax_units": {"tax_unit_1": {"adults": ["person_1"]}},
+    "households": {"household_1": {"members": ["person_1"]}},
+}
+
+
+class TestResultCache:
+    """Test cases for the cache backends and their use by Simulation."""
+
+    def test_keys_depend_on_every_field(self):
+        """Test that changing any key field changes the key."""
+        fields = ["0.1.0", "", "abc", "usc", "2024"]
+        key = result_key(*fields)
+        for i in range(len(fields)):
+            changed = list(fields)
+            changed[i] = changed[i] + "x"
+            assert result_key(*changed) != key
+
+    def test_situation_hash_ignores_key_order(self):
+        """Test that equivalent situations hash the same."""
+        reordered = dict(reversed(list(SITUATION.items())))
+        assert situation_hash(reordered) == situation_hash(SITUATION)
+
+    def test_memory_cache_evicts_least_recently_used(self):
+        """Test size-bounded LRU eviction and statistics."""
+        cache = MemoryResultCache(max_bytes=2 * 8 * 10)
+        cache.put("a", np.zeros(10))
+        cache.put("b", np.ones(10))
+        assert cache.get("a") is not None  # "b" is now least recently used
+        cache.put("c", np.full(10, 2.0))
+
+        assert "b" not in cache
+        assert "a" in cache and "c" in cache
+        assert cache.get("b") is None
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+        assert cache.stats.evictions == 1
+        assert cache.total_bytes == 2 * 8 * 10
+
+    def test_stored_arrays_are_read_only_copies(self):
+        """Test that callers cannot change stored results."""
+        cache = MemoryResultCache()
+        array = np.arange(3.0)
+        cache.put("a", array)
+        array[0] = 10
+
+        stored = cache.get("a")
+        assert stored[0] == 0
+        assert not stored.flags.writeable
+
+    def test_disk_cache_persists(self, tmp_path):
+        """Test that a new disk cache finds arrays written by an earlier one."""
+        cache = DiskResultCache(tmp_path, max_bytes=1 << 20)
+        cache.put("a", np.arange(5.0))
+
+        reopened = DiskResultCache(tmp_path, max_bytes=1 << 20)
+        assert np.array_equal(reopened.get("a"), np.arange(5.0))
+
+        reopened.clear()
+        assert len(reopened) == 0
+        assert not list(tmp_path.glob("*.npy"))
+
+    def test_disk_cache_sees_arrays_stored_later(self, tmp_path):
+        """Test that an open disk cache finds arrays another one stores."""
+        reader = DiskResultCache(tmp_path, max_bytes=1 << 20)
+        writer = DiskResultCache(tmp_path, max_bytes=1 << 20)
+        writer.put("a", np.arange(5.0))
+
+        assert np.array_equal(reader.get("a"), np.arange(5.0))
+        assert reader.stats.hits == 1
+        assert reader.total_bytes == (tmp_path / "a.npy").stat().st_size
+
+    def test_disk_cache_evicts_files(self, tmp_path):
+        """Test that evicted arrays are removed from the directory."""
+        cache = DiskResultCache(tmp_path, max_bytes=8 * 10)
+        cache.put("a", np.zeros(10))
+        cache.put("b", np.zeros(10))
+
+        assert not (tmp_path / "a.npy").exists()
+        assert (tmp_path / "b.npy").exists()
+
+    def test_simulations_share_cached_results(self):
+        """Test that an identical simulation reads results from the cache."""
+        cache = MemoryResultCache()
+        first = Simulation(situation=SITUATION, result_cache=cache)
+        usc = first.calculate("usc", "2024")
+
+        second = Simulation(situation=SITUATION, result_cache=cache)
+        assert np.array_equal(second.calculate("usc", "2024"), usc)
+        assert cache.stats.hits == 1
+        assert cache.stats.misses == 1
+
+    def test_cache_hits_are_writable(self, tmp_path):
+        """Test that a result read from the cache can be changed like a
+        calculated one, without changing the cache."""
+        cache = DiskResultCache(tmp_path)
+        Simulation(situation=SITUATION, result_cache=cache).calculate("usc", "2024")
+
+        simulation = Simulation(situation=SITUATION, result_cache=cache)
+        usc = simulation.calculate("usc", "2024")
+        assert cache.stats.hits == 1
+        usc[usc > 0] = 0
+        assert simulation.get_holder("usc").get_array("2024") is not None
+        again = Simulation(situation=SITUATION, result_cache=cache)
+        assert again.calculate("usc", "2024")[0] > 0
+
+    def test_keys_depend_on_the_model_files(self, tmp_path, monkeypatch):
+        """Test that editing a formula or parameter file changes the model
+        hash, even without a new version number."""
+        model_hash.cache_clear()
+        before = model_hash()
+        package = tmp_path / "policyengine_ie"
+        package.mkdir()
+        (package / "cache.py").write_text("")
+        (package / "rates.yaml").write_text("rate: 0.2")
+        monkeypatch.setattr("policyengine_ie.cache.__file__", str(package / "cache.py"))
+        model_hash.cache_clear()
+        edited = model_hash()
+        (package / "rates.yaml").write_text("rate: 0.3")
+        model_hash.cache_clear()
+        assert model_hash() != edited
+        assert edited != before
+        monkeypatch.undo()
+        model_hash.cache_clear()
+        assert model_hash() == before
+
+    def test_reform_and_inputs_change_the_key(self):
+        """Test that reformed or modified simulations miss the cache."""
+        cache = MemoryResultCache()
+        Simulation(situation=SITUATION, result_cache=cache).calculate("usc", "2024")
+
+        reformed = Simulation(
+            situation=SITUATION,
+            reform={"gov.revenue.usc.rates.band_3": {"2024": 0.03}},
+            result_cache=cache,
+        )
+        assert reformed.calculate("usc", "2024")[0] < 1_304
+        assert cache.stats.hits == 0
+
+        modified = Simulation(situation=SITUATION, result_cache=cache)
+        modified.set_input("employment_income", "2024", np.array([60_000.0]))
+        assert modified.calculate("usc", "2024")[0] > 1_304.62
+        assert cache.stats.hits == 0
@@ -0,0 +1,99 @@
+"""Test calibration of household weights to administrative totals."""
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.calibration import (
+    LossMatrix,
+    Target,
+    build_loss_matrix,
+    calibrate,
+    calibrate_simulation,
+)
+
+
+def _synthetic_matrix(households=2_000, seed=0):
+    """Targets met exactly by known weights, starting from uniform ones."""
+    generator = np.random.default_rng(seed)
+    income = generator.lognormal(10, 0.5, households)
+    is_young = generator.random(households) < 0.4
+    true_weights = generator.uniform(50, 150, households)
+    contributions = np.stack([income, is_young, ~is_young], axis=1).astype(float)
+    rows, columns = np.nonzero(contributions)
+    targets = true_weights @ contributions
+    matrix = LossMatrix(
+        rows,
+        columns,
+        contributions[rows, columns],
+        targets,
+        households,
+        ["income", "young", "old"],
+    )
+    return matrix, np.full(households, 100.0)
+
+
+SITUATION = {
+    "people": {
+        "worker": {"age": {"2024": 30}, "employment_income": {"2024": 40_000}},
+        "retiree": {"age": {"2024": 70}, "employment_income": {"2024": 0}},
+    },
+    "households": {
+        "house_1": {"members": ["worker"]},
+        "house_2": {"members": ["retiree"]},
+    },
+}
+
+
+class TestCalibration:
+    """Test cases for the loss matrix and both calibration methods."""
+
+    @pytest.mark.parametrize("method", ["gradient", "raking"])
+    def test_meets_consistent_targets(self, method):
+        """Test that both methods bring every target within tolerance."""
+        matrix, weights = _synthetic_matrix()
+        result = calibrate(matrix, weights, method=method, iterations=5_000)
+        assert result.converged
+        assert result.max_relative_error < 1e-3
+        assert np.all(result.weights > 0)
+
+    def test_estimates_match_dense_product(self):
+        """Test that the sparse estimates equal the dense weighted sums."""
+        matrix, weights = _synthetic_matrix(households=50)
+        dense = np.zeros((50, matrix.target_count))
+        dense[matrix.rows, matrix.columns] = matrix.values
+        assert np.allclose(matrix.estimates(weights), weights @ dense)
+
+    def test_rejects_unknown_method(self):
+        """Test that unknown methods raise an error."""
+        matrix, weights = _synthetic_matrix(households=10)
+        with pytest.raises(ValueError):
+            calibrate(matrix, weights, method="newton")
+
+    def test_calibrates_simulation_weights(self):
+        """Test calibrating a simulation to a count and a filtered total."""
+        simulation = Simulation(situation=SITUATION)
+        targets = [
+            Target("people", 300, "age", statistic="count"),
+            Target(
+                "employment income under 65",
+                8_000_000,
+                "employment_income",
+                filter_variable="age",
+                upper=65,
+            ),
+        ]
+        matrix = build_loss_matrix(simulation, targets, 2024)
+        assert matrix.household_count == 2
+        result = calibrate_simulation(simulation, targets, 2024, method="raking")
+        assert result.converged
+        weights = simulation.calculate("household_weight", 2024)
+        assert weights == pytest.approx([200, 100], rel=1e-3)
+
+    def test_filter_must_share_entity(self):
+        """Test that filters on another entity's variable are rejected."""
+        simulation = Simulation(situation=SITUATION)
+        target = Target(
+            "income", 1, "employment_income", filter_variable="household_weight"
+        )
+        with pytest.raises(ValueError):
+            build_loss_matrix(simulation, [target], 2024)
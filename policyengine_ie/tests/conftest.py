@@ -9,6 +9,7 @@ import yaml
 import re
 import numpy as np
 from policyengine_ie import IrishTaxBenefitSystem
+from policyengine_core.enums import EnumArray
 from policyengine_core.simulations import Simulation
 
 
@@ -102,6 +103,8 @@ class YamlTestItem(pytest.Item):
         self, simulation, variable_name, period, expected_value, index=0
     ):
         calculated = simulation.calculate(variable_name, period)
+        if isinstance(calculated, EnumArray):
+            calculated = calculated.decode_to_str()
         if isinstance(calculated, np.ndarray):
             calculated = calculated[index]
         elif hasattr(calculated, "__len__") and not isinstance(
@@ -0,0 +1,50 @@
+"""Test the gross-to-net and net-to-gross calculations."""
+
+import numpy as np
+import pytest
+from policyengine_ie.gross_net import gross_for_net, net_for_gross
+
+
+class TestGrossNet:
+    """Test cases for the vectorised gross and net income solvers."""
+
+    def test_net_for_gross_matches_single_household(self):
+        """Test net income of a single earner on €50,000."""
+        # €50,000 less €7,850 income tax, €1,304.62 USC and €2,000 PRSI
+        assert net_for_gross([50_000])[0] == pytest.approx(38_845.38)
+
+    def test_gross_for_net_inverts_net_for_gross(self):
+        """Test that solved salaries give the target net incomes."""
+        targets = np.linspace(5_000, 150_000, 500)
+        result = gross_for_net(targets)
+        assert result.converged.all()
+        # Net income is calculated in float32, so allow a few cents
+        assert result.net == pytest.approx(targets, abs=0.05)
+        assert net_for_gross(result.gross) == pytest.approx(result.net, abs=0.05)
+        assert result.iterations <= 10
+
+    def test_gross_for_net_with_household(self):
+        """Test solving for one earner in a household with a child."""
+        situation = {
+            "people": {
+                "parent": {"age": {"2024": 35}},
+                "child": {"age": {"2024": 8}},
+            },
+            "tax_units": {"tax_unit": {"adults": ["parent"], "children": ["child"]}},
+        }
+        result = gross_for_net([40_000], situation=situation)
+        # Child Benefit of €2,208 is part of net income
+        assert result.gross[0] == pytest.approx(
+            gross_for_net([40_000 - 2_208]).gross[0], abs=0.5
+        )
+
+    def test_gross_for_net_past_usc_threshold(self):
+        """Test a target net income that net income jumps past."""
+        result = gross_for_net([13_000.2])
+        assert result.converged.all()
+        assert result.net[0] >= 13_000.2 - 0.05
+
+    def test_unknown_person(self):
+        """Test that an unknown person raises an error."""
+        with pytest.raises(ValueError):
+            net_for_gross([10_000], person="nobody")
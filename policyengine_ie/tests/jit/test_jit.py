@@ -0,0 +1,84 @@
+"""Test loop kernels against the NumPy formulas they replace."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie import jit
+from policyengine_ie.situations import quiet_structure_warning
+
+
+PEOPLE = 2_000
+
+
+@pytest.fixture(scope="module")
+def population() -> pd.DataFrame:
+    """Single-person households with random circumstances."""
+    rng = np.random.default_rng(0)
+    ids = np.arange(PEOPLE)
+    columns = {"person_id": ids}
+    for entity in ["household", "tax_unit", "benefit_unit", "family"]:
+        columns[f"{entity}_id"] = ids
+        columns[f"person_{entity}_id"] = ids
+    columns.update(
+        age=rng.integers(0, 90, PEOPLE),
+        employment_income=rng.choice([0, 15_000, 18_500, 21_500, 60_000], PEOPLE)
+        + rng.integers(-500, 500, PEOPLE),
+        is_unemployed=rng.random(PEOPLE) < 0.5,
+        is_living_independently=rng.random(PEOPLE) < 0.5,
+        has_housing_support=rng.random(PEOPLE) < 0.5,
+        is_twin=rng.random(PEOPLE) < 0.2,
+        is_multiple_birth=rng.random(PEOPLE) < 0.1,
+        is_in_full_time_education=rng.random(PEOPLE) < 0.5,
+        has_child_carer_credit=rng.random(PEOPLE) < 0.3,
+        is_married=rng.random(PEOPLE) < 0.5,
+        has_spouse_income=rng.random(PEOPLE) < 0.5,
+        qualified_adults_jobseekers=rng.integers(0, 2, PEOPLE),
+        qualified_children_jobseekers=rng.integers(0, 4, PEOPLE),
+    )
+    return pd.DataFrame({f"{name}__2024": values for name, values in columns.items()})
+
+
+def calculate(population: pd.DataFrame, variable: str) -> np.ndarray:
+    with quiet_structure_warning():
+        simulation = Simulation(dataset=population)
+    return simulation.calculate(variable, "2024")
+
+
+def calculate_with_numpy(population: pd.DataFrame, variable: str) -> np.ndarray:
+    """The NumPy formula's results, whatever POLICYENGINE_IE_BACKEND is."""
+    with jit.using_backend("numpy", [variable]):
+        return calculate(population, variable)
+
+
+class TestLoopKernels:
+    """Test cases for the loop kernel backends."""
+
+    @pytest.mark.parametrize("variable", sorted(jit.KERNELS))
+    def test_python_backend_matches_numpy(self, population, variable):
+        """Test that each kernel gives the NumPy formula's results."""
+        expected = calculate_with_numpy(population, variable)
+        default = jit.backend(variable)
+        with jit.using_backend("python", [variable]):
+            assert jit.backend(variable) == "python"
+            result = calculate(population, variable)
+        assert jit.backend(variable) == default
+        assert result.dtype == expected.dtype
+        assert result == pytest.approx(expected, abs=0.01)
+
+    @pytest.mark.parametrize("variable", sorted(jit.KERNELS))
+    def test_numba_backend_matches_numpy(self, population, variable):
+        """Test that each compiled kernel gives the NumPy formula's results."""
+        pytest.importorskip("numba")
+        expected = calculate_with_numpy(population, variable)
+        with jit.using_backend("numba", [variable]):
+            result = calculate(population, variable)
+        assert result == pytest.approx(expected, abs=0.01)
+
+    def test_unknown_backend_or_variable(self):
+        """Test that backends are only set for known kernels."""
+        with pytest.raises(ValueError, match="Unknown backend"):
+            jit.set_backend("fortran")
+        with pytest.raises(ValueError, match="no loop kernel"):
+            jit.set_backend("python", ["income_tax_net"])
+        assert jit.backend("income_tax_net") == "numpy"
@@ -0,0 +1,143 @@
+"""Test labour supply responses."""
+
+import copy
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.labour_supply import (
+    LabourSupplyElasticities,
+    apply_labour_supply_response,
+    marginal_tax_rates,
+)
+
+
+SITUATION = {
+    "people": {
+        "high_earner": {"age": {"2024": 40}, "employment_income": {"2024": 60_000}},
+        "spouse": {"age": {"2024": 40}, "employment_income": {"2024": 20_000}},
+        "standard_rate": {"age": {"2024": 30}, "employment_income": {"2024": 30_000}},
+        "child": {"age": {"2024": 8}},
+    },
+    "tax_units": {
+        "couple": {"adults": ["high_earner", "spouse"], "children": ["child"]},
+        "single": {"adults": ["standard_rate"]},
+    },
+    "households": {
+        "family": {"members": ["high_earner", "spouse", "child"]},
+        "flat": {"members": ["standard_rate"]},
+    },
+}
+
+HIGHER_RATE_RISE = {"gov.revenue.income_tax.rates.higher_rate": {"2024": 0.5}}
+
+
+class TestLabourSupply:
+    """Test cases for marginal rates and the labour supply response."""
+
+    def test_marginal_tax_rates(self):
+        """Test each earner's marginal rate, leaving the simulation unchanged."""
+        simulation = Simulation(situation=SITUATION)
+        net_income = simulation.calculate("household_net_income", "2024").copy()
+        rates = marginal_tax_rates(simulation, "2024")
+
+        # 40% income tax, 4% USC and PRSI on the higher earner; the spouse's
+        # earnings raise the joint band, so they are taxed at 20%
+        assert rates[0] == pytest.approx(0.48, abs=0.005)
+        assert 0.2 < rates[1] < rates[0]
+        assert rates[3] == 0
+        assert simulation.calculate("household_net_income", "2024") == pytest.approx(
+            net_income
+        )
+
+    def test_no_response_without_elasticities(self):
+        """Test that zero elasticities leave earnings as they were."""
+        baseline = Simulation(situation=SITUATION)
+        reformed = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+        response = apply_labour_supply_response(
+            baseline, reformed, "2024", LabourSupplyElasticities()
+        )
+
+        assert response.converged and response.iterations == 1
+        assert np.all(response.change == 0)
+
+    def test_at_least_one_iteration(self):
+        """Test that a response with no iterations is refused."""
+        baseline = Simulation(situation=SITUATION)
+        reformed = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+        with pytest.raises(ValueError, match="max_iterations"):
+            apply_labour_supply_response(
+                baseline,
+                reformed,
+                "2024",
+                LabourSupplyElasticities(),
+                max_iterations=0,
+            )
+
+    def test_response_to_higher_rate_rise(self):
+        """Test that higher-rate taxpayers work less and the reform recalculates."""
+        baseline = Simulation(situation=SITUATION)
+        reformed = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+        reformed.calculate("household_net_income", "2024")
+        response = apply_labour_supply_response(
+            baseline,
+            reformed,
+            "2024",
+            LabourSupplyElasticities(substitution=0.25, income=-0.05),
+        )
+
+        assert response.converged
+        assert response.change[0] < 0
+        assert response.change[2] == 0
+        assert response.marginal_rate[0] == pytest.approx(0.58, abs=0.005)
+
+        # The reformed simulation matches one built with the new earnings
+        situation = copy.deepcopy(SITUATION)
+        for name, earnings in zip(situation["people"], response.earnings):
+            situation["people"][name]["employment_income"] = {"2024": earnings}
+        fresh = Simulation(situation=situation, reform=HIGHER_RATE_RISE)
+        assert reformed.calculate("household_net_income", "2024") == pytest.approx(
+            fresh.calculate("household_net_income", "2024"), abs=0.01
+        )
+
+    def test_income_effect_is_the_reforms_at_baseline_earnings(self):
+        """Test that the income effect uses the reform's change in net
+        earnings before any response, not the responded earnings."""
+
+        def tax_unit_net_earnings(simulation):
+            taxes = sum(
+                simulation.calculate(tax, "2024")
+                for tax in ["income_tax_net", "usc", "employee_prsi"]
+            )
+            net = simulation.calculate("employment_income", "2024") - taxes
+            return simulation.persons.tax_unit.sum(net)
+
+        baseline = Simulation(situation=SITUATION)
+        reformed = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+        net_change = tax_unit_net_earnings(reformed) / tax_unit_net_earnings(baseline)
+        earnings = baseline.calculate("employment_income", "2024")
+
+        response = apply_labour_supply_response(
+            baseline, reformed, "2024", LabourSupplyElasticities(income=-0.05)
+        )
+
+        assert response.converged and response.iterations == 2
+        assert response.change == pytest.approx(
+            earnings * -0.05 * (net_change - 1), abs=0.01
+        )
+        assert response.marginal_rate == pytest.approx(
+            marginal_tax_rates(reformed, "2024")
+        )
+
+    def test_elasticities_per_person(self):
+        """Test that elasticities can differ between people."""
+        baseline = Simulation(situation=SITUATION)
+        reformed = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+        response = apply_labour_supply_response(
+            baseline,
+            reformed,
+            "2024",
+            LabourSupplyElasticities(substitution=np.array([0, 0.25, 0.25, 0])),
+        )
+
+        assert response.change[0] == 0
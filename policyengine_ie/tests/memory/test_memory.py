@@ -0,0 +1,117 @@
+"""Test the memory budget for calculated arrays."""
+
+import numpy as np
+import pandas as pd
+import pytest
+from policyengine_ie import IrishTaxBenefitSystem, Simulation
+from policyengine_ie.memory import MemoryBudget
+from policyengine_ie.model_api import YEAR, Person, Variable
+from policyengine_ie.situations import quiet_structure_warning
+
+
+PEOPLE = 10_000
+VARIABLES = ["household_net_income", "usc", "income_tax_net", "taxable_income"]
+
+
+class usc_last_year(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "USC of the year before"
+
+    def formula(person, period, parameters):
+        return person("usc", period.last_year)
+
+
+def simulation(years=("2024",), **options) -> Simulation:
+    ids = np.arange(PEOPLE)
+    columns = {"person_id": ids}
+    for entity in ["household", "tax_unit", "benefit_unit", "family"]:
+        columns[f"{entity}_id"] = ids
+        columns[f"person_{entity}_id"] = ids
+    columns.update(
+        age=np.full(PEOPLE, 40), employment_income=np.linspace(0, 1e5, PEOPLE)
+    )
+    dataset = pd.DataFrame(
+        {
+            f"{name}__{year}": values
+            for name, values in columns.items()
+            for year in years
+        }
+    )
+    with quiet_structure_warning():
+        return Simulation(dataset=dataset, **options)
+
+
+@pytest.fixture(scope="module")
+def expected() -> dict:
+    return simulation().calculate_many(VARIABLES, "2024")
+
+
+class TestMemoryBudget:
+    """Test cases for spilling and reloading calculated arrays."""
+
+    def test_results_within_budget(self, expected):
+        """Test that a budgeted run matches an unbudgeted one and keeps to it."""
+        budget = MemoryBudget(3 * PEOPLE * 4)
+        budgeted = simulation(memory_budget=budget)
+        for variable in VARIABLES:
+            np.testing.assert_array_equal(
+                budgeted.calculate(variable, "2024"), expected[variable]
+            )
+        assert budget.stats.spills > 0
+        assert budget.stats.held_bytes <= budget.max_bytes
+        assert budget.stats.peak_bytes > budget.max_bytes
+        # Inputs are never spilled
+        holder = budgeted.get_holder("employment_income")
+        assert holder.get_array("2024") is not None
+
+    def test_spilled_arrays_are_reloaded(self):
+        """Test that a spilled array is read back rather than recalculated."""
+        budgeted = simulation(memory_budget=0)
+        budgeted.calculate("household_net_income", "2024")
+        budget = budgeted.memory_budget
+        assert budgeted.get_holder("usc").get_array("2024") is None
+        np.testing.assert_array_equal(
+            budgeted.calculate("household_tax", "2024"),
+            simulation().calculate("household_tax", "2024"),
+        )
+        assert budget.stats.reloads >= 1
+
+    def test_evict_without_spilling(self, expected):
+        """Test that arrays can be dropped and recalculated instead."""
+        budget = MemoryBudget(0, spill=False)
+        budgeted = simulation(memory_budget=budget)
+        for variable in VARIABLES + VARIABLES:
+            np.testing.assert_array_equal(
+                budgeted.calculate(variable, "2024"), expected[variable]
+            )
+        assert budget.stats.evictions > 0
+        assert budget.stats.spills == budget.stats.reloads == 0
+
+    def test_dropping_computed_arrays_forgets_spills(self):
+        """Test that spilled values are not reloaded after values are dropped."""
+        budgeted = simulation(memory_budget=0)
+        budgeted.calculate("usc", "2024")
+        budgeted.set_input("employment_income", "2024", np.zeros(PEOPLE))
+        budgeted.drop_computed_arrays()
+        assert not budgeted.calculate("usc", "2024").any()
+        assert budgeted.memory_budget.stats.reloads == 0
+
+    def test_spills_are_reloaded_for_other_periods(self):
+        """Test that a formula reading a spilled array for another period
+        than the one requested reloads it, writable, not recalculates it."""
+        system = IrishTaxBenefitSystem()
+        system.add_variable(usc_last_year)
+        budgeted = simulation(
+            years=("2023", "2024"), tax_benefit_system=system, memory_budget=0
+        )
+        usc = budgeted.calculate("usc", "2023").copy()
+        budget = budgeted.memory_budget
+        assert budgeted.get_holder("usc").get_array("2023") is None
+
+        np.testing.assert_array_equal(budgeted.calculate("usc_last_year", "2024"), usc)
+        assert budget.stats.reloads == 1
+        reloaded = budgeted.calculate("usc", "2023")
+        reloaded[:] = 0
+        assert not budgeted.get_holder("usc").get_array("2023").any()
@@ -0,0 +1,68 @@
+"""Test metrics of simulation runs."""
+
+import json
+
+import numpy as np
+from policyengine_ie.metrics import JsonLinesSink, PrometheusTextSink
+from policyengine_ie.structure import build_simulation
+
+
+def simulation(metrics):
+    return build_simulation(
+        household_id=np.arange(3),
+        inputs={
+            "age": np.full(3, 40),
+            "employment_income": np.array([20_000, 50_000, 90_000]),
+        },
+        period="2025",
+        metrics=metrics,
+    )
+
+
+class TestMetrics:
+    """Test cases for recording and exporting simulation metrics."""
+
+    def test_callback_receives_records(self):
+        """Test that a function gets a record of building the simulation and
+        one per top-level calculation, with time spent in each variable."""
+        records = []
+        sim = simulation(records.append)
+
+        sim.calculate("household_net_income", "2025")
+        sim.calculate("usc", "2025")
+
+        built, first, second = records
+        assert built["event"] == "simulation"
+        assert built["people"] == 3
+        assert built["system_build_seconds"] > 0
+        assert built["load_seconds"] > 0
+        assert first["event"] == "calculate"
+        assert first["variable"] == "household_net_income"
+        assert {"usc", "income_tax", "household_net_income"} <= set(first["variables"])
+        # Time in each variable excludes those it asked for
+        assert sum(first["variables"].values()) <= first["seconds"] * 1.001
+        assert first["array_bytes"] > 0
+        assert first["peak_rss_bytes"] > 0
+        # Already calculated, so only looked up
+        assert list(second["variables"]) == ["usc"]
+
+    def test_files(self, tmp_path):
+        """Test that records are written as JSON lines and as Prometheus
+        running totals."""
+        lines, prom = tmp_path / "metrics.jsonl", tmp_path / "ie.prom"
+        sim = simulation([JsonLinesSink(lines), PrometheusTextSink(prom)])
+
+        sim.calculate("usc", "2025")
+        sim.calculate("income_tax", "2025")
+
+        records = [json.loads(line) for line in lines.read_text().splitlines()]
+        assert [record["event"] for record in records] == [
+            "simulation",
+            "calculate",
+            "calculate",
+        ]
+        text = prom.read_text()
+        assert "policyengine_ie_simulations_total 1" in text
+        assert 'policyengine_ie_calculations_total{variable="usc"} 1' in text
+        assert 'policyengine_ie_variable_seconds_total{variable="usc"}' in text
+        assert "policyengine_ie_peak_rss_bytes " in text
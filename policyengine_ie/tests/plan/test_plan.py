@@ -0,0 +1,134 @@
+"""Test execution plans built from the variable dependency graph."""
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.plan import (
+    dependencies,
+    dependents,
+    execution_plan,
+    parameter_readers,
+    run_plan,
+)
+from policyengine_ie.reforms import baseline_system
+
+
+SITUATION = {
+    "people": {
+        "parent": {"age": {"2024": 35}, "employment_income": {"2024": 50_000}},
+        "child": {"age": {"2024": 8}},
+    },
+    "tax_units": {"tax_unit": {"adults": ["parent"], "children": ["child"]}},
+}
+
+
+def traced_nodes(*variables: str) -> list:
+    """Every node of a traced calculation of variables in SITUATION."""
+    simulation = Simulation(situation=SITUATION)
+    simulation.trace = True
+    for variable in variables:
+        simulation.calculate(variable, "2024")
+    found = []
+    nodes = list(simulation.tracer.trees)
+    while nodes:
+        node = nodes.pop()
+        found.append(node)
+        nodes += node.children
+    return found
+
+
+class TestExecutionPlan:
+    """Test cases for planning and running calculations."""
+
+    def test_dependencies_from_formula_source(self):
+        """Test that formula calls and adds give a variable's dependencies."""
+        system = baseline_system()
+        assert dependencies(system, "income_tax") == [
+            "assessed_taxable_income",
+            "standard_rate_band",
+        ]
+        assert dependencies(system, "household_net_income") == [
+            "household_market_income",
+            "household_benefits",
+            "household_tax",
+        ]
+
+    def test_plan_for_income_tax_and_usc(self):
+        """Test the inputs, order and release points of a small plan."""
+        plan = execution_plan(baseline_system(), ["income_tax_net", "usc"])
+        assert "employment_income" in plan.inputs
+        assert "jobseekers_means_test" not in plan.inputs + plan.order
+        order = plan.order
+        assert order.index("taxable_income") < order.index("income_tax")
+        assert order.index("income_tax") < order.index("income_tax_net")
+        assert "assessed_taxable_income" in plan.release["income_tax"]
+        released = [name for names in plan.release.values() for name in names]
+        assert "income_tax_net" not in released and "usc" not in released
+
+    def test_provided_variables_are_not_calculated(self):
+        """Test that variables the data supplies are treated as inputs."""
+        plan = execution_plan(
+            baseline_system(), ["usc"], provided=["gross_income_for_usc"]
+        )
+        assert plan.order == ["usc"]
+        assert "employment_income" not in plan.inputs
+
+    def test_plan_matches_traced_calculation(self):
+        """Test that the plan covers exactly the variables a run uses."""
+        used = {node.name for node in traced_nodes("household_net_income")}
+        plan = execution_plan(baseline_system(), ["household_net_income"])
+        assert set(plan.inputs) | set(plan.order) == used
+
+    def test_dependencies_cover_traced_calculations(self):
+        """Test that the parsed graph has every variable each formula of the
+        whole gov chain requests in a traced calculation, so no input a
+        plan needs is pruned."""
+        system = baseline_system()
+        calculated = [
+            name
+            for name, variable in system.variables.items()
+            if variable.formulas or variable.adds or variable.subtracts
+        ]
+        for node in traced_nodes(*calculated):
+            missing = {child.name for child in node.children} - set(
+                dependencies(system, node.name)
+            )
+            assert not missing, f"{node.name} uses {sorted(missing)}"
+
+    def test_run_plan_drops_intermediates(self):
+        """Test that running a plan gives the same results with less held."""
+        variables = ["household_net_income", "usc"]
+        expected = Simulation(situation=SITUATION).calculate_many(variables, "2024")
+        simulation = Simulation(situation=SITUATION)
+        plan = execution_plan(simulation.tax_benefit_system, variables)
+        results = run_plan(simulation, plan, "2024")
+        for variable in variables:
+            np.testing.assert_allclose(results[variable], expected[variable])
+        assert simulation.get_holder("taxable_income").get_array("2024") is None
+        assert simulation.get_holder("usc").get_array("2024") is not None
+
+    def test_unknown_variable(self):
+        """Test that planning an unknown variable fails."""
+        with pytest.raises(Exception, match="not_a_variable"):
+            execution_plan(baseline_system(), ["not_a_variable"])
+
+    def test_dependents_of_an_input(self):
+        """Test that dependents follow the graph up from an input."""
+        found = dependents(baseline_system(), ["employment_income"])
+        assert "income_tax_net" in found and "household_net_income" in found
+        assert "age" not in found and "child_benefit" not in found
+
+    def test_parameter_readers_cover_traced_parameter_reads(self):
+        """Test that every parameter a traced formula reads, including those
+        read by helpers it passes a parent node to, lists it as a reader."""
+        system = baseline_system()
+        for node in traced_nodes("household_net_income"):
+            for parameter in node.parameters:
+                assert node.name in parameter_readers(system, parameter.name), (
+                    f"{node.name} reads {parameter.name}"
+                )
+        readers = parameter_readers(
+            system, "gov.revenue.income_tax.credits.personal.single"
+        )
+        assert "income_tax_credits" in readers
+        assert "usc" not in readers
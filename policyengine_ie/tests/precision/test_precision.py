@@ -0,0 +1,55 @@
+"""Test single and double precision simulations."""
+
+import numpy as np
+import pytest
+from policyengine_ie import IrishTaxBenefitSystem, Simulation
+from policyengine_ie.precision import (
+    TESTS_DIR,
+    compare_precision,
+    system_with_precision,
+)
+
+
+SITUATION = {
+    "people": {"you": {"age": {"2024": 35}, "employment_income": {"2024": 123_456.78}}}
+}
+
+
+class TestPrecision:
+    """Test cases for the precision option."""
+
+    def test_float_variables_are_single_precision_by_default(self):
+        """Test that float variables are float32 unless they opt out."""
+        system = IrishTaxBenefitSystem()
+        assert system.get_variable("income_tax_net").dtype == np.float32
+        assert system.get_variable("household_weight").dtype == np.float64
+        assert system.get_variable("age").dtype != np.float64
+
+    def test_double_precision_simulation(self):
+        """Test that a double-precision simulation calculates in float64."""
+        single = Simulation(situation=SITUATION)
+        double = Simulation(situation=SITUATION, precision="double")
+        single_net = single.calculate("household_net_income", "2024")
+        double_net = double.calculate("household_net_income", "2024")
+        assert single_net.dtype == np.float32
+        assert double_net.dtype == np.float64
+        assert double_net[0] == pytest.approx(single_net[0], abs=0.05)
+
+    def test_double_precision_system_is_reused(self):
+        """Test that the double-precision copy of a system is made once."""
+        system = IrishTaxBenefitSystem()
+        double = system_with_precision(system, "double")
+        assert system_with_precision(system, "double") is double
+        assert system_with_precision(system, "single") is system
+        assert system.get_variable("usc").dtype == np.float32
+
+    def test_unknown_precision(self):
+        """Test that an unknown precision is rejected."""
+        with pytest.raises(ValueError, match="Unknown precision"):
+            Simulation(situation=SITUATION, precision="half")
+
+    def test_policy_tests_within_a_cent(self):
+        """Test that single precision is within a cent on the policy tests."""
+        deviations = compare_precision([TESTS_DIR / "baseline"])
+        assert deviations
+        assert max(deviation.deviation for deviation in deviations) < 0.01
@@ -0,0 +1,140 @@
+"""Test parameter-only reforms given as dicts."""
+
+import pytest
+from policyengine_core.simulations import Simulation
+from policyengine_ie import IrishTaxBenefitSystem
+from policyengine_ie.reforms import (
+    ParametricReform,
+    baseline_system,
+    reformed_system,
+)
+
+
+USC_BAND_3 = "gov.revenue.usc.rates.band_3"
+
+SITUATION = {
+    "people": {
+        "person_1": {
+            "age": {"2025": 35},
+            "employment_income": {"2025": 50_000},
+        },
+    },
+    "tax_units": {"tax_unit_1": {"adults": ["person_1"]}},
+    "households": {"household_1": {"members": ["person_1"]}},
+}
+
+
+class TestParametricReform:
+    """Test cases for ParametricReform and the reformed system cache."""
+
+    def test_equivalent_reforms_share_a_hash(self):
+        """Test that period keys are normalised before hashing."""
+        reform = ParametricReform({USC_BAND_3: {"2025-01-01": 0.035}})
+        same_reform = ParametricReform({USC_BAND_3: {"2025": 0.035}})
+        other_reform = ParametricReform({USC_BAND_3: {"2025": 0.03}})
+
+        assert reform.hash == same_reform.hash
+        assert reform == same_reform
+        assert reform.hash != other_reform.hash
+
+    def test_integer_and_float_values_share_a_hash(self):
+        """Test that numerically equal values are normalised before hashing."""
+        rate = "gov.dsp.jobseekers.rates.age_25_plus"
+        reform = ParametricReform({rate: {"2025": 300}})
+        same_reform = ParametricReform({rate: {"2025": 300.0}})
+
+        assert reform.hash == same_reform.hash
+        assert reform.hash != ParametricReform({rate: {"2025": 301}}).hash
+
+    def test_invalid_reforms_are_rejected(self):
+        """Test that reforms are validated when compiled."""
+        with pytest.raises(ValueError):
+            ParametricReform({"gov.revenue.usc.rates.band_9": {"2025": 0.03}})
+        with pytest.raises(ValueError):
+            ParametricReform({"gov.revenue.usc.rates": {"2025": 0.03}})
+        with pytest.raises(ValueError):
+            ParametricReform({USC_BAND_3: {"2025-13-01": 0.03}})
+        with pytest.raises(ValueError):
+            ParametricReform({USC_BAND_3: {"2025": "high"}})
+
+    def test_reformed_system_leaves_baseline_unchanged(self):
+        """Test that the reform applies to a clone of the cached baseline."""
+        system = reformed_system({USC_BAND_3: {"2025-01-01": 0.035}})
+
+        assert system.parameters(2025).gov.revenue.usc.rates.band_3 == 0.035
+        assert system.parameters(2024).gov.revenue.usc.rates.band_3 == 0.04
+        assert baseline_system().parameters(2025).gov.revenue.usc.rates.band_3 == 0.04
+
+    def test_reformed_systems_are_cached_by_hash(self):
+        """Test that identical reforms reuse one system."""
+        system = reformed_system({USC_BAND_3: {"2025-01-01": 0.035}})
+        same_system = reformed_system(ParametricReform({USC_BAND_3: {"2025": 0.035}}))
+
+        assert system is same_system
+        assert reformed_system(None) is baseline_system()
+        assert reformed_system({}) is baseline_system()
+
+    def test_bounded_period(self):
+        """Test that a range period key only changes the range."""
+        system = reformed_system(
+            {USC_BAND_3: {"2025-01-01.2025-12-31": 0.03, "2026-01-01": 0.05}}
+        )
+
+        assert system.parameters(2025).gov.revenue.usc.rates.band_3 == 0.03
+        assert system.parameters(2026).gov.revenue.usc.rates.band_3 == 0.05
+
+    def test_reform_changes_usc(self):
+        """Test that a simulation on the reformed system uses the new rate."""
+        reform = {USC_BAND_3: {"2025-01-01": 0.035}}
+        baseline = Simulation(tax_benefit_system=baseline_system(), situation=SITUATION)
+        reformed = Simulation(
+            tax_benefit_system=reformed_system(reform), situation=SITUATION
+        )
+        system_with_reform = IrishTaxBenefitSystem(reform=reform)
+        direct = Simulation(tax_benefit_system=system_with_reform, situation=SITUATION)
+
+        # Band 3 covers €25,760 to €50,000 here: 0.5pp less on €24,240
+        difference = (
+            baseline.calculate("usc", "2025")[0] - reformed.calculate("usc", "2025")[0]
+        )
+        assert abs(difference - 121.2) < 0.01
+        assert (
+            abs(
+                direct.calculate("usc", "2025")[0]
+                - reformed.calculate("usc", "2025")[0]
+            )
+            < 0.01
+        )
+
+    def test_reform_can_make_separate_assessment_cheapest(self):
+        """Test that couples switch basis when a reform changes which is cheapest."""
+        couple = {
+            "people": {
+                "person_1": {
+                    "age": {"2025": 40},
+                    "employment_income": {"2025": 60_000},
+                },
+                "person_2": {
+                    "age": {"2025": 40},
+                    "employment_income": {"2025": 60_000},
+                },
+            },
+            "tax_units": {"tax_unit_1": {"adults": ["person_1", "person_2"]}},
+            "households": {"household_1": {"members": ["person_1", "person_2"]}},
+        }
+        reform = {"gov.revenue.income_tax.bands.single": {"2025-01-01": 60_000}}
+        baseline = Simulation(tax_benefit_system=baseline_system(), situation=couple)
+        reformed = Simulation(
+            tax_benefit_system=reformed_system(reform), situation=couple
+        )
+
+        assert (
+            baseline.calculate("income_tax_assessment", "2025").decode_to_str()[0]
+            == "JOINT"
+        )
+        assert (
+            reformed.calculate("income_tax_assessment", "2025").decode_to_str()[0]
+            == "SEPARATE"
+        )
+        # Each spouse: €60,000 @ 20% - half the married credit €1,875 - PAYE €1,875
+        assert reformed.calculate("income_tax_net", "2025").tolist() == [8_250, 8_250]
@@ -0,0 +1,143 @@
+"""Test the batching HTTP calculation service."""
+
+import asyncio
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from policyengine_ie.service import CalculationService, calculate_batch
+
+
+def single(income, age=35):
+    return {
+        "people": {
+            "you": {"age": {"2024": age}, "employment_income": {"2024": income}}
+        },
+        "tax_units": {"tax_unit": {"adults": ["you"]}},
+        "households": {"household": {"members": ["you"]}},
+    }
+
+
+FAMILY = {
+    "people": {
+        "parent": {"age": {"2024": 40}, "employment_income": {"2024": 60_000}},
+        "child": {"age": {"2024": 8}},
+    },
+    "families": {"family": {"parents": ["parent"], "children": ["child"]}},
+}
+
+
+class TestCalculationService:
+    """Test cases for batched calculation and the HTTP front end."""
+
+    def test_stacked_batch_matches_known_values(self):
+        """Test that stacked households keep their own IDs and results."""
+        requests = [
+            {"situation": single(50_000), "variables": ["usc"], "period": "2024"},
+            {"situation": single(100_000), "variables": ["usc"], "period": "2024"},
+            {
+                "situation": FAMILY,
+                "variables": ["child_benefit", "income_tax"],
+                "period": "2024",
+            },
+        ]
+        results = calculate_batch(None, requests)
+
+        assert abs(results[0]["result"]["usc"]["you"] - 1_304.62) < 0.01
+        assert abs(results[1]["result"]["usc"]["you"] - 4_502.86) < 0.01
+        assert results[2]["result"]["child_benefit"] == {
+            "parent": 0,
+            "child": 2_208,
+        }
+
+    def test_invalid_situation_does_not_fail_batch(self):
+        """Test that a failing request is reported on its own."""
+        invalid = single(50_000)
+        invalid["tax_units"] = {"tax_unit": {"adults": ["nobody"]}}
+        requests = [
+            {"situation": single(50_000), "variables": ["usc"], "period": "2024"},
+            {"situation": invalid, "variables": ["usc"], "period": "2024"},
+        ]
+        results = calculate_batch(None, requests)
+
+        assert "result" in results[0]
+        assert "error" in results[1]
+
+    def test_reform_batch(self):
+        """Test that a parametric reform is applied to its batch."""
+        reform = {"gov.revenue.usc.rates.band_3": {"2024-01-01": 0.035}}
+        request = {"situation": single(50_000), "variables": ["usc"], "period": "2024"}
+        result = calculate_batch(reform, [request])[0]["result"]
+
+        assert abs(result["usc"]["you"] - (1_304.62 - 121.2)) < 0.01
+
+    def test_http_requests_are_batched(self):
+        """Test concurrent HTTP requests end to end."""
+
+        async def post(port, body):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            content = json.dumps(body).encode()
+            writer.write(
+                b"POST /calculate HTTP/1.1\r\n"
+                + f"Content-Length: {len(content)}\r\n".encode()
+                + b"Connection: close\r\n\r\n"
+                + content
+            )
+            response = await reader.read()
+            writer.close()
+            head, _, payload = response.partition(b"\r\n\r\n")
+            return int(head.split()[1]), json.loads(payload)
+
+        async def run():
+            service = CalculationService(
+                executor=ThreadPoolExecutor(max_workers=1), tick=0.05
+            )
+            await service.start()
+            server = await asyncio.start_server(
+                service.handle_connection, "127.0.0.1", 0
+            )
+            port = server.sockets[0].getsockname()[1]
+            responses = await asyncio.gather(
+                *[
+                    post(port, {"situation": single(income), "variables": ["usc"]})
+                    for income in (50_000, 100_000, 12_000)
+                ],
+                post(port, {"situation": single(1), "variables": ["no_such_variable"]}),
+            )
+            server.close()
+            await service.stop()
+            return responses, service.stats
+
+        responses, stats = asyncio.run(run())
+
+        assert [status for status, _ in responses] == [200, 200, 200, 400]
+        assert abs(responses[0][1]["result"]["usc"]["you"] - 1_304.62) < 0.01
+        assert responses[2][1]["result"]["usc"]["you"] == 0
+        assert stats["batches"] == 1
+
+    def test_invalid_content_length_is_a_bad_request(self):
+        """Test that a malformed or negative Content-Length gets a 400."""
+
+        async def send(port, length):
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(
+                b"POST /calculate HTTP/1.1\r\n"
+                + f"Content-Length: {length}\r\n\r\n".encode()
+            )
+            response = await reader.read()
+            writer.close()
+            head, _, payload = response.partition(b"\r\n\r\n")
+            return int(head.split()[1]), json.loads(payload)
+
+        async def run():
+            service = CalculationService(executor=ThreadPoolExecutor(max_workers=1))
+            server = await asyncio.start_server(
+                service.handle_connection, "127.0.0.1", 0
+            )
+            port = server.sockets[0].getsockname()[1]
+            responses = [await send(port, length) for length in ("ten", -5)]
+            server.close()
+            return responses
+
+        for status, body in asyncio.run(run()):
+            assert status == 400
+            assert body == {"error": "Invalid Content-Length."}
@@ -0,0 +1,94 @@
+"""Test saving and loading simulation snapshots."""
+
+import json
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.snapshot import load_simulation, read_manifest, save_simulation
+
+
+SITUATION = {
+    "people": {
+        "person_1": {"age": {"2024": 40}, "employment_income": {"2024": 60_000}},
+        "person_2": {"age": {"2024": 38}, "employment_income": {"2024": 20_000}},
+        "person_3": {"age": {"2024": 6}},
+    },
+    "tax_units": {
+        "tax_unit_1": {"adults": ["person_1", "person_2"], "children": ["person_3"]}
+    },
+    "households": {"household_1": {"members": ["person_1", "person_2", "person_3"]}},
+}
+
+HIGHER_RATE_RISE = {"gov.revenue.income_tax.rates.higher_rate": {"2024": 0.5}}
+
+
+@pytest.fixture
+def snapshot(tmp_path):
+    simulation = Simulation(situation=SITUATION)
+    simulation.calculate("household_net_income", "2024")
+    simulation.calculate("income_tax_assessment", "2024")
+    return save_simulation(simulation, tmp_path / "baseline"), simulation
+
+
+class TestSnapshot:
+    """Test cases for simulation snapshots."""
+
+    def test_round_trip_without_recalculating(self, snapshot):
+        """Test that a loaded snapshot holds the calculated arrays, mapped."""
+        path, original = snapshot
+        loaded = load_simulation(path)
+
+        holder = loaded.get_holder("income_tax_net")
+        assert isinstance(holder.get_array("2024"), np.memmap)
+        assert holder.is_derived("2024")
+        assert not loaded.get_holder("employment_income").is_derived("2024")
+        for variable in ["household_net_income", "income_tax_net", "child_benefit"]:
+            assert np.array_equal(
+                loaded.calculate(variable, "2024"), original.calculate(variable, "2024")
+            )
+        assessment = loaded.calculate("income_tax_assessment", "2024")
+        assert assessment.decode_to_str().tolist() == ["JOINT"]
+        assert loaded.calculate("household_net_income", "2024", map_to="person") == (
+            pytest.approx(
+                original.calculate("household_net_income", "2024", map_to="person")
+            )
+        )
+
+    def test_reform_restores_only_inputs(self, snapshot):
+        """Test that a reform recalculates from the snapshot's inputs."""
+        path, _ = snapshot
+        reformed = load_simulation(path, reform=HIGHER_RATE_RISE)
+        direct = Simulation(situation=SITUATION, reform=HIGHER_RATE_RISE)
+
+        assert reformed.get_holder("income_tax_net").get_array("2024") is None
+        assert reformed.calculate("household_net_income", "2024") == pytest.approx(
+            direct.calculate("household_net_income", "2024")
+        )
+
+    def test_other_versions_are_refused(self, snapshot):
+        """Test that snapshots from another model version are not loaded."""
+        path, _ = snapshot
+        manifest = read_manifest(path)
+        manifest["model_version"] = "0.0.0"
+        (path / "manifest.json").write_text(json.dumps(manifest))
+
+        with pytest.raises(ValueError, match="saved with policyengine-ie 0.0.0"):
+            load_simulation(path)
+        with pytest.raises(ValueError, match="not a simulation snapshot"):
+            load_simulation(path / "missing")
+
+    def test_changed_model_files_restore_only_inputs(self, snapshot):
+        """Test that calculated arrays saved before a formula or parameter
+        file changed are recalculated, even with the same version number."""
+        path, original = snapshot
+        manifest = read_manifest(path)
+        manifest["model_hash"] = "0" * 64
+        (path / "manifest.json").write_text(json.dumps(manifest))
+
+        loaded = load_simulation(path)
+        assert loaded.get_holder("income_tax_net").get_array("2024") is None
+        assert loaded.get_holder("employment_income").get_array("2024") is not None
+        assert loaded.calculate("income_tax_net", "2024") == pytest.approx(
+            original.calculate("income_tax_net", "2024")
+        )
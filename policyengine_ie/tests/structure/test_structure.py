@@ -0,0 +1,96 @@
+"""Test building simulations from flat arrays."""
+
+import numpy as np
+import pytest
+from policyengine_ie import Simulation
+from policyengine_ie.structure import ADULT, CHILD, build_simulation
+
+
+SITUATION = {
+    "people": {
+        "parent_1": {"age": {"2024": 40}, "employment_income": {"2024": 60_000}},
+        "parent_2": {"age": {"2024": 38}, "employment_income": {"2024": 20_000}},
+        "child": {"age": {"2024": 6}},
+        "single": {"age": {"2024": 30}, "employment_income": {"2024": 35_000}},
+    },
+    "tax_units": {
+        "family_tax_unit": {
+            "adults": ["parent_1", "parent_2"],
+            "children": ["child"],
+        },
+        "single_tax_unit": {"adults": ["single"]},
+    },
+    "benefit_units": {
+        "family_benefit_unit": {
+            "adults": ["parent_1", "parent_2"],
+            "children": ["child"],
+        },
+        "single_benefit_unit": {"adults": ["single"]},
+    },
+    "families": {
+        "family": {"parents": ["parent_1", "parent_2"], "children": ["child"]},
+        "single_family": {"parents": ["single"]},
+    },
+    "households": {
+        "family_home": {"members": ["parent_1", "parent_2", "child"]},
+        "flat": {"members": ["single"]},
+    },
+}
+
+HOUSEHOLD_ID = np.array([10, 10, 10, 20])
+ROLE = np.array([ADULT, ADULT, CHILD, ADULT])
+INPUTS = {
+    "age": np.array([40, 38, 6, 30]),
+    "employment_income": np.array([60_000, 20_000, 0, 35_000]),
+}
+
+
+class TestStructure:
+    """Test cases for the flat-array simulation builder."""
+
+    def test_matches_situation(self):
+        """Test that arrays give the same results as the situation dict."""
+        built = build_simulation(
+            household_id=HOUSEHOLD_ID, role=ROLE, inputs=INPUTS, period="2024"
+        )
+        expected = Simulation(situation=SITUATION)
+
+        for variable in ["household_net_income", "income_tax_net", "child_benefit"]:
+            assert built.calculate(variable, "2024") == pytest.approx(
+                expected.calculate(variable, "2024")
+            )
+        assert built.calculate("is_married", "2024").tolist() == [True, False]
+
+    def test_memberships_roles_and_positions(self):
+        """Test group numbering, roles and positions, with separate tax units."""
+        built = build_simulation(
+            household_id=HOUSEHOLD_ID,
+            tax_unit_id=np.array(["a", "b", "a", "c"]),
+            role={"tax_unit": ROLE, "family": ROLE},
+            inputs=INPUTS,
+            period="2024",
+        )
+
+        tax_units = built.populations["tax_unit"]
+        assert tax_units.ids.tolist() == ["a", "b", "c"]
+        assert tax_units.members_entity_id.tolist() == [0, 1, 0, 2]
+        assert tax_units.members_position.tolist() == [0, 0, 1, 0]
+        assert [role.key for role in tax_units.members_role] == [
+            "adult",
+            "adult",
+            "child",
+            "adult",
+        ]
+        # Benefit units were given no roles, so everyone is an adult
+        benefit_units = built.populations["benefit_unit"]
+        assert {role.key for role in benefit_units.members_role} == {"adult"}
+        assert built.populations["household"].members_position.tolist() == [0, 1, 2, 0]
+
+    def test_invalid_arrays(self):
+        """Test that mismatched lengths, roles and periods are rejected."""
+        with pytest.raises(ValueError, match="tax_unit_id has 2 values"):
+            build_simulation(household_id=HOUSEHOLD_ID, tax_unit_id=[1, 2])
+        with pytest.raises(ValueError, match="ADULT or CHILD"):
+            build_simulation(household_id=HOUSEHOLD_ID, role=np.array([0, 1, 2, 0]))
+        with pytest.raises(ValueError, match="Give a period"):
+            build_simulation(household_id=HOUSEHOLD_ID, inputs=INPUTS)
@@ -0,0 +1,98 @@
+"""Test parameter sweeps."""
+
+import numpy as np
+import pytest
+from policyengine_ie.reforms import baseline_system
+from policyengine_ie.structure import build_simulation
+from policyengine_ie.sweep import affected_variables, parameter_sweep
+
+
+USC_BAND_3 = "gov.revenue.usc.rates.band_3"
+
+EARNINGS = np.array([20_000, 50_000, 90_000, 0])
+
+IS_RENTING = np.array([True, False, True, False])
+
+
+def simulation(reform=None):
+    return build_simulation(
+        household_id=np.arange(4),
+        inputs={
+            "age": np.full(4, 40),
+            "employment_income": EARNINGS,
+            "is_renting": IS_RENTING,
+        },
+        period="2025",
+        reform=reform,
+    )
+
+
+class TestParameterSweep:
+    """Test cases for sweeping one parameter over several values."""
+
+    def test_sweep_matches_reformed_simulations(self):
+        """Test that each swept value gives the reformed simulation's values,
+        and the simulation swept keeps its own."""
+        baseline = simulation()
+        usc = baseline.calculate("usc", "2025").copy()
+        rates = [0.03, 0.05]
+
+        sweep = parameter_sweep(
+            baseline, USC_BAND_3, rates, ["usc", "household_net_income"], "2025"
+        )
+
+        assert sweep.results["usc"].shape == (2, 4)
+        for index, rate in enumerate(rates):
+            reformed = simulation({USC_BAND_3: {"2025": rate}})
+            for variable, results in sweep.results.items():
+                np.testing.assert_allclose(
+                    results[index], reformed.calculate(variable, "2025")
+                )
+        assert sweep.total_change("usc")[1] == pytest.approx(
+            0.01 * (50_000 - 25_760) + 0.01 * (70_044 - 25_760), rel=1e-4
+        )
+        np.testing.assert_array_equal(baseline.calculate("usc", "2025"), usc)
+
+    @pytest.mark.parametrize(
+        "parameter, values",
+        [
+            ("gov.revenue.income_tax.credits.personal.single", [2_000, 3_000]),
+            ("gov.revenue.income_tax.credits.rent.single", [0, 1_500]),
+        ],
+    )
+    def test_sweep_of_credits_read_through_a_helper(self, parameter, values):
+        """Test that parameters formulas pass on as part of a parent node,
+        such as the credits read by ``assessed_credits``, are swept."""
+        sweep = parameter_sweep(
+            simulation(), parameter, values, ["income_tax_net"], "2025"
+        )
+        for index, value in enumerate(values):
+            reformed = simulation({parameter: {"2025": value}})
+            np.testing.assert_allclose(
+                sweep.results["income_tax_net"][index],
+                reformed.calculate("income_tax_net", "2025"),
+            )
+        assert sweep.total_change("income_tax_net")[0] != pytest.approx(
+            sweep.total_change("income_tax_net")[1]
+        )
+
+    def test_only_dependent_variables_are_recalculated(self):
+        """Test that a benefit rate does not affect taxes."""
+        affected = affected_variables(
+            baseline_system(), "gov.dsp.jobseekers.rates.age_25_plus"
+        )
+        assert "jobseekers_allowance" in affected
+        assert "household_net_income" in affected
+        assert "usc" not in affected
+
+    def test_unread_parameter_is_refused(self):
+        """Test that sweeping a parameter no formula reads fails rather than
+        returning the baseline for every value."""
+        with pytest.raises(ValueError, match="No formula reads"):
+            parameter_sweep(
+                simulation(),
+                "gov.dsp.jobseekers.rates.personal_rate",
+                [250, 260],
+                ["jobseekers_allowance"],
+                "2025",
+            )
@@ -78,3 +78,31 @@ class TestIrishTaxBenefitSystem:
         # Check that basic inputs are in the system's basic_inputs list
         for input_var in expected_inputs:
             assert input_var in system.basic_inputs
+
+    def test_calculate_many(self):
+        """Test that one sweep returns the aggregate and its components."""
+        from policyengine_ie import Simulation as IrishSimulation
+
+        simulation = IrishSimulation(
+            situation={
+                "people": {
+                    "person_1": {
+                        "age": {"2024": 35},
+                        "employment_income": {"2024": 50000},
+                    },
+                    "person_2": {"age": {"2024": 8}},
+                },
+                "households": {"household_1": {"members": ["person_1", "person_2"]}},
+            },
+        )
+        results = simulation.calculate_many(
+            ["usc", "household_net_income", "child_benefit"],
+            2024,
+            map_to="household",
+        )
+        assert list(results) == ["usc", "household_net_income", "child_benefit"]
+        assert results["usc"][0] == pytest.approx(1304.62)
+        assert results["child_benefit"][0] == pytest.approx(2208)
+        assert results["household_net_income"][0] == pytest.approx(
+            50000 + 2208 - simulation.calculate("household_tax", 2024)[0]
+        )
@@ -0,0 +1,72 @@
+"""Test uprating parameters past their last legislated value."""
+
+import pytest
+from policyengine_ie import IrishTaxBenefitSystem
+from policyengine_ie.cache import parameter_hash
+from policyengine_ie.reforms import ParametricReform
+from policyengine_ie.system import Simulation
+from policyengine_ie.uprating import indexation_rules, uprate_parameters
+
+
+PERSONAL_RATE = "gov.dsp.jobseekers.rates.personal_rate"
+
+
+@pytest.fixture(scope="module")
+def system():
+    return IrishTaxBenefitSystem()
+
+
+class TestUprating:
+    """Test cases for indexation rules and lazily extended parameters."""
+
+    def test_every_parameter_has_a_rule(self, system):
+        """Test that no parameter is left to hold its last value silently."""
+        missing = [
+            name
+            for name, rule in indexation_rules(system).items()
+            if rule is None and not name.startswith("gov.abolitions.")
+        ]
+        assert missing == []
+
+    def test_indexed_and_frozen_parameters(self, system):
+        """Test that parameters are uprated with their index or held."""
+        parameters = system.get_parameters_at_instant("2027-01-01")
+
+        # 256 in 2025, with the CPI forecasts, to the nearest 10 cents
+        assert parameters.gov.dsp.jobseekers.rates.personal_rate == 266.1
+        assert parameters.gov.dsp.child_benefit.rates.twins_multiplier == 1.5
+        assert parameters.gov.revenue.income_tax.bands.single == 44_000
+        # Legislated values are kept
+        legislated = system.get_parameters_at_instant("2025-01-01")
+        assert legislated.gov.dsp.jobseekers.rates.personal_rate == 256
+
+    def test_calculations_uprate_the_system(self):
+        """Test that a simulation extends its system's parameters and that
+        uprated values are not part of the parameter hash."""
+        system = IrishTaxBenefitSystem()
+        legislated_hash = parameter_hash(system)
+        simulation = Simulation(
+            tax_benefit_system=system,
+            situation={"people": {"you": {"age": {"2028": 40}}}},
+        )
+
+        simulation.calculate("jobseekers_allowance", "2028")
+
+        assert system.parameters.get_child(PERSONAL_RATE)("2028-01-01") == 271.5
+        assert parameter_hash(system) == legislated_hash
+
+    def test_reformed_values_are_uprated(self, system):
+        """Test that a reform is uprated from its own value."""
+        uprate_parameters(system, 2028)
+        reformed = system.clone()
+        ParametricReform({PERSONAL_RATE: {"2026": 300}}).apply(reformed)
+
+        uprate_parameters(reformed, 2027)
+        parameter = reformed.parameters.get_child(PERSONAL_RATE)
+        assert parameter("2026-01-01") == 300
+        assert parameter("2027-01-01") == pytest.approx(305.9)
+
+    def test_years_past_the_forecasts_are_refused(self, system):
+        """Test that uprating past the indices raises an error."""
+        with pytest.raises(ValueError, match="cpi index has no value for 2031"):
+            system.get_parameters_at_instant("2031-01-01")
@@ -0,0 +1,62 @@
+"""Test differential testing against a reference calculator."""
+
+import numpy as np
+from policyengine_ie.validation import (
+    differential_test,
+    select_household,
+    shrink_household,
+    synthetic_population,
+)
+
+
+USC_BANDS = [(12_012, 0.005), (25_760, 0.02), (70_044, 0.04), (np.inf, 0.08)]
+
+
+def usc_reference(band_3_rate=0.04):
+    """USC for 2025 under 70 without a medical card, written separately."""
+
+    def reference(people, period):
+        income = people["employment_income"].astype(float)
+        usc, lower = np.zeros_like(income), 0
+        for upper, rate in USC_BANDS:
+            if upper == 70_044:
+                rate = band_3_rate
+            usc += rate * np.clip(income - lower, 0, upper - lower)
+            lower = upper
+        return {"usc": np.where(income <= 13_000, 0, usc)}
+
+    return reference
+
+
+class TestValidation:
+    """Test cases for comparing with a reference and shrinking failures."""
+
+    def test_matching_reference_passes(self):
+        """Test that an agreeing reference gives no mismatches, across chunks."""
+        population = synthetic_population(500, seed=1)
+
+        report = differential_test(
+            usc_reference(), ["usc"], population, "2025", chunk_size=300
+        )
+
+        assert report.passed
+        assert report.variables["usc"].compared == len(population["age"])
+
+    def test_mismatches_are_bucketed_and_shrunk(self):
+        """Test that mismatches are counted by bucket and a failing household
+        shrinks to one adult."""
+        population = synthetic_population(500, seed=1)
+        reference = usc_reference(band_3_rate=0.045)
+
+        report = differential_test(reference, ["usc"], population, "2025")
+
+        usc = report.variables["usc"]
+        assert not report.passed
+        # Only incomes well into the third band differ by more than €1
+        assert usc.bucket_mismatches[0] == 0
+        assert usc.bucket_mismatches[2:].sum() == usc.bucket_compared[2:].sum()
+        household = select_household(population, usc.examples[0])
+        minimal = shrink_household(reference, "usc", household, "2025")
+        assert len(minimal["household_id"]) == 1
+        assert minimal["age"][0] == 40
+        assert not differential_test(reference, ["usc"], minimal, "2025").passed
@@ -0,0 +1,75 @@
+"""Test the formula vectorization checks."""
+
+import numpy as np
+import pytest
+from policyengine_ie.model_api import YEAR, Person, Variable
+from policyengine_ie.reforms import baseline_system
+from policyengine_ie.structure import build_simulation
+from policyengine_ie.vectorization import check_formulas, strict_vectorization
+
+
+class taxed_income(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Taxed income"
+
+    def formula(person, period, parameters):
+        income = person("employment_income", period, options=[0])
+        age = person("age", period)
+        prsi_class = person("prsi_class", period)
+        unused = person("investment_income", period)
+        taxed = np.zeros(len(income))
+        if income > 10_000 and prsi_class == "A":
+            taxed = income * 0.2
+        for value in income:
+            taxed += 0
+        return [0 if a < 18 else t for a, t in zip(age, taxed)]
+
+
+def system():
+    system = baseline_system().clone()
+    system.add_variable(taxed_income)
+    return system
+
+
+class TestVectorization:
+    """Test cases for the source checks and strict vectorization mode."""
+
+    def test_gov_formulas_are_vectorized(self):
+        """Test that every formula under variables/gov passes the checks."""
+        assert check_formulas(baseline_system()) == []
+
+    def test_unvectorized_patterns_are_found(self):
+        """Test that each pattern is reported on its line."""
+        issues = check_formulas(system(), ["taxed_income"])
+
+        found = {(issue.rule, issue.line - issues[0].line) for issue in issues}
+        assert found == {
+            ("ignored-options", 0),
+            ("object-dtype", 2),
+            ("unused-lookup", 3),
+            ("float64-upcast", 4),
+            ("scalar-branch", 5),
+            ("element-loop", 7),
+            ("element-loop", 9),
+        }
+
+    def test_strict_mode_fails_branching_on_one_person(self):
+        """Test that an 'if' on an array, which works for one person, fails
+        under strict vectorization."""
+
+        def simulation():
+            return build_simulation(
+                household_id=np.arange(1),
+                inputs={"age": np.array([40]), "employment_income": [20_000]},
+                period="2025",
+                tax_benefit_system=system(),
+            )
+
+        assert simulation().calculate("taxed_income", "2025")[0] == 4_000
+        with strict_vectorization():
+            with pytest.raises(ValueError, match="strict vectorization"):
+                simulation().calculate("taxed_income", "2025")
+            # Vectorized formulas are unaffected
+            assert simulation().calculate("usc", "2025")[0] > 0
@@ -0,0 +1,215 @@
+"""
+Uprating parameters past their last legislated value.
+
+Parameters are legislated a budget at a time, so their values stop at the
+latest budget. Each parameter file says how its parameters carry on from
+there with an ``indexation`` rule in its metadata, which a parameter's own
+metadata can override:
+
+- ``frozen``: the last value holds, as when a budget changes nothing.
+- ``cpi`` or ``earnings``: the last value rises each year with the consumer
+  price index or average earnings in ``gov.economic_assumptions.indices``.
+  The dict form ``{index: cpi, rounding: 0.1}`` also rounds each year's
+  value to the nearest multiple of ``rounding``.
+- ``none``: never extended. Used for the indices themselves.
+
+Uprated values are added lazily. The first calculation for a year adds a
+value from the first of January of that year (and of any year skipped
+before it) to every indexed parameter whose values stop earlier, and later
+calculations for that year or earlier find them already there. Legislated
+values are never replaced. A numeric parameter with no rule, or an index
+with no value for the year, raises an error rather than silently holding
+the last value, so projecting past the indices' forecasts means adding
+forecasts first.
+
+Parametric reforms change the legislated values, and the reformed system
+extends its own, so a reformed rate is uprated from its new value.
+"""
+
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from policyengine_core.parameters import (
+    Parameter,
+    ParameterAtInstant,
+    ParameterNode,
+    ParameterScale,
+)
+
+
+FROZEN = "frozen"
+NONE = "none"
+
+INDICES = {
+    "cpi": "gov.economic_assumptions.indices.cpi",
+    "earnings": "gov.economic_assumptions.indices.earnings",
+}
+
+RULES = (FROZEN, NONE, *INDICES)
+
+# Metadata key marking values added by uprating rather than legislated
+UPRATED = "uprated"
+
+Rule = Union[str, dict, None]
+
+
+@dataclass
+class _Extension:
+    """Indexed parameters of one parameter tree and how far they reach."""
+
+    root: ParameterNode
+    # (parameter, index or None for no rule, rounding, last legislated year)
+    parameters: List[Tuple[Parameter, Optional[str], Optional[float], int]]
+    through: int
+    index_values: Dict[Tuple[str, int], float] = field(default_factory=dict)
+
+
+def _walk(node, rule: Rule = None) -> Iterator[Tuple[Parameter, Rule]]:
+    rule = node.metadata.get("indexation", rule)
+    if isinstance(node, Parameter):
+        yield node, rule
+    elif isinstance(node, ParameterScale):
+        for bracket in node.brackets:
+            yield from _walk(bracket, rule)
+    elif isinstance(node, ParameterNode):
+        for child in node.children.values():
+            yield from _walk(child, rule)
+
+
+def _parse_rule(name: str, rule: Rule) -> Tuple[Optional[str], Optional[float]]:
+    if rule is None:
+        return None, None
+    index, rounding = (
+        (rule.get("index"), rule.get("rounding"))
+        if isinstance(rule, dict)
+        else (rule, None)
+    )
+    if index not in RULES:
+        raise ValueError(
+            f"Parameter '{name}' has indexation '{index}'; "
+            f"use one of {', '.join(RULES)}."
+        )
+    return index, rounding
+
+
+def indexation_rules(system) -> Dict[str, Rule]:
+    """The indexation rule of every parameter, ``None`` where it has none."""
+    return {
+        parameter.name: rule
+        for parameter, rule in _walk(system.parameters.get_child("gov"))
+    }
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _clear_caches(system) -> None:
+    root = system.parameters
+    for node in [root, *root.get_descendants()]:
+        if isinstance(node, ParameterNode):
+            node._at_instant_cache.clear()
+    system._parameters_at_instant_cache = {}
+
+
+def clear_uprating(system) -> None:
+    """Remove uprated values from a system's parameters, leaving the
+    legislated ones to be uprated again when next needed."""
+    if system.parameters is None:
+        return
+    for parameter, _ in _walk(system.parameters):
+        parameter.values_list = [
+            value for value in parameter.values_list if not value.metadata.get(UPRATED)
+        ]
+    system.__dict__.pop("_uprating", None)
+    _clear_caches(system)
+
+
+def _extension(system) -> _Extension:
+    extension = system.__dict__.get("_uprating")
+    if extension is not None and extension.root is system.parameters:
+        return extension
+    if extension is not None:
+        # A clone shares its original's record but holds copies of its
+        # uprated values, which are rebuilt for the clone's own parameters
+        clear_uprating(system)
+    parameters = []
+    for parameter, rule in _walk(system.parameters):
+        index, rounding = _parse_rule(parameter.name, rule)
+        if index in (FROZEN, NONE) or not parameter.values_list:
+            continue
+        last = parameter.values_list[0]
+        if not _is_number(last.value):
+            continue
+        parameters.append((parameter, index, rounding, int(last.instant_str[:4])))
+    through = min((last_year for *_, last_year in parameters), default=9999)
+    extension = _Extension(system.parameters, parameters, through)
+    system._uprating = extension
+    return extension
+
+
+def _index_value(system, extension: _Extension, index: str, year: int) -> float:
+    key = (index, year)
+    if key not in extension.index_values:
+        values = system.parameters.get_child(INDICES[index]).values_list
+        value = next(
+            (v.value for v in values if v.instant_str.startswith(f"{year}-")), None
+        )
+        if value is None:
+            raise ValueError(
+                f"The {index} index has no value for {year} to uprate "
+                f"parameters with; add one to {INDICES[index]}."
+            )
+        extension.index_values[key] = value
+    return extension.index_values[key]
+
+
+def uprate_parameters(system, year: int) -> None:
+    """
+    Extend every indexed parameter of a system to a year, if not already.
+
+    Args:
+        system: Tax-benefit system to extend, in place.
+        year: Year to extend parameters to.
+    """
+    extension = system.__dict__.get("_uprating")
+    if (
+        extension is not None
+        and extension.root is system.parameters
+        and year <= extension.through
+    ) or system.parameters is None:
+        return
+    extension = _extension(system)
+    if year <= extension.through:
+        return
+    # Every value is worked out before any is added, so an error leaves
+    # the parameters as they were
+    uprated = []
+    for parameter, index, rounding, last_year in extension.parameters:
+        start = max(last_year, extension.through) + 1
+        if start > year:
+            continue
+        if index is None:
+            raise ValueError(
+                f"Parameter '{parameter.name}' has no value for {start} and no "
+                "indexation rule to uprate it with."
+            )
+        value = parameter.values_list[0].value
+        for value_year in range(start, year + 1):
+            value *= _index_value(system, extension, index, value_year)
+            value /= _index_value(system, extension, index, value_year - 1)
+            if rounding:
+                value = round(round(value / rounding) * rounding, 10)
+            uprated.append((parameter, f"{value_year}-01-01", value))
+    for parameter, instant_str, value in uprated:
+        parameter.values_list.insert(
+            0,
+            ParameterAtInstant(
+                f"{parameter.name}.{instant_str}",
+                instant_str,
+                data={"value": value},
+                metadata={UPRATED: True},
+            ),
+        )
+    extension.through = year
+    _clear_caches(system)
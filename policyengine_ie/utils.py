@@ -0,0 +1,165 @@
+"""
+Helper functions shared by Irish variable formulas.
+
+Formulas receive parameters at the start of the period they are calculated
+for. Some Irish parameters change part-way through a calendar year (the
+October 2024 PRSI increase, for example), so these helpers describe how a
+year divides into the sub-periods over which a set of parameters is constant.
+
+The income tax helpers give each person's assessed income, standard rate
+band and credits under an assessment basis. The variables of the chosen
+basis and the search for the cheapest basis share them. ``band_amounts``
+looks up rate bands such as the State Pension yearly average bands.
+"""
+
+from datetime import date, timedelta
+from typing import List, Tuple
+
+import numpy as np
+from numpy import maximum as max_, minimum as min_, select, where
+
+
+def intra_year_segments(period, *parameters) -> Tuple[List[str], np.ndarray]:
+    """
+    Split a period into the sub-periods over which parameters are constant.
+
+    Args:
+        period: The period being calculated (usually a year).
+        *parameters: Parameter nodes (not values at an instant) whose
+            changes should start a new sub-period.
+
+    Returns:
+        The start instant of each sub-period as an ISO date string, and the
+        share of the period's days that each sub-period covers. The shares
+        sum to one.
+    """
+    start = period.start.date
+    stop = period.stop.date + timedelta(days=1)
+    boundaries = {start}
+    for parameter in parameters:
+        for value_at_instant in parameter.values_list:
+            change = date.fromisoformat(value_at_instant.instant_str)
+            if start < change < stop:
+                boundaries.add(change)
+    boundaries = sorted(boundaries) + [stop]
+    days = np.array(
+        [(end - begin).days for begin, end in zip(boundaries[:-1], boundaries[1:])],
+        dtype=float,
+    )
+    starts = [boundary.isoformat() for boundary in boundaries[:-1]]
+    return starts, days / days.sum()
+
+
+def parameter_values(parameter, instants: List[str]) -> np.ndarray:
+    """
+    Look up a parameter at each of several instants.
+
+    Args:
+        parameter: A parameter node.
+        instants: ISO date strings, as returned by ``intra_year_segments``.
+
+    Returns:
+        The parameter's value at each instant.
+    """
+    return np.array([parameter(instant) for instant in instants], dtype=float)
+
+
+# Income tax assessment bases, as indices of the IncomeTaxAssessment enum.
+# Where bases give the same tax, the first is chosen
+JOINT_ASSESSMENT, SEPARATE_ASSESSMENT, SINGLE_ASSESSMENT = 0, 1, 2
+ASSESSMENT_BASES = (JOINT_ASSESSMENT, SEPARATE_ASSESSMENT, SINGLE_ASSESSMENT)
+
+
+def banded_income_tax(income, band, standard_rate: float, higher_rate: float):
+    """Income tax before credits: the standard rate up to the band, the
+    higher rate above it."""
+    return min_(income, band) * standard_rate + max_(0, income - band) * higher_rate
+
+
+def assessed_income(basis, is_spouse, is_assessable, taxable_income, couple_income):
+    """
+    Income each person is assessed on under an assessment basis.
+
+    Under joint assessment the assessable spouse is assessed on the couple's
+    income and the other spouse on none. ``basis`` may have shape
+    ``(bases, 1)`` to assess everyone under several bases at once.
+    """
+    joint = (basis == JOINT_ASSESSMENT) & is_spouse
+    return where(joint, where(is_assessable, couple_income, 0), taxable_income)
+
+
+def assessed_band(
+    basis,
+    is_spouse,
+    is_assessable,
+    has_child_carer_credit,
+    spouse_income,
+    bands,
+):
+    """
+    Standard rate band of each person under an assessment basis.
+
+    Joint assessment gives the assessable spouse the married band, increased
+    by the other spouse's income up to a limit. Otherwise each person has
+    the single band, or the single parent's band with the Child Carer
+    Credit if they are not a spouse.
+    """
+    joint = (basis == JOINT_ASSESSMENT) & is_spouse
+    single_band = where(
+        has_child_carer_credit & ~is_spouse, bands.single_with_child, bands.single
+    )
+    joint_band = bands.married_one_income + min_(
+        bands.married_max_increase, max_(0, spouse_income)
+    )
+    return where(joint, where(is_assessable, joint_band, 0), single_band)
+
+
+def assessed_credits(
+    basis,
+    is_spouse,
+    is_assessable,
+    own_credits,
+    couple_credits,
+    is_renting,
+    couple_is_renting,
+    credits,
+):
+    """
+    Income tax credits of each person under an assessment basis.
+
+    ``own_credits`` are the person's PAYE and age credits and
+    ``couple_credits`` the sum of both spouses'. Joint assessment gives the
+    assessable spouse the married personal and rent credits and both
+    spouses' own credits. Separate assessment splits the married personal
+    and rent credits equally. Single assessment gives single credits.
+    """
+    joint = (basis == JOINT_ASSESSMENT) & is_spouse
+    separate = (basis == SEPARATE_ASSESSMENT) & is_spouse
+    personal_and_rent = select(
+        [joint, separate],
+        [
+            credits.personal.married
+            + where(couple_is_renting, credits.rent.married, 0),
+            (credits.personal.married + where(is_renting, credits.rent.married, 0)) / 2,
+        ],
+        default=credits.personal.single + where(is_renting, credits.rent.single, 0),
+    )
+    return where(
+        joint,
+        where(is_assessable, personal_and_rent + couple_credits, 0),
+        personal_and_rent + own_credits,
+    )
+
+
+def band_amounts(values, scale) -> np.ndarray:
+    """
+    Amount of the band of a single-amount scale each value falls in.
+
+    Bands are found with one binary search over the scale's thresholds, so
+    the cost does not grow with the number of bands. Values below the first
+    threshold get zero.
+    """
+    thresholds = np.asarray(scale.thresholds, dtype=float)
+    amounts = np.asarray(scale.amounts, dtype=float)
+    band = np.searchsorted(thresholds, values, side="right") - 1
+    return where(band >= 0, amounts[max_(band, 0)], 0)
@@ -0,0 +1,359 @@
+"""
+Differential testing against a reference calculator.
+
+A reference calculator is any Python callable taking a population of people
+as a dict of flat arrays and a period, and returning each compared
+variable's value for each person::
+
+    def reference(people, period):
+        return {"usc": legacy_usc(people["employment_income"], people["age"])}
+
+    population = synthetic_population(1_000_000)
+    report = differential_test(reference, ["usc"], population, "2025")
+    print(report.summary())
+
+A population has ``household_id`` (people of a household next to each
+other), optional ``tax_unit_id`` (defaults to the household), ``role``
+(``ADULT`` or ``CHILD``) and one array per person-level input variable.
+The model is run on it in chunks of whole households, each built in bulk
+(see ``policyengine_ie.structure``) and calculated with the intermediates
+dropped as they go (see ``policyengine_ie.plan``), and the reference is
+called on the same chunks. Values of group variables, such as
+``household_net_income``, are compared for every member.
+
+A person's value mismatches when it differs from the reference by more than
+``tolerance`` euros, or the reference gives NaN. Mismatches are counted by
+variable and by bucket of a bucketing variable (employment income by
+default), with example households. ``shrink_household`` reduces a failing
+household to a minimal one that still fails: fewer people and simpler
+values, trying every candidate reduction in one batched run per step.
+"""
+
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+from policyengine_ie.plan import execution_plan, run_plan
+from policyengine_ie.structure import ADULT, CHILD, build_simulation
+
+
+Reference = Callable[[Dict[str, np.ndarray], str], Dict[str, np.ndarray]]
+
+STRUCTURE = ("household_id", "tax_unit_id", "role")
+
+DEFAULT_TOLERANCE = 1.0
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+DEFAULT_BUCKET_VARIABLE = "employment_income"
+
+# Lower edges of the default buckets, in euros of employment income
+DEFAULT_BUCKETS = (0, 20_000, 40_000, 60_000, 100_000)
+
+# Failing households kept as examples for each variable
+MAX_EXAMPLES = 10
+
+# Shrinking sets people's ages to these, rather than trying every age
+SIMPLE_AGES = {ADULT: 40, CHILD: 10}
+
+
+@dataclass
+class VariableReport:
+    """Comparison of one variable with the reference."""
+
+    variable: str
+    bucket_labels: List[str]
+    bucket_compared: np.ndarray
+    bucket_mismatches: np.ndarray
+    max_difference: float = 0.0
+    examples: List = field(default_factory=list)
+
+    @property
+    def compared(self) -> int:
+        return int(self.bucket_compared.sum())
+
+    @property
+    def mismatches(self) -> int:
+        return int(self.bucket_mismatches.sum())
+
+
+@dataclass
+class ValidationReport:
+    """Comparison of every variable with the reference."""
+
+    variables: Dict[str, VariableReport]
+
+    @property
+    def passed(self) -> bool:
+        return all(report.mismatches == 0 for report in self.variables.values())
+
+    def summary(self) -> str:
+        """A plain-text table of mismatches by variable and bucket."""
+        lines = []
+        for report in self.variables.values():
+            lines.append(
+                f"{report.variable}: {report.mismatches:,} of "
+                f"{report.compared:,} people mismatch, largest difference "
+                f"{report.max_difference:,.2f}"
+            )
+            for label, compared, mismatches in zip(
+                report.bucket_labels,
+                report.bucket_compared,
+                report.bucket_mismatches,
+            ):
+                lines.append(f"  {label:>20}: {mismatches:,} of {compared:,}")
+            if report.examples:
+                examples = ", ".join(str(example) for example in report.examples)
+                lines.append(f"  Example households: {examples}")
+        return "\n".join(lines)
+
+
+def synthetic_population(households: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    A random population of single adults and couples with up to three
+    children, with ages and employment income.
+
+    Args:
+        households: Number of households.
+        seed: Random seed.
+    """
+    rng = np.random.default_rng(seed)
+    adults = rng.choice([1, 2], households, p=[0.45, 0.55])
+    children = rng.choice([0, 1, 2, 3], households, p=[0.5, 0.2, 0.2, 0.1])
+    size = adults + children
+    count = int(size.sum())
+    household_id = np.repeat(np.arange(households), size)
+    starts = np.cumsum(size) - size
+    position = np.arange(count) - np.repeat(starts, size)
+    is_adult = position < np.repeat(adults, size)
+
+    age = np.where(is_adult, rng.integers(18, 86, count), rng.integers(0, 18, count))
+    earns = is_adult & (age < 66) & (rng.random(count) < 0.75)
+    employment_income = np.where(earns, np.round(rng.lognormal(10.4, 0.7, count)), 0)
+    return {
+        "household_id": household_id,
+        "role": np.where(is_adult, ADULT, CHILD),
+        "age": age,
+        "employment_income": employment_income,
+    }
+
+
+def _bucket_labels(edges: Sequence[float]) -> List[str]:
+    labels = [f"€{low:,.0f}–{high:,.0f}" for low, high in zip(edges, edges[1:])]
+    return labels + [f"€{edges[-1]:,.0f}+"]
+
+
+def _take(people: Dict[str, np.ndarray], rows) -> Dict[str, np.ndarray]:
+    return {name: np.asarray(values)[rows] for name, values in people.items()}
+
+
+def _chunks(people: Dict[str, np.ndarray], chunk_size: int):
+    """Slices of about ``chunk_size`` people, not splitting households."""
+    household_id = np.asarray(people["household_id"])
+    count = len(household_id)
+    starts = np.flatnonzero(np.r_[True, household_id[1:] != household_id[:-1]])
+    start = 0
+    while start < count:
+        # First household starting at or after the chunk's nominal end
+        index = np.searchsorted(starts, start + chunk_size)
+        stop = starts[index] if index < len(starts) else count
+        yield _take(people, slice(start, stop))
+        start = stop
+
+
+def _differences(
+    reference: Reference,
+    variables: List[str],
+    people: Dict[str, np.ndarray],
+    period: str,
+    reform=None,
+) -> Dict[str, np.ndarray]:
+    """Absolute difference between the model and the reference for each
+    person, infinite where the reference gives NaN."""
+    inputs = {name: values for name, values in people.items() if name not in STRUCTURE}
+    simulation = build_simulation(
+        household_id=people["household_id"],
+        tax_unit_id=people.get("tax_unit_id"),
+        role=people.get("role"),
+        inputs=inputs,
+        period=period,
+        reform=reform,
+    )
+    plan = execution_plan(simulation.tax_benefit_system, variables, provided=inputs)
+    model = run_plan(simulation, plan, period, map_to="person")
+    expected = reference(people, period)
+    differences = {}
+    for variable in variables:
+        difference = np.abs(
+            np.asarray(model[variable], dtype=float)
+            - np.asarray(expected[variable], dtype=float)
+        )
+        differences[variable] = np.where(np.isnan(difference), np.inf, difference)
+    return differences
+
+
+def differential_test(
+    reference: Reference,
+    variables: Sequence[str],
+    population: Dict[str, np.ndarray],
+    period: str,
+    tolerance: float = DEFAULT_TOLERANCE,
+    bucket_variable: str = DEFAULT_BUCKET_VARIABLE,
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    reform=None,
+) -> ValidationReport:
+    """
+    Compare the model with a reference calculator over a population.
+
+    Args:
+        reference: Reference calculator.
+        variables: Variables to compare.
+        population: People, as flat arrays.
+        period: Period to calculate.
+        tolerance: Largest difference, in euros, that is not a mismatch.
+        bucket_variable: Person input to bucket people by.
+        buckets: Lower edges of the buckets, ascending.
+        chunk_size: People to calculate at a time.
+        reform: Optional reform to run the model with.
+
+    Returns:
+        Mismatches by variable and bucket.
+    """
+    variables = list(variables)
+    if bucket_variable not in population:
+        raise ValueError(f"The population has no '{bucket_variable}' to bucket by.")
+    labels = _bucket_labels(buckets)
+    reports = {
+        variable: VariableReport(
+            variable,
+            labels,
+            np.zeros(len(labels), dtype=np.int64),
+            np.zeros(len(labels), dtype=np.int64),
+        )
+        for variable in variables
+    }
+    for people in _chunks(population, chunk_size):
+        codes = np.clip(
+            np.searchsorted(buckets, people[bucket_variable], side="right") - 1,
+            0,
+            len(labels) - 1,
+        )
+        differences = _differences(reference, variables, people, period, reform)
+        for variable, difference in differences.items():
+            report = reports[variable]
+            mismatch = difference > tolerance
+            report.bucket_compared += np.bincount(codes, minlength=len(labels))
+            report.bucket_mismatches += np.bincount(
+                codes[mismatch], minlength=len(labels)
+            )
+            report.max_difference = max(
+                report.max_difference, float(difference.max(initial=0))
+            )
+            room = MAX_EXAMPLES - len(report.examples)
+            if room > 0:
+                failing = np.unique(people["household_id"][mismatch])
+                report.examples += failing[:room].tolist()
+    return ValidationReport(reports)
+
+
+def select_household(population: Dict[str, np.ndarray], household_id) -> dict:
+    """The members of one household of a population."""
+    return _take(population, np.asarray(population["household_id"]) == household_id)
+
+
+def _candidates(household: Dict[str, np.ndarray]) -> List[Dict[str, np.ndarray]]:
+    """Simpler versions of a household, simplest changes first."""
+    count = len(household["household_id"])
+    role = household.get("role", np.full(count, ADULT))
+    candidates = []
+    # Remove a child, or an adult if another adult remains
+    for person in reversed(range(count)):
+        if role[person] == CHILD or (role == ADULT).sum() > 1:
+            candidates.append(_take(household, np.arange(count) != person))
+    for name, values in household.items():
+        if name in STRUCTURE:
+            continue
+        for person in range(count):
+            value = values[person]
+            if name == "age" and "role" in household:
+                options = [SIMPLE_AGES[role[person]]]
+            else:
+                # Each option is smaller, so shrinking always ends
+                options = [0, np.floor(value / 2), np.floor(value / 1000) * 1000]
+            for option in dict.fromkeys(options):
+                if option != value:
+                    candidate = {key: array.copy() for key, array in household.items()}
+                    candidate[name][person] = option
+                    candidates.append(candidate)
+    return candidates
+
+
+def _concatenate(households: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+    people = {
+        name: np.concatenate([household[name] for household in households])
+        for name in households[0]
+    }
+    sizes = [len(household["household_id"]) for household in households]
+    people["household_id"] = np.repeat(np.arange(len(households)), sizes)
+    if "tax_unit_id" in people:
+        # Tax units are numbered apart from those of other households
+        people["tax_unit_id"] = np.unique(
+            np.stack([people["household_id"], people["tax_unit_id"]]),
+            axis=1,
+            return_inverse=True,
+        )[1].ravel()
+    return people
+
+
+def shrink_household(
+    reference: Reference,
+    variable: str,
+    household: Dict[str, np.ndarray],
+    period: str,
+    tolerance: float = DEFAULT_TOLERANCE,
+    reform=None,
+    max_steps: int = 100,
+) -> Dict[str, np.ndarray]:
+    """
+    Reduce a household the model and reference disagree on to a minimal one
+    they still disagree on.
+
+    Each step tries every simpler version of the household (with a person
+    removed, or one value set to zero, halved, rounded to the thousand or,
+    for ages, to a typical adult or child age) in one run, and keeps the
+    first that still fails, until none does.
+
+    Args:
+        reference: Reference calculator.
+        variable: Variable the household fails on.
+        household: The household's people, as from ``select_household``.
+        period: Period to calculate.
+        tolerance: As for ``differential_test``.
+        reform: Optional reform to run the model with.
+        max_steps: Most reductions to make.
+
+    Returns:
+        The minimal failing household, as one household of the same arrays.
+    """
+    household = _concatenate([household])
+    if not (
+        _differences(reference, [variable], household, period, reform)[variable]
+        > tolerance
+    ).any():
+        raise ValueError(f"The household does not fail on '{variable}'.")
+    for _ in range(max_steps):
+        candidates = _candidates(household)
+        if not candidates:
+            break
+        people = _concatenate(candidates)
+        mismatch = (
+            _differences(reference, [variable], people, period, reform)[variable]
+            > tolerance
+        )
+        failing = np.unique(people["household_id"][mismatch])
+        if not len(failing):
+            break
+        household = _concatenate([candidates[failing[0]]])
+    return household
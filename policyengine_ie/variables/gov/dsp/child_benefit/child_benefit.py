@@ -19,15 +19,30 @@ class child_benefit(Variable):
 
     def formula(person, period, parameters):
         age = person("age", period)
-        is_twin = person("is_twin", period, options=[False])
-        is_multiple_birth = person(
-            "is_multiple_birth", period, options=[False]
-        )  # Triplet or higher
+        is_twin = person("is_twin", period)
+        is_multiple_birth = person("is_multiple_birth", period)  # Triplet or higher
+
+        is_in_education = person("is_in_full_time_education", period)
 
         p = parameters(period).gov.dsp.child_benefit.rates
 
+        if jit.use_kernel("child_benefit"):
+            return jit.KERNELS["child_benefit"](
+                age,
+                is_in_education,
+                is_twin,
+                is_multiple_birth,
+                p.upper_age_limit,
+                p.upper_age_limit_education,
+                p.age_threshold_12,
+                p.child_under_12,
+                p.child_12_and_over,
+                p.twins_multiplier,
+                p.multiple_births_multiplier,
+                np.empty(len(age), dtype=float_type(person)),
+            )
+
         # Determine if eligible (under 18, or under 22 if in full-time education)
-        is_in_education = person("is_in_full_time_education", period, options=[False])
         eligible = logical_or(
             age < p.upper_age_limit,
             logical_and(age < p.upper_age_limit_education, is_in_education),
@@ -0,0 +1,61 @@
+"""Disability Allowance calculation."""
+
+from policyengine_ie.model_api import *
+
+
+class disability_allowance(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Disability Allowance"
+    documentation = """
+    Disability Allowance is a means-tested payment for people aged 16 to
+    State Pension age with a disability expected to last at least a year.
+    Weekly employment earnings up to a disregard are ignored, half of
+    earnings from there up to a limit are assessed, and all earnings above
+    it; other income is assessed in full. The personal rate is reduced by
+    each euro of weekly means. Living Alone and Island Allowances are added
+    while any allowance is payable.
+    """
+    unit = EUR
+    reference = "https://www.citizensinformation.ie/en/social-welfare/disability-and-illness/disability-allowance/"
+
+    def formula(person, period, parameters):
+        age = person("age", period)
+        is_disabled = person("is_disabled", period)
+        employment_income = person("employment_income", period)
+        other_income = (
+            person("self_employment_income", period)
+            + person("pension_income", period)
+            + person("investment_income", period)
+            + person("rental_income", period)
+        )
+        is_living_alone = person("is_living_alone", period)
+        is_island_resident = person("is_island_resident", period)
+
+        p = parameters(period).gov.dsp.disability
+
+        # Weekly means
+        weekly_earnings = employment_income / 52
+        disregard = p.means_test.earnings_disregard
+        limit = p.means_test.partial_disregard_limit
+        means = (
+            0.5 * min_(max_(0, weekly_earnings - disregard), limit - disregard)
+            + max_(0, weekly_earnings - limit)
+            + other_income / 52
+        )
+        personal_rate = max_(0, p.rates.personal_rate - means)
+        eligible = (
+            is_disabled
+            & (age >= p.rates.minimum_age)
+            & (age < p.rates.maximum_age)
+            & (personal_rate > 0)
+        )
+
+        weekly_payment = (
+            personal_rate
+            + where(is_living_alone, p.rates.living_alone_allowance, 0)
+            + where(is_island_resident, p.rates.island_allowance, 0)
+        )
+
+        return where(eligible, weekly_payment * 52, 0)
@@ -18,21 +18,16 @@ class jobseekers_allowance(Variable):
 
     def formula(person, period, parameters):
         age = person("age", period)
-        is_unemployed = person("is_unemployed", period, options=[False])
-        is_available_for_work = person("is_available_for_work", period, options=[True])
-        is_genuinely_seeking_work = person(
-            "is_genuinely_seeking_work", period, options=[True]
-        )
+        is_unemployed = person("is_unemployed", period)
+        is_available_for_work = person("is_available_for_work", period)
+        is_genuinely_seeking_work = person("is_genuinely_seeking_work", period)
 
         # Means test
-        assessable_income = person("assessable_income_jobseekers", period, options=[0])
         means_test_passed = person("jobseekers_means_test", period)
 
         # Living independently check for under 25s
-        is_living_independently = person(
-            "is_living_independently", period, options=[False]
-        )
-        has_housing_support = person("has_housing_support", period, options=[False])
+        is_living_independently = person("is_living_independently", period)
+        has_housing_support = person("has_housing_support", period)
 
         benefit_unit = person.benefit_unit
         qualified_adults = benefit_unit("qualified_adults_jobseekers", period)
@@ -40,6 +35,24 @@ class jobseekers_allowance(Variable):
 
         p = parameters(period).gov.dsp.jobseekers.rates
 
+        if jit.use_kernel("jobseekers_allowance"):
+            return jit.KERNELS["jobseekers_allowance"](
+                age,
+                is_unemployed
+                & is_available_for_work
+                & is_genuinely_seeking_work
+                & means_test_passed,
+                is_living_independently & has_housing_support,
+                qualified_adults,
+                qualified_children,
+                p.age_18_24_independent,
+                p.age_18_24,
+                p.age_25_plus,
+                p.qualified_adult,
+                p.qualified_child,
+                np.empty(len(age), dtype=float_type(person)),
+            )
+
         # Check basic eligibility
         eligible = logical_and(
             logical_and(is_unemployed, is_available_for_work),
@@ -0,0 +1,22 @@
+"""Yearly average PRSI contributions."""
+
+from policyengine_ie.model_api import *
+
+
+class prsi_yearly_average_contributions(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Yearly average PRSI contributions"
+    documentation = """
+    Paid and credited PRSI contributions divided by the years of insurance,
+    which sets the rate of State Pension (Contributory).
+    """
+    reference = "https://www.citizensinformation.ie/en/social-welfare/older-and-retired-people/state-pension-contributory/"
+
+    def formula(person, period, parameters):
+        paid = person("prsi_contributions", period)
+        credited = person("prsi_credited_contributions", period)
+        insured_years = person("prsi_insured_years", period)
+        contributions = paid + credited
+        return where(insured_years > 0, contributions / max_(insured_years, 1), 0)
@@ -0,0 +1,44 @@
+"""State Pension (Contributory) calculation."""
+
+from policyengine_ie.model_api import *
+
+
+class state_pension_contributory(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "State Pension (Contributory)"
+    documentation = """
+    State Pension (Contributory) is paid from State Pension age to people with
+    enough PRSI contributions. At least 520 contributions must have been paid,
+    and the share of the maximum personal rate paid depends on the band the
+    yearly average of paid and credited contributions falls in. Living Alone
+    and Island Allowances are added.
+    """
+    unit = EUR
+    reference = "https://www.citizensinformation.ie/en/social-welfare/older-and-retired-people/state-pension-contributory/"
+
+    def formula(person, period, parameters):
+        age = person("age", period)
+        paid_contributions = person("prsi_contributions", period)
+        yearly_average = person("prsi_yearly_average_contributions", period)
+        is_living_alone = person("is_living_alone", period)
+        is_island_resident = person("is_island_resident", period)
+
+        p = parameters(period).gov.dsp.state_pension
+
+        # Share of the maximum rate for the yearly average's band
+        share = band_amounts(yearly_average, p.contributions.yearly_average_bands)
+        eligible = (
+            (age >= p.rates.pension_age)
+            & (paid_contributions >= p.contributions.minimum_paid_contributions)
+            & (share > 0)
+        )
+
+        weekly_payment = (
+            p.rates.contributory.personal_rate * share
+            + where(is_living_alone, p.rates.living_alone_allowance, 0)
+            + where(is_island_resident, p.rates.island_allowance, 0)
+        )
+
+        return where(eligible, weekly_payment * 52, 0)
@@ -0,0 +1,57 @@
+"""State Pension (Non-Contributory) calculation."""
+
+from policyengine_ie.model_api import *
+
+
+class state_pension_non_contributory(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "State Pension (Non-Contributory)"
+    documentation = """
+    State Pension (Non-Contributory) is a means-tested payment from State
+    Pension age for people who do not qualify for State Pension
+    (Contributory). Weekly employment earnings up to a limit are disregarded;
+    the personal rate is reduced by each euro of other weekly means above a
+    disregard. Living Alone and Island Allowances are added while any
+    pension is payable.
+    """
+    unit = EUR
+    reference = "https://www.citizensinformation.ie/en/social-welfare/older-and-retired-people/state-pension-non-contributory/"
+
+    def formula(person, period, parameters):
+        age = person("age", period)
+        contributory = person("state_pension_contributory", period)
+        employment_income = person("employment_income", period)
+        other_income = (
+            person("self_employment_income", period)
+            + person("pension_income", period)
+            + person("investment_income", period)
+            + person("rental_income", period)
+        )
+        is_living_alone = person("is_living_alone", period)
+        is_island_resident = person("is_island_resident", period)
+
+        p = parameters(period).gov.dsp.state_pension
+
+        # Weekly means
+        means = (
+            max_(0, employment_income / 52 - p.means_test.earnings_disregard)
+            + other_income / 52
+        )
+        personal_rate = max_(
+            0,
+            p.rates.non_contributory.personal_rate
+            - max_(0, means - p.means_test.means_disregard),
+        )
+        eligible = (
+            (age >= p.rates.pension_age) & (contributory == 0) & (personal_rate > 0)
+        )
+
+        weekly_payment = (
+            personal_rate
+            + where(is_living_alone, p.rates.living_alone_allowance, 0)
+            + where(is_island_resident, p.rates.island_allowance, 0)
+        )
+
+        return where(eligible, weekly_payment * 52, 0)
@@ -0,0 +1,27 @@
+"""Income assessed to income tax under the chosen assessment basis."""
+
+from policyengine_ie.model_api import *
+
+
+class assessed_taxable_income(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Assessed taxable income"
+    documentation = """
+    Taxable income on which the person is charged income tax. Under joint
+    assessment the assessable spouse is charged on both spouses' taxable
+    income and the other spouse on none; otherwise it is the person's own.
+    """
+    unit = EUR
+    reference = "https://www.revenue.ie/en/personal-tax-credits-reliefs-and-exemptions/marital-status/joint-assessment/index.aspx"
+
+    def formula(person, period, parameters):
+        basis = np.asarray(person.tax_unit("income_tax_assessment", period))
+        is_spouse = person("is_spouse", period)
+        is_assessable = person("is_assessable_spouse", period)
+        taxable_income = person("taxable_income", period)
+        couple_income = person.tax_unit.sum(taxable_income * is_spouse)
+        return assessed_income(
+            basis, is_spouse, is_assessable, taxable_income, couple_income
+        )
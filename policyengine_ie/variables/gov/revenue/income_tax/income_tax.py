@@ -17,7 +17,7 @@ class income_tax(Variable):
     reference = "https://www.revenue.ie/en/personal-tax-credits-reliefs-and-exemptions/tax-relief-charts/index.aspx"
 
     def formula(person, period, parameters):
-        taxable_income = person("taxable_income", period)
+        taxable_income = person("assessed_taxable_income", period)
         standard_rate_band = person("standard_rate_band", period)
 
         p = parameters(period).gov.revenue.income_tax
@@ -25,15 +25,15 @@ class income_tax(Variable):
         standard_rate = p.rates.standard_rate
         higher_rate = p.rates.higher_rate
 
-        # Calculate tax
         # Standard rate on income up to standard rate band
-        standard_rate_income = min_(taxable_income, standard_rate_band)
-        standard_rate_tax = standard_rate_income * standard_rate
+        total_income_tax = min_(taxable_income, standard_rate_band)
+        total_income_tax *= standard_rate
 
         # Higher rate on income above standard rate band
-        higher_rate_income = max_(0, taxable_income - standard_rate_band)
-        higher_rate_tax = higher_rate_income * higher_rate
-
-        total_income_tax = standard_rate_tax + higher_rate_tax
+        with scratch.borrow(total_income_tax) as (higher_rate_tax,):
+            np.subtract(taxable_income, standard_rate_band, out=higher_rate_tax)
+            np.maximum(higher_rate_tax, 0, out=higher_rate_tax)
+            higher_rate_tax *= higher_rate
+            total_income_tax += higher_rate_tax
 
         return total_income_tax
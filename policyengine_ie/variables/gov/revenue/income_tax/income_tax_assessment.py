@@ -0,0 +1,87 @@
+"""Cheapest income tax assessment basis of a tax unit."""
+
+from policyengine_ie.model_api import *
+
+
+# Bases whose tax is within this many euros of the lowest count as the same,
+# so float rounding does not decide between them
+ASSESSMENT_TOLERANCE = 0.01
+
+
+class IncomeTaxAssessment(Enum):
+    JOINT = "Joint assessment"
+    SEPARATE = "Separate assessment"
+    SINGLE = "Single assessment"
+
+
+class income_tax_assessment(Variable):
+    value_type = Enum
+    possible_values = IncomeTaxAssessment
+    default_value = IncomeTaxAssessment.SINGLE
+    entity = TaxUnit
+    definition_period = YEAR
+    label = "Income tax assessment basis"
+    documentation = """
+    How a tax unit is assessed to income tax. Married couples and civil
+    partners can be assessed jointly, with the married band and credits and
+    the band increased by the second earner's income, separately, with the
+    married credits split between them, or as single people. Couples take
+    the basis with the least income tax; joint assessment where bases tie.
+    Everyone else is assessed as single. Set this as an input to fix a
+    couple's basis.
+    """
+    reference = "https://www.revenue.ie/en/personal-tax-credits-reliefs-and-exemptions/marital-status/index.aspx"
+
+    def formula(tax_unit, period, parameters):
+        person = tax_unit.members
+        is_spouse = person("is_spouse", period)
+        is_assessable = person("is_assessable_spouse", period)
+        taxable_income = person("taxable_income", period)
+        has_child_carer_credit = person("has_child_carer_credit", period)
+        has_employment = person("employment_income", period) > 0
+        age = person("age", period)
+        is_renting = person("is_renting", period)
+
+        p = parameters(period).gov.revenue.income_tax
+
+        couple_income = person.tax_unit.sum(taxable_income * is_spouse)
+        own_credits = where(has_employment, p.credits.paye, 0) + where(
+            age >= 65, p.credits.age, 0
+        )
+        couple_credits = person.tax_unit.sum(own_credits * is_spouse)
+        couple_is_renting = person.tax_unit.any(is_renting & is_spouse)
+
+        # Everyone's income tax under every basis at once, one row per basis
+        bases = np.array(ASSESSMENT_BASES)[:, None]
+        income = assessed_income(
+            bases, is_spouse, is_assessable, taxable_income, couple_income
+        )
+        band = assessed_band(
+            bases,
+            is_spouse,
+            is_assessable,
+            has_child_carer_credit,
+            couple_income - taxable_income,
+            p.bands,
+        )
+        credits = assessed_credits(
+            bases,
+            is_spouse,
+            is_assessable,
+            own_credits,
+            couple_credits,
+            is_renting,
+            couple_is_renting,
+            p.credits,
+        )
+        tax = max_(
+            0,
+            banded_income_tax(income, band, p.rates.standard_rate, p.rates.higher_rate)
+            - credits,
+        )
+        tax_by_basis = np.stack([tax_unit.sum(row) for row in tax])
+
+        # The first basis within the tolerance of the lowest tax
+        lowest = tax_by_basis.min(axis=0)
+        cheapest = np.argmax(tax_by_basis <= lowest + ASSESSMENT_TOLERANCE, axis=0)
+        return where(tax_unit("is_married", period), cheapest, SINGLE_ASSESSMENT)
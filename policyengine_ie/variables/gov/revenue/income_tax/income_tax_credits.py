@@ -11,34 +11,32 @@ class income_tax_credits(Variable):
     documentation = """
     Total income tax credits available to reduce tax liability.
     Includes personal credit, PAYE credit, and other applicable credits.
+    Under joint assessment the assessable spouse has both spouses' credits.
     """
     unit = EUR
     reference = "https://www.revenue.ie/en/personal-tax-credits-reliefs-and-exemptions/tax-credits/"
 
     def formula(person, period, parameters):
-        tax_unit = person.tax_unit
-
-        is_married = tax_unit("is_married", period)
+        basis = np.asarray(person.tax_unit("income_tax_assessment", period))
+        is_spouse = person("is_spouse", period)
+        is_assessable = person("is_assessable_spouse", period)
         has_employment = person("employment_income", period) > 0
         age = person("age", period)
-        is_renting = person("is_renting", period, options=[False])
+        is_renting = person("is_renting", period)
 
         p = parameters(period).gov.revenue.income_tax.credits
 
-        # Personal tax credit
-        personal_credit = where(is_married, p.personal.married, p.personal.single)
-
-        # PAYE credit (if has employment income)
-        paye_credit = where(has_employment, p.paye, 0)
-
-        # Age credit (for those 65 and over)
-        age_credit = where(age >= 65, p.age, 0)
-
-        # Rent credit (if renting)
-        rent_credit = where(
-            is_renting, where(is_married, p.rent.married, p.rent.single), 0
+        # PAYE credit (if has employment income) and age credit (65 and over)
+        own_credits = where(has_employment, p.paye, 0) + where(age >= 65, p.age, 0)
+
+        # Personal and rent credits depend on the assessment basis
+        return assessed_credits(
+            basis,
+            is_spouse,
+            is_assessable,
+            own_credits,
+            person.tax_unit.sum(own_credits * is_spouse),
+            is_renting,
+            person.tax_unit.any(is_renting & is_spouse),
+            p,
         )
-
-        total_credits = personal_credit + paye_credit + age_credit + rent_credit
-
-        return total_credits
@@ -0,0 +1,22 @@
+"""Assessable spouse for joint assessment."""
+
+from policyengine_ie.model_api import *
+
+
+class is_assessable_spouse(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Is the assessable spouse"
+    documentation = """
+    Whether the person is the spouse or civil partner assessed on the
+    couple's income under joint assessment: the spouse with the higher
+    taxable income.
+    """
+    reference = "https://www.revenue.ie/en/personal-tax-credits-reliefs-and-exemptions/marital-status/joint-assessment/index.aspx"
+
+    def formula(person, period, parameters):
+        is_spouse = person("is_spouse", period)
+        taxable_income = person("taxable_income", period)
+        rank = person.get_rank(person.tax_unit, -taxable_income, condition=is_spouse)
+        return is_spouse & (rank == 0)
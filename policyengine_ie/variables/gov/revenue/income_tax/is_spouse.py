@@ -0,0 +1,18 @@
+"""Whether a person is one of a married couple."""
+
+from policyengine_ie.model_api import *
+
+
+class is_spouse(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Is a spouse or civil partner"
+    documentation = """
+    Whether the person is an adult in a married tax unit, and so can be
+    jointly or separately assessed with their spouse or civil partner.
+    """
+
+    def formula(person, period, parameters):
+        is_married = person.tax_unit("is_married", period)
+        return is_married & (person("age", period) >= 18)
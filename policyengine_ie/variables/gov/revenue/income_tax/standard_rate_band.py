@@ -10,42 +10,42 @@ class standard_rate_band(Variable):
     label = "Standard rate band"
     documentation = """
     The amount of income taxed at the standard rate (20%) before the higher rate (40%) applies.
-    This varies based on marital status and whether there are dependent children.
+    This varies with the assessment basis and whether there are dependent children. Under
+    joint assessment the assessable spouse has the married band, increased by the other
+    spouse's income up to a limit, and the other spouse has none.
     """
     unit = EUR
     reference = "https://www.revenue.ie/en/jobs-and-pensions/calculating-your-income-tax/tax-rate-band.aspx"
 
     def formula(person, period, parameters):
-        tax_unit = person.tax_unit
-
-        # Get marital status and other circumstances
-        is_married = tax_unit("is_married", period)
-        has_spouse_income = tax_unit("has_spouse_income", period)
-        has_child_carer_credit = person(
-            "has_child_carer_credit", period, options=[False]
-        )
+        basis = np.asarray(person.tax_unit("income_tax_assessment", period))
+        is_spouse = person("is_spouse", period)
+        is_assessable = person("is_assessable_spouse", period)
+        has_child_carer_credit = person("has_child_carer_credit", period)
+        taxable_income = person("taxable_income", period)
+        spouse_income = person.tax_unit.sum(taxable_income * is_spouse) - taxable_income
 
         p = parameters(period).gov.revenue.income_tax.bands
 
-        # Determine the standard rate band
-        standard_band = select(
-            [
-                # Single person with child carer credit
-                logical_and(logical_not(is_married), has_child_carer_credit),
-                # Married couple with one income
-                logical_and(is_married, logical_not(has_spouse_income)),
-                # Married couple with two incomes (complex calculation - simplified here)
-                logical_and(is_married, has_spouse_income),
-                # Single person (default)
-                logical_not(is_married),
-            ],
-            [
+        if jit.use_kernel("standard_rate_band"):
+            return jit.KERNELS["standard_rate_band"](
+                basis,
+                is_spouse,
+                is_assessable,
+                has_child_carer_credit,
+                spouse_income,
+                p.single,
                 p.single_with_child,
                 p.married_one_income,
-                p.married_one_income,  # Simplified - should calculate based on spouse income
-                p.single,
-            ],
-            default=p.single,
+                p.married_max_increase,
+                np.empty(len(basis), dtype=float_type(person)),
+            )
+
+        return assessed_band(
+            basis,
+            is_spouse,
+            is_assessable,
+            has_child_carer_credit,
+            spouse_income,
+            p,
         )
-
-        return standard_band
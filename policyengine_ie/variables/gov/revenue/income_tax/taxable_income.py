@@ -19,9 +19,9 @@ class taxable_income(Variable):
     def formula(person, period, parameters):
         employment_income = person("employment_income", period)
         self_employment_income = person("self_employment_income", period)
-        investment_income = person("investment_income", period, options=[0])
-        rental_income = person("rental_income", period, options=[0])
-        pension_income = person("pension_income", period, options=[0])
+        investment_income = person("investment_income", period)
+        rental_income = person("rental_income", period)
+        pension_income = person("pension_income", period)
 
         # Total gross income
         gross_income = (
@@ -33,7 +33,7 @@ class taxable_income(Variable):
         )
 
         # Deduct allowable deductions (simplified - would need to implement specific deductions)
-        total_deductions = person("total_deductions", period, options=[0])
+        total_deductions = person("total_deductions", period)
 
         taxable_income = max_(0, gross_income - total_deductions)
 
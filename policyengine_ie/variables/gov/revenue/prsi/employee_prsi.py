@@ -18,48 +18,53 @@ class employee_prsi(Variable):
 
     def formula(person, period, parameters):
         employment_income = person("employment_income", period)
-        prsi_class = person("prsi_class", period, options=["A"])  # Default to Class A
         age = person("age", period)
 
         p = parameters(period).gov.revenue.prsi
 
-        # Convert annual to weekly for threshold comparison
-        weekly_earnings = employment_income / 52
+        if jit.use_kernel("employee_prsi"):
+            return jit.KERNELS["employee_prsi"](
+                employment_income,
+                age,
+                p.employee_rates.class_a,
+                p.thresholds.employee_weekly_threshold,
+                p.thresholds.tapered_credit_upper_limit,
+                p.thresholds.weekly_prsi_credit,
+                np.empty_like(employment_income),
+            )
 
-        # Check if exempt (under 16 or over 70 from 2024)
-        exempt_age = logical_or(age < 16, age >= 70)
-
-        # Check if below minimum earnings threshold
-        below_threshold = weekly_earnings <= p.thresholds.employee_weekly_threshold
+        min_threshold = p.thresholds.employee_weekly_threshold
+        weekly_credit_threshold = p.thresholds.tapered_credit_upper_limit
+        max_weekly_credit = p.thresholds.weekly_prsi_credit
 
-        # Calculate PRSI rate based on class (simplified to Class A)
-        employee_rate = p.employee_rates.class_a
+        # Check if exempt (under 16 or over 70 from 2024)
+        exempt = logical_or(age < 16, age >= 70)
 
-        # Calculate base PRSI
-        base_prsi = employment_income * employee_rate
+        # Calculate base PRSI (simplified to Class A)
+        prsi = employment_income * p.employee_rates.class_a
 
-        # Calculate weekly PRSI credit
-        weekly_credit_threshold = p.thresholds.tapered_credit_upper_limit
-        max_weekly_credit = p.thresholds.weekly_prsi_credit
-        min_threshold = p.thresholds.employee_weekly_threshold
+        with scratch.borrow(employment_income, 2) as (weekly_earnings, credit):
+            # Convert annual to weekly for threshold comparison
+            np.divide(employment_income, 52, out=weekly_earnings)
 
-        # Credit applies for earnings between €352.01 and €424
-        eligible_for_credit = logical_and(
-            weekly_earnings > min_threshold,
-            weekly_earnings <= weekly_credit_threshold,
-        )
+            # Exempt if below minimum earnings threshold
+            below_threshold = weekly_earnings <= min_threshold
+            exempt |= below_threshold
 
-        # Calculate tapered credit
-        credit_reduction = max_(0, (weekly_earnings - min_threshold) / 6)
-        weekly_credit = max_(0, max_weekly_credit - credit_reduction)
-        annual_credit = where(eligible_for_credit, weekly_credit * 52, 0)
+            # Credit applies for earnings between €352.01 and €424, tapering
+            # by a sixth of earnings above the threshold
+            np.subtract(weekly_earnings, min_threshold, out=credit)
+            credit /= 6
+            np.maximum(credit, 0, out=credit)
+            np.subtract(max_weekly_credit, credit, out=credit)
+            np.maximum(credit, 0, out=credit)
+            credit *= 52
+            credit[below_threshold | (weekly_earnings > weekly_credit_threshold)] = 0
 
-        # Apply credit
-        prsi_after_credit = max_(0, base_prsi - annual_credit)
+            # Apply credit
+            prsi -= credit
+            np.maximum(prsi, 0, out=prsi)
 
         # Apply exemptions
-        final_prsi = where(
-            logical_or(exempt_age, below_threshold), 0, prsi_after_credit
-        )
-
-        return final_prsi
+        prsi[exempt] = 0
+        return prsi
@@ -0,0 +1,55 @@
+"""Employer PRSI contribution calculation."""
+
+from policyengine_ie.model_api import *
+
+
+class employer_prsi(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Employer PRSI"
+    documentation = """
+    Employer PRSI (Pay Related Social Insurance) contributions on an employee's earnings.
+    Class A employers pay the lower rate on all earnings if weekly earnings are at or
+    below the higher rate threshold, and the higher rate on all earnings above it.
+    Rates and the threshold change part-way through some years, so the year is split
+    into the sub-periods over which they are constant and each is charged at its own rates.
+    """
+    unit = EUR
+    reference = "https://www.revenue.ie/en/employing-people/paying-your-employees-tax-to-revenue/prsi.aspx"
+
+    def formula(person, period, parameters):
+        employment_income = person("employment_income", period)
+
+        p = parameters.gov.revenue.prsi
+        threshold = p.thresholds.employer_higher_rate_threshold
+        standard_rate = p.employer_rates.class_a_standard
+        higher_rate = p.employer_rates.class_a_higher
+
+        # Sub-periods of the year with constant rates and threshold
+        starts, weights = intra_year_segments(
+            period, threshold, standard_rate, higher_rate
+        )
+        thresholds = parameter_values(threshold, starts)
+        standard_rates = parameter_values(standard_rate, starts)
+        higher_rates = parameter_values(higher_rate, starts)
+
+        # Weight each sub-period's rate by its share of the year, one
+        # sub-period at a time
+        effective_rate = np.zeros_like(employment_income)
+        with scratch.borrow(employment_income) as (weekly_earnings,):
+            with scratch.borrow(effective_rate) as (rate,):
+                # Convert annual to weekly for threshold comparison
+                np.divide(employment_income, 52, out=weekly_earnings)
+                for segment in range(len(starts)):
+                    rate.fill(standard_rates[segment])
+                    np.copyto(
+                        rate,
+                        higher_rates[segment],
+                        where=weekly_earnings > thresholds[segment],
+                    )
+                    rate *= weights[segment]
+                    effective_rate += rate
+
+        effective_rate *= employment_income
+        return effective_rate
@@ -19,9 +19,9 @@ class gross_income_for_usc(Variable):
     def formula(person, period, parameters):
         employment_income = person("employment_income", period)
         self_employment_income = person("self_employment_income", period)
-        investment_income = person("investment_income", period, options=[0])
-        rental_income = person("rental_income", period, options=[0])
-        pension_income = person("pension_income", period, options=[0])
+        investment_income = person("investment_income", period)
+        rental_income = person("rental_income", period)
+        pension_income = person("pension_income", period)
 
         # USC applies to gross income before any deductions
         gross_income = (
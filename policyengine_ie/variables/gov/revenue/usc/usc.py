@@ -19,7 +19,7 @@ class usc(Variable):
     def formula(person, period, parameters):
         gross_income = person("gross_income_for_usc", period)
         age = person("age", period)
-        has_medical_card = person("has_medical_card", period, options=[False])
+        has_medical_card = person("has_medical_card", period)
 
         p = parameters(period).gov.revenue.usc
 
@@ -31,50 +31,35 @@ class usc(Variable):
             gross_income <= p.thresholds.reduced_rate_income_threshold
         )
 
-        # Calculate USC using progressive rates
-        band_1_threshold = p.thresholds.band_1_upper
-        band_2_threshold = p.thresholds.band_2_upper
-        band_3_threshold = p.thresholds.band_3_upper
-
-        # Band 1: First €12,012
-        band_1_income = min_(gross_income, band_1_threshold)
-        band_1_rate = where(
-            eligible_for_reduced_rates, p.rates.reduced_band_1, p.rates.band_1
-        )
-        band_1_usc = band_1_income * band_1_rate
-
-        # Band 2: €12,012.01 to €25,760
-        band_2_income = max_(
-            0,
-            min_(
-                gross_income - band_1_threshold,
-                band_2_threshold - band_1_threshold,
+        # Charge each band in turn, working in two scratch arrays
+        thresholds = p.thresholds
+        bands = [
+            (0, thresholds.band_1_upper, p.rates.band_1, p.rates.reduced_band_1),
+            (
+                thresholds.band_1_upper,
+                thresholds.band_2_upper,
+                p.rates.band_2,
+                p.rates.reduced_band_2,
             ),
-        )
-        band_2_rate = where(
-            eligible_for_reduced_rates, p.rates.reduced_band_2, p.rates.band_2
-        )
-        band_2_usc = band_2_income * band_2_rate
-
-        # Band 3: €25,760.01 to €70,044
-        band_3_income = max_(
-            0,
-            min_(
-                gross_income - band_2_threshold,
-                band_3_threshold - band_2_threshold,
+            (
+                thresholds.band_2_upper,
+                thresholds.band_3_upper,
+                p.rates.band_3,
+                p.rates.reduced_band_3,
             ),
-        )
-        band_3_rate = where(
-            eligible_for_reduced_rates, p.rates.reduced_band_3, p.rates.band_3
-        )
-        band_3_usc = band_3_income * band_3_rate
-
-        # Band 4: Above €70,044
-        band_4_income = max_(0, gross_income - band_3_threshold)
-        band_4_rate = p.rates.band_4  # No reduced rate for highest band
-        band_4_usc = band_4_income * band_4_rate
-
-        total_usc = band_1_usc + band_2_usc + band_3_usc + band_4_usc
+            # No reduced rate for the highest band
+            (thresholds.band_3_upper, np.inf, p.rates.band_4, p.rates.band_4),
+        ]
+        total_usc = np.zeros_like(gross_income)
+        with scratch.borrow(gross_income, 2) as (band_usc, rate):
+            for lower, upper, band_rate, reduced_rate in bands:
+                np.subtract(gross_income, lower, out=band_usc)
+                np.clip(band_usc, 0, upper - lower, out=band_usc)
+                rate.fill(band_rate)
+                np.copyto(rate, reduced_rate, where=eligible_for_reduced_rates)
+                band_usc *= rate
+                total_usc += band_usc
 
         # Apply exemption
-        return where(exempt, 0, total_usc)
+        total_usc[exempt] = 0
+        return total_usc
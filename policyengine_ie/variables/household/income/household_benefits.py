@@ -0,0 +1,21 @@
+"""Household social protection payments."""
+
+from policyengine_ie.model_api import *
+
+
+class household_benefits(Variable):
+    value_type = float
+    entity = Household
+    definition_period = YEAR
+    label = "Household benefits"
+    documentation = """
+    Social protection payments received by all household members.
+    """
+    unit = EUR
+    adds = [
+        "child_benefit",
+        "jobseekers_allowance",
+        "state_pension_contributory",
+        "state_pension_non_contributory",
+        "disability_allowance",
+    ]
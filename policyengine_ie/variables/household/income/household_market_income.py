@@ -0,0 +1,21 @@
+"""Household market income."""
+
+from policyengine_ie.model_api import *
+
+
+class household_market_income(Variable):
+    value_type = float
+    entity = Household
+    definition_period = YEAR
+    label = "Household market income"
+    documentation = """
+    Income of all household members before taxes and social protection payments.
+    """
+    unit = EUR
+    adds = [
+        "employment_income",
+        "self_employment_income",
+        "investment_income",
+        "rental_income",
+        "pension_income",
+    ]
@@ -0,0 +1,20 @@
+"""Household net income."""
+
+from policyengine_ie.model_api import *
+
+
+class household_net_income(Variable):
+    value_type = float
+    entity = Household
+    definition_period = YEAR
+    label = "Household net income"
+    documentation = """
+    Disposable income of the household: market income plus social protection
+    payments, less income tax, USC and employee PRSI.
+    """
+    unit = EUR
+    adds = [
+        "household_market_income",
+        "household_benefits",
+    ]
+    subtracts = ["household_tax"]
@@ -0,0 +1,19 @@
+"""Household taxes."""
+
+from policyengine_ie.model_api import *
+
+
+class household_tax(Variable):
+    value_type = float
+    entity = Household
+    definition_period = YEAR
+    label = "Household tax"
+    documentation = """
+    Income tax, USC and employee PRSI paid by all household members.
+    """
+    unit = EUR
+    adds = [
+        "income_tax_net",
+        "usc",
+        "employee_prsi",
+    ]
@@ -141,3 +141,98 @@ class prsi_class(Variable):
     definition_period = YEAR
     label = "PRSI class"
     default_value = "A"
+
+
+class assessable_income_jobseekers(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Assessable income for Jobseeker's Allowance"
+    unit = EUR
+    default_value = 0
+
+
+class jobseekers_means_test(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Passes the Jobseeker's Allowance means test"
+    default_value = True
+
+
+class qualified_adults_jobseekers(Variable):
+    value_type = int
+    entity = BenefitUnit
+    definition_period = YEAR
+    label = "Qualified adults for Jobseeker's Allowance"
+    default_value = 0
+
+
+class qualified_children_jobseekers(Variable):
+    value_type = int
+    entity = BenefitUnit
+    definition_period = YEAR
+    label = "Qualified children for Jobseeker's Allowance"
+    default_value = 0
+
+
+class prsi_contributions(Variable):
+    value_type = int
+    entity = Person
+    definition_period = YEAR
+    label = "Paid PRSI contributions"
+    documentation = "Weekly PRSI contributions paid over the person's working life."
+    default_value = 0
+
+
+class prsi_credited_contributions(Variable):
+    value_type = int
+    entity = Person
+    definition_period = YEAR
+    label = "Credited PRSI contributions"
+    documentation = """
+    Weekly PRSI contributions credited over the person's working life, for
+    periods of illness, unemployment or caring.
+    """
+    default_value = 0
+
+
+class prsi_insured_years(Variable):
+    value_type = float
+    entity = Person
+    definition_period = YEAR
+    label = "Years of PRSI insurance"
+    documentation = """
+    Years from the person's entry into insurance to the end of the tax year
+    before they reach State Pension age, over which their yearly average
+    contributions are calculated.
+    """
+    default_value = 0
+
+
+class is_disabled(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Is disabled"
+    documentation = """
+    Whether the person has an injury, disease or disability expected to
+    last at least a year that substantially restricts the work they can do.
+    """
+    default_value = False
+
+
+class is_living_alone(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Is living alone"
+    default_value = False
+
+
+class is_island_resident(Variable):
+    value_type = bool
+    entity = Person
+    definition_period = YEAR
+    label = "Lives on an offshore island"
+    default_value = False
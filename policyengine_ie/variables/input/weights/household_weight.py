@@ -0,0 +1,17 @@
+"""Household survey weight."""
+
+from policyengine_ie.model_api import *
+
+
+class household_weight(Variable):
+    value_type = float
+    entity = Household
+    definition_period = YEAR
+    label = "Household weight"
+    documentation = """
+    Number of Irish households this household represents in survey microdata.
+    Used to produce population aggregates; see policyengine_ie.calibration.
+    """
+    default_value = 1
+    # Weighted sums over millions of households need more than float32
+    metadata = {"double_precision": True}
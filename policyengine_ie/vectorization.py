@@ -0,0 +1,434 @@
+"""
+Checks that formulas stay vectorized.
+
+A formula works on whole arrays of people or groups at once. A Python ``if``
+or ``and`` on an array, or a loop over its elements, fails on a population
+of more than one person, or worse passes on the one-person tests and runs
+at interpreter speed on a population. ``check_formulas`` reads the source of
+every formula under ``variables/gov`` and reports:
+
+- ``scalar-branch``: ``if``, ``while``, a conditional expression, ``and``,
+  ``or``, ``not`` or ``assert`` on an array. Use ``where``, ``select`` or
+  ``&``, ``|`` and ``~``.
+- ``element-loop``: a loop or comprehension over an array's elements, or
+  over ``range(len(array))``. Write it in array operations, or as a loop
+  kernel (see ``policyengine_ie.jit``).
+- ``object-dtype``: reading a string variable such as ``prsi_class``, or
+  building an array of Python objects. Object arrays are compared one
+  Python object at a time. Use an ``Enum`` variable.
+- ``float64-upcast``: an array allocated without a dtype (``np.zeros``,
+  ``np.ones``, ``np.empty``, ``np.full``) or cast to float64. Single
+  precision runs would work in double and cast back (see
+  ``policyengine_ie.precision``). Use the ``_like`` functions.
+- ``unused-lookup``: a variable looked up and never used, which is
+  calculated for nothing.
+- ``ignored-options``: ``options`` other than ``ADD`` or ``DIVIDE``, which
+  policyengine-core ignores. Values such as ``options=[False]`` are not
+  defaults; give inputs defaults with ``default_value``.
+
+Strict vectorization mode checks the same at run time, for formulas outside
+the reach of the source checks, such as those calling helpers. Switch it on
+with ``set_strict``, ``strict_vectorization`` or the
+``POLICYENGINE_IE_STRICT_VECTORIZATION`` environment variable::
+
+    with strict_vectorization():
+        simulation.calculate("household_net_income", "2025")
+
+Each formula then gets the variables it reads as arrays that raise on use as
+one Python value, in an ``if`` or a loop, even with one person, and its
+result must have one value per entity and no object dtype unless the
+variable is a string. Float width is left to the source checks, as group
+sums in policyengine-core give float64 whatever the formula does.
+
+The checks also run from the command line, exiting with 1 if any fail::
+
+    python -m policyengine_ie lint
+"""
+
+import ast
+import inspect
+import os
+import textwrap
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+import numpy as np
+from policyengine_core.enums import EnumArray
+
+
+GOV_DIR = Path(__file__).parent / "variables" / "gov"
+
+STRICT_ENVIRONMENT_VARIABLE = "POLICYENGINE_IE_STRICT_VECTORIZATION"
+
+SCALAR_BRANCH = "scalar-branch"
+ELEMENT_LOOP = "element-loop"
+OBJECT_DTYPE = "object-dtype"
+FLOAT64_UPCAST = "float64-upcast"
+UNUSED_LOOKUP = "unused-lookup"
+IGNORED_OPTIONS = "ignored-options"
+
+# Calls and attributes giving one value for a whole array
+SCALAR_FUNCTIONS = {"len", "isinstance", "hasattr", "type"}
+SCALAR_ATTRIBUTES = {"shape", "size", "ndim", "dtype", "count"}
+REDUCTIONS = {"any", "all", "sum", "min", "max", "mean", "use_kernel"}
+
+ALLOCATIONS = {"zeros", "ones", "empty", "full"}
+FLOAT64_NAMES = {"float", "float64", "double"}
+OBJECT_NAMES = {"object", "str", "object_", "str_"}
+OPTIONS = {"ADD", "DIVIDE"}
+
+_strict: Optional[bool] = None
+
+
+@dataclass
+class LintIssue:
+    """A pattern in a formula that stops it being vectorized."""
+
+    variable: str
+    rule: str
+    message: str
+    file: str
+    line: int
+
+    def __str__(self) -> str:
+        return f"{self.file}:{self.line}: {self.rule}: {self.variable}: {self.message}"
+
+
+def _name(node) -> Optional[str]:
+    """The last name of a name or attribute, e.g. ``float64`` of
+    ``np.float64``."""
+    if isinstance(node, ast.Name):
+        return node.id
+    if isinstance(node, ast.Attribute):
+        return node.attr
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    return None
+
+
+def _root(node) -> Optional[str]:
+    while isinstance(node, (ast.Attribute, ast.Call, ast.Subscript)):
+        node = node.func if isinstance(node, ast.Call) else node.value
+    return node.id if isinstance(node, ast.Name) else None
+
+
+class _FormulaChecker:
+    """Finds unvectorized patterns in one formula's syntax tree, following
+    which names hold arrays in order through its statements."""
+
+    def __init__(self, function: ast.FunctionDef, variable: str, system):
+        self.variable = variable
+        self.system = system
+        arguments = [argument.arg for argument in function.args.args]
+        self.entity = arguments[0] if arguments else None
+        self.arrays = set()
+        self.issues = []
+        self.loaded = {
+            node.id
+            for node in ast.walk(function)
+            if isinstance(node, ast.Name) and isinstance(node.ctx, ast.Load)
+        }
+        for statement in function.body:
+            self.statement(statement)
+
+    def report(self, node, rule: str, message: str) -> None:
+        self.issues.append((node.lineno, rule, message))
+
+    def is_array(self, node) -> bool:
+        if isinstance(node, ast.Name):
+            return node.id in self.arrays
+        if isinstance(node, ast.Constant):
+            return False
+        if isinstance(node, ast.Attribute):
+            return node.attr not in SCALAR_ATTRIBUTES and self.is_array(node.value)
+        if isinstance(node, ast.Subscript):
+            if isinstance(node.slice, ast.Constant):
+                return False
+            return self.is_array(node.value)
+        if isinstance(node, ast.Call):
+            function = node.func
+            if _root(function) == self.entity:
+                return _name(function) not in SCALAR_ATTRIBUTES
+            if isinstance(function, ast.Name) and function.id in SCALAR_FUNCTIONS:
+                return False
+            if isinstance(function, ast.Attribute):
+                if function.attr in REDUCTIONS:
+                    return False
+                if self.is_array(function.value):
+                    return True
+            arguments = node.args + [keyword.value for keyword in node.keywords]
+            return any(self.is_array(argument) for argument in arguments)
+        if isinstance(node, (ast.Lambda, ast.FunctionDef)):
+            return False
+        return any(self.is_array(child) for child in ast.iter_child_nodes(node))
+
+    def assign(self, target, is_array: bool) -> None:
+        if isinstance(target, ast.Name):
+            if is_array:
+                self.arrays.add(target.id)
+            else:
+                self.arrays.discard(target.id)
+        elif isinstance(target, (ast.Tuple, ast.List)):
+            for element in target.elts:
+                self.assign(element, is_array)
+
+    def statement(self, node) -> None:
+        if isinstance(node, (ast.FunctionDef, ast.ClassDef)):
+            return
+        if isinstance(node, (ast.If, ast.While)) and self.is_array(node.test):
+            keyword = "if" if isinstance(node, ast.If) else "while"
+            self.report(node, SCALAR_BRANCH, f"'{keyword}' on an array.")
+        elif isinstance(node, ast.Assert) and self.is_array(node.test):
+            self.report(node, SCALAR_BRANCH, "'assert' on an array.")
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self.loop(node, node.iter)
+        for child in ast.iter_child_nodes(node):
+            if not isinstance(child, ast.stmt):
+                self.expression(child)
+        if isinstance(node, ast.Assign):
+            value_is_array = self.is_array(node.value)
+            for target in node.targets:
+                self.assign(target, value_is_array)
+            self.lookup_used(node)
+        elif isinstance(node, (ast.AugAssign, ast.AnnAssign)) and node.value:
+            if self.is_array(node.value):
+                self.assign(node.target, True)
+        elif isinstance(node, ast.With):
+            for item in node.items:
+                if item.optional_vars is not None:
+                    self.assign(item.optional_vars, self.is_array(item.context_expr))
+        elif isinstance(node, (ast.For, ast.AsyncFor)):
+            self.assign(node.target, False)
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.stmt):
+                self.statement(child)
+
+    def loop(self, node, iterable) -> None:
+        over_range = (
+            isinstance(iterable, ast.Call)
+            and _name(iterable.func) == "range"
+            and any(
+                isinstance(argument, ast.Call)
+                and _name(argument.func) == "len"
+                and self.is_array(argument.args[0])
+                for argument in iterable.args
+                if isinstance(argument, ast.Call) and argument.args
+            )
+        )
+        if over_range or self.is_array(iterable):
+            self.report(node, ELEMENT_LOOP, "Loop over an array's elements.")
+
+    def expression(self, node) -> None:
+        for child in ast.walk(node):
+            if isinstance(child, ast.IfExp) and self.is_array(child.test):
+                self.report(child, SCALAR_BRANCH, "Conditional expression on an array.")
+            elif isinstance(child, ast.BoolOp) and any(
+                self.is_array(value) for value in child.values
+            ):
+                operator = "and" if isinstance(child.op, ast.And) else "or"
+                self.report(
+                    child, SCALAR_BRANCH, f"'{operator}' on an array; use '&' or '|'."
+                )
+            elif (
+                isinstance(child, ast.UnaryOp)
+                and isinstance(child.op, ast.Not)
+                and self.is_array(child.operand)
+            ):
+                self.report(child, SCALAR_BRANCH, "'not' on an array; use '~'.")
+            elif isinstance(child, ast.comprehension):
+                self.loop(child.iter, child.iter)
+            elif isinstance(child, ast.Call):
+                self.call(child)
+
+    def call(self, node: ast.Call) -> None:
+        function = _name(node.func)
+        keywords = {keyword.arg: keyword.value for keyword in node.keywords}
+        dtype = _name(keywords.get("dtype"))
+        if function == "astype" and node.args:
+            dtype = _name(node.args[0])
+        if dtype in FLOAT64_NAMES or function == "float64":
+            self.report(node, FLOAT64_UPCAST, "Cast to float64.")
+        elif dtype in OBJECT_NAMES:
+            self.report(node, OBJECT_DTYPE, "Array of Python objects.")
+        elif (
+            function in ALLOCATIONS
+            and _root(node.func) in ("np", "numpy")
+            and "dtype" not in keywords
+        ):
+            self.report(
+                node,
+                FLOAT64_UPCAST,
+                f"np.{function} without a dtype allocates float64; use "
+                f"np.{function}_like.",
+            )
+        if _root(node.func) != self.entity or not node.args:
+            return
+        looked_up = node.args[0]
+        if not isinstance(looked_up, ast.Constant):
+            return
+        variable = self.system.variables.get(looked_up.value)
+        if variable is not None and variable.value_type is str:
+            self.report(
+                node,
+                OBJECT_DTYPE,
+                f"'{looked_up.value}' is a string variable, held as an object array.",
+            )
+        options = keywords.get("options", node.args[2] if len(node.args) > 2 else None)
+        if isinstance(options, (ast.List, ast.Tuple, ast.Set)):
+            ignored = [
+                ast.unparse(option)
+                for option in options.elts
+                if _name(option) not in OPTIONS
+            ]
+            if ignored:
+                self.report(
+                    node,
+                    IGNORED_OPTIONS,
+                    f"options {', '.join(ignored)} of '{looked_up.value}' are "
+                    f"ignored; only ADD and DIVIDE have an effect.",
+                )
+
+    def lookup_used(self, node: ast.Assign) -> None:
+        value = node.value
+        if not (
+            isinstance(value, ast.Call)
+            and _root(value.func) == self.entity
+            and value.args
+            and isinstance(value.args[0], ast.Constant)
+        ):
+            return
+        for target in node.targets:
+            if isinstance(target, ast.Name) and target.id not in self.loaded:
+                self.report(
+                    node,
+                    UNUSED_LOOKUP,
+                    f"'{value.args[0].value}' is looked up as '{target.id}' and "
+                    f"never used.",
+                )
+
+
+def _in_directory(path: str, directory: Path) -> bool:
+    try:
+        Path(path).resolve().relative_to(directory.resolve())
+    except ValueError:
+        return False
+    return True
+
+
+def check_formulas(system, variables: Iterable[str] = None) -> List[LintIssue]:
+    """
+    Find unvectorized patterns in formulas.
+
+    Args:
+        system: Tax-benefit system whose formulas to check.
+        variables: Variables to check. Defaults to those defined under
+            ``variables/gov``.
+
+    Returns:
+        The issues found, by variable and line.
+    """
+    names = list(system.variables) if variables is None else list(variables)
+    issues = []
+    for name in names:
+        variable = system.get_variable(name, check_existence=True)
+        for formula in variable.formulas.values():
+            file = inspect.getsourcefile(formula)
+            if variables is None and not _in_directory(file, GOV_DIR):
+                continue
+            lines, first_line = inspect.getsourcelines(formula)
+            tree = ast.parse(textwrap.dedent("".join(lines)))
+            checker = _FormulaChecker(tree.body[0], name, system)
+            for line, rule, message in sorted(set(checker.issues)):
+                issues.append(
+                    LintIssue(name, rule, message, file, first_line + line - 1)
+                )
+    return issues
+
+
+class StrictArray(np.ndarray):
+    """An array that raises if used as one Python value."""
+
+    def _refuse(self, use: str):
+        raise ValueError(
+            f"Array {use} in a formula, under strict vectorization; see "
+            f"policyengine_ie.vectorization."
+        )
+
+    def __bool__(self):
+        if self.ndim:
+            self._refuse("used as a condition")
+        return super().__bool__()
+
+    def __iter__(self):
+        if self.ndim:
+            self._refuse("looped over")
+        return super().__iter__()
+
+    def __float__(self):
+        if self.ndim:
+            self._refuse("converted to a float")
+        return super().__float__()
+
+    def __int__(self):
+        if self.ndim:
+            self._refuse("converted to an int")
+        return super().__int__()
+
+
+def is_strict() -> bool:
+    """Whether strict vectorization mode is on."""
+    if _strict is not None:
+        return _strict
+    return os.environ.get(STRICT_ENVIRONMENT_VARIABLE, "") not in ("", "0")
+
+
+def set_strict(enabled: Optional[bool]) -> None:
+    """Switch strict vectorization mode on or off, or with ``None`` back to
+    the environment variable's setting."""
+    global _strict
+    _strict = enabled
+
+
+@contextmanager
+def strict_vectorization(enabled: bool = True):
+    """Switch strict vectorization mode on inside a ``with`` block."""
+    previous = _strict
+    set_strict(enabled)
+    try:
+        yield
+    finally:
+        set_strict(previous)
+
+
+def strict_input(values):
+    """Values a formula reads, as a ``StrictArray`` where they are plain
+    arrays."""
+    if type(values) is np.ndarray:
+        return values.view(StrictArray)
+    return values
+
+
+def check_result(variable, population, values):
+    """
+    Check a formula's result under strict vectorization.
+
+    Returns:
+        The result as a plain array.
+    """
+    if isinstance(values, StrictArray):
+        values = values.view(np.ndarray)
+    if not isinstance(values, np.ndarray) or isinstance(values, EnumArray):
+        return values
+    problem = None
+    if values.shape != (population.count,):
+        problem = f"has shape {values.shape}, not ({population.count},)"
+    elif values.dtype == object and variable.value_type is not str:
+        problem = "is an array of Python objects"
+    if problem is not None:
+        raise ValueError(
+            f"The formula of '{variable.name}' returned an array that {problem}, "
+            f"under strict vectorization."
+        )
+    return values